@@ -0,0 +1,43 @@
+"""
+DAO especializado para persistência dos agregados das vendas finalizadas.
+
+Os contadores usados pelos relatórios (faturamento, unidades por café e por
+máquina, unidades por fornecedor e gasto por cliente) são mantidos
+incrementalmente a cada finalização de venda e gravados neste arquivo, junto
+com a venda, na mesma unidade de trabalho. Assim os relatórios não precisam
+percorrer o histórico de vendas.
+
+Assim como o EstoqueDAO, utiliza uma chave fixa ('AGREGADOS') para guardar
+todo o estado em uma única entrada, como um dicionário de estruturas simples.
+Se o arquivo não existir (ex: primeira execução com um histórico antigo), os
+agregados são reconstruídos a partir das vendas.
+"""
+
+from typing import Optional
+
+from DAOs.dao import DAO
+
+
+class AgregadosVendaDAO(DAO):
+    _CHAVE = 'AGREGADOS'
+
+    def __init__(self):
+        """
+        Inicializa o DAO de agregados, configurando 'agregados_vendas.pkl'
+        como arquivo de persistência e carregando o estado existente.
+        """
+        super().__init__('agregados_vendas.pkl')
+
+    def salvar(self, estado: dict) -> None:
+        """
+        Persiste o estado completo dos agregados.
+        """
+        super().add(self._CHAVE, estado)
+
+    def carregar(self) -> Optional[dict]:
+        """
+        Carrega o estado dos agregados. Retorna None se ainda não houver
+        agregados salvos.
+        """
+        estado = super().get(self._CHAVE)
+        return estado if isinstance(estado, dict) else None
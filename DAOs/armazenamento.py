@@ -0,0 +1,71 @@
+"""
+Interface base para as estratégias de armazenamento usadas pelos DAOs.
+
+Este módulo separa *como* os registros são gravados em disco de *o que* o DAO
+mantém em memória. A classe DAO continua responsável pelo cache e pelas
+validações; a estratégia de armazenamento recebe apenas o conjunto de
+alterações de cada operação e decide como refleti-las no arquivo.
+
+Estratégias disponíveis:
+- ArmazenamentoSnapshot: reescreve o arquivo inteiro a cada alteração
+  (comportamento original do sistema)
+- ArmazenamentoLog: acrescenta cada alteração em um log e compacta o
+  snapshot apenas quando o log cresce demais
+- ArmazenamentoSQLite: grava apenas as linhas alteradas em um banco SQLite
+- ArmazenamentoIndexado: carrega só o índice de chaves e lê cada registro
+  do disco quando acessado
+
+A escolha da estratégia para cada arquivo é feita em DAOs/configuracao.py.
+"""
+
+from abc import ABC, abstractmethod
+
+
+# Marca uma chave removida dentro do dicionário de alterações
+REMOVIDO = object()
+
+
+class Armazenamento(ABC):
+    @abstractmethod
+    def __init__(self, datasource: str) -> None:
+        """
+        Guarda o caminho do arquivo principal de persistência. Subclasses
+        podem derivar arquivos auxiliares (log, índices) a partir dele.
+        """
+        self._datasource = datasource
+
+    @property
+    def datasource(self) -> str:
+        return self._datasource
+
+    @abstractmethod
+    def carregar(self) -> dict:
+        """
+        Lê o estado persistido e retorna o dicionário de registros (ou um
+        mapeamento equivalente, no caso de estratégias com carga sob
+        demanda). Lança
+        FileNotFoundError, pickle.UnpicklingError ou EOFError quando não há
+        estado válido, permitindo que o DAO recrie um arquivo vazio.
+        """
+
+    @abstractmethod
+    def persistir(self, registros: dict, alteracoes: dict) -> None:
+        """
+        Reflete no disco as alterações de uma operação. Recebe o cache
+        completo e o dicionário de alterações, que mapeia cada chave
+        modificada para seu novo valor ou para REMOVIDO.
+        """
+
+    @abstractmethod
+    def compactar(self, registros: dict) -> None:
+        """
+        Grava o estado completo de uma só vez, descartando qualquer
+        histórico intermediário. Usado na criação de arquivos vazios e
+        quando a estratégia decide consolidar o que foi acumulado.
+        """
+
+    def fechar(self) -> None:
+        """
+        Libera recursos mantidos pela estratégia (arquivos, conexões).
+        A implementação padrão não faz nada.
+        """
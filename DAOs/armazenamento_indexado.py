@@ -0,0 +1,428 @@
+"""
+Estratégia de armazenamento indexado com carga sob demanda.
+
+Nos demais modos, a construção do DAO desserializa a tabela inteira, mesmo
+que a sessão consulte apenas alguns registros. Neste modo os registros ficam
+em um arquivo de dados ('<arquivo>.dados'), cada um serializado de forma
+independente, e um índice ('<arquivo>.indice') guarda a posição de cada
+chave no arquivo de dados. Na inicialização apenas o índice é lido; o valor
+de uma chave só é desserializado quando o DAO o acessa, e os objetos
+materializados ficam em um cache LRU de tamanho limitado.
+
+Formato do arquivo de dados: cabeçalho com assinatura e um número de
+geração aleatório, seguido de registros no formato
+(operação, tamanho da chave, tamanho do valor, CRC32, chave, valor). Cada
+alteração é acrescentada ao final do arquivo, como no modo 'log'.
+
+O índice é gravado de forma atômica (ver DAOs/arquivo_seguro.py) e registra
+até que posição do arquivo de dados ele cobre. Na carga, os registros
+acrescentados depois dessa posição são percorridos lendo apenas as chaves.
+Se o índice estiver ausente, corrompido ou pertencer a outra geração do
+arquivo de dados, ele é reconstruído a partir do arquivo de dados inteiro.
+
+Valores sobrescritos e removidos deixam espaço morto no arquivo de dados;
+quando esse espaço supera o volume de dados vivos (e o limite mínimo
+configurado), o arquivo é reescrito copiando os bytes dos registros vivos,
+sem desserializá-los.
+
+Na primeira abertura, se existir o snapshot .pkl correspondente, seus
+registros são importados.
+"""
+
+import os
+import pickle
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Callable, Dict, Optional, Tuple
+
+from DAOs.armazenamento import Armazenamento, REMOVIDO
+from DAOs.arquivo_seguro import (abrir_temporario, carregar_snapshot, descartar_temporario,
+                                 existe_snapshot, gravar_snapshot)
+
+
+_ASSINATURA_DADOS = b'CFRDADOS'
+_FORMATO_CABECALHO_ARQUIVO = '<8sQ'
+_TAMANHO_CABECALHO_ARQUIVO = struct.calcsize(_FORMATO_CABECALHO_ARQUIVO)
+# Registro: operação, tamanho da chave, tamanho do valor, CRC32 de chave+valor
+_FORMATO_CABECALHO_REGISTRO = '<BIII'
+_TAMANHO_CABECALHO_REGISTRO = struct.calcsize(_FORMATO_CABECALHO_REGISTRO)
+_OPERACAO_GRAVAR = 1
+_OPERACAO_REMOVER = 2
+
+# Posição de uma chave no arquivo de dados: (início do registro, tamanho da
+# chave serializada, tamanho do valor serializado)
+Posicao = Tuple[int, int, int]
+
+
+class RegistrosSobDemanda(MutableMapping):
+    """
+    Dicionário de registros usado como cache do DAO no modo indexado. Conhece
+    todas as chaves existentes, mas só guarda em memória os valores alterados
+    na sessão e os lidos recentemente (LRU); os demais são lidos do arquivo
+    de dados no primeiro acesso.
+    """
+
+    def __init__(self, armazenamento: 'ArmazenamentoIndexado', chaves,
+                 capacidade: int) -> None:
+        self.__armazenamento = armazenamento
+        self.__chaves = dict.fromkeys(chaves)  # Preserva a ordem de inserção
+        self.__alterados = {}  # Valores definidos na sessão, sempre em memória
+        self.__materializados = OrderedDict()  # LRU dos valores lidos do disco
+        self.__capacidade = capacidade
+        self.__trava = threading.RLock()
+        # Chamado com (chave, valor) para cada valor lido do disco; o retorno
+        # substitui o valor (usado pelo DAO para o mapa de identidade)
+        self.ao_materializar: Optional[Callable] = None
+
+    def __getitem__(self, chave):
+        with self.__trava:
+            if chave in self.__alterados:
+                return self.__alterados[chave]
+            if chave in self.__materializados:
+                self.__materializados.move_to_end(chave)
+                return self.__materializados[chave]
+            if chave not in self.__chaves:
+                raise KeyError(chave)
+            valor = self.__armazenamento.ler(chave)
+            if self.ao_materializar is not None:
+                valor = self.ao_materializar(chave, valor)
+            self.__materializados[chave] = valor
+            if len(self.__materializados) > self.__capacidade:
+                self.__materializados.popitem(last=False)
+            return valor
+
+    def obter_varios(self, chaves) -> dict:
+        """
+        Valores das chaves informadas que existem. As que ainda não estão em
+        memória são lidas do arquivo de dados de uma só vez, em ordem de
+        posição. Chaves inexistentes ficam fora do resultado.
+        """
+        with self.__trava:
+            encontrados = {}
+            a_ler = []
+            for chave in chaves:
+                if chave in self.__alterados:
+                    encontrados[chave] = self.__alterados[chave]
+                elif chave in self.__materializados:
+                    self.__materializados.move_to_end(chave)
+                    encontrados[chave] = self.__materializados[chave]
+                elif chave in self.__chaves:
+                    a_ler.append(chave)
+            for chave, valor in self.__armazenamento.ler_varios(a_ler).items():
+                if self.ao_materializar is not None:
+                    valor = self.ao_materializar(chave, valor)
+                self.__materializados[chave] = valor
+                encontrados[chave] = valor
+            while len(self.__materializados) > self.__capacidade:
+                self.__materializados.popitem(last=False)
+            return encontrados
+
+    def __setitem__(self, chave, valor) -> None:
+        with self.__trava:
+            self.__chaves[chave] = None
+            self.__alterados[chave] = valor
+            self.__materializados.pop(chave, None)
+
+    def __delitem__(self, chave) -> None:
+        with self.__trava:
+            del self.__chaves[chave]
+            self.__alterados.pop(chave, None)
+            self.__materializados.pop(chave, None)
+
+    def __contains__(self, chave) -> bool:
+        return chave in self.__chaves
+
+    def __iter__(self):
+        return iter(list(self.__chaves))
+
+    def __len__(self) -> int:
+        return len(self.__chaves)
+
+    def copy(self) -> 'RegistrosSobDemanda':
+        """
+        Cópia rasa que compartilha o arquivo de dados, sem materializar os
+        valores ainda não lidos.
+        """
+        with self.__trava:
+            copia = RegistrosSobDemanda(self.__armazenamento, self.__chaves, self.__capacidade)
+            copia.__alterados = dict(self.__alterados)
+            copia.__materializados = OrderedDict(self.__materializados)
+            copia.ao_materializar = self.ao_materializar
+            return copia
+
+
+class ArmazenamentoIndexado(Armazenamento):
+    def __init__(self, datasource: str, capacidade_cache: int,
+                 limite_compactacao: int, geracoes: int) -> None:
+        """
+        Configura os caminhos do arquivo de dados e do índice.
+        `capacidade_cache` é o número de valores lidos do disco mantidos em
+        memória; `limite_compactacao` é o volume mínimo (em bytes) de espaço
+        morto ou de registros fora do índice antes de regravá-los; `geracoes`
+        é usado apenas na importação do snapshot .pkl legado.
+        """
+        super().__init__(datasource)
+        self.__caminho_dados = f"{datasource}.dados"
+        self.__caminho_indice = f"{datasource}.indice"
+        self.__capacidade_cache = capacidade_cache
+        self.__limite_compactacao = limite_compactacao
+        self.__geracoes = geracoes
+        self.__indice: Dict[object, Posicao] = {}
+        self.__geracao_dados = 0
+        self.__tamanho_dados = 0  # Fim do último registro válido
+        self.__limite_indice = 0  # Posição do arquivo de dados coberta pelo índice
+        self.__bytes_vivos = 0
+        self.__leitor = None
+        self.__trava = threading.RLock()  # Leituras sob demanda x gravações
+
+    @property
+    def caminho_dados(self) -> str:
+        return self.__caminho_dados
+
+    @property
+    def caminho_indice(self) -> str:
+        return self.__caminho_indice
+
+    def carregar(self) -> RegistrosSobDemanda:
+        """
+        Lê o índice e os registros acrescentados depois dele, retornando um
+        dicionário que materializa os valores sob demanda. Importa o
+        snapshot .pkl se o arquivo de dados ainda não existir. Lança
+        FileNotFoundError se não houver nenhum dos dois.
+        """
+        with self.__trava:
+            if not os.path.exists(self.__caminho_dados):
+                if not existe_snapshot(self._datasource, self.__geracoes):
+                    raise FileNotFoundError(self.__caminho_dados)
+                self.compactar(carregar_snapshot(self._datasource, self.__geracoes))
+            else:
+                self.__abrir()
+            return RegistrosSobDemanda(self, self.__indice, self.__capacidade_cache)
+
+    def ler(self, chave):
+        """
+        Desserializa o valor atualmente gravado para a chave. Lança KeyError
+        se a chave não estiver no índice.
+        """
+        with self.__trava:
+            inicio, tamanho_chave, tamanho_valor = self.__indice[chave]
+            self.__leitor.seek(inicio + _TAMANHO_CABECALHO_REGISTRO + tamanho_chave)
+            return pickle.loads(self.__leitor.read(tamanho_valor))
+
+    def ler_varios(self, chaves) -> dict:
+        """
+        Desserializa os valores gravados para as chaves informadas, lidos em
+        ordem de posição no arquivo de dados. Chaves fora do índice são
+        ignoradas.
+        """
+        with self.__trava:
+            posicoes = sorted(((self.__indice[chave], chave) for chave in chaves
+                               if chave in self.__indice), key=lambda item: item[0])
+            valores = {}
+            for (inicio, tamanho_chave, tamanho_valor), chave in posicoes:
+                self.__leitor.seek(inicio + _TAMANHO_CABECALHO_REGISTRO + tamanho_chave)
+                valores[chave] = pickle.loads(self.__leitor.read(tamanho_valor))
+            return valores
+
+    def persistir(self, registros, alteracoes: dict) -> None:
+        """
+        Acrescenta as alterações ao arquivo de dados em uma única escrita e
+        atualiza o índice em memória. O índice em disco é regravado quando
+        os registros fora dele acumulam mais que o limite, e o arquivo de
+        dados é compactado quando o espaço morto supera os dados vivos.
+        """
+        if not alteracoes:
+            return
+        with self.__trava:
+            blocos = []
+            posicoes = {}
+            offset = self.__tamanho_dados
+            for chave, valor in alteracoes.items():
+                chave_serializada = pickle.dumps(chave)
+                if valor is REMOVIDO:
+                    operacao, valor_serializado = _OPERACAO_REMOVER, b''
+                else:
+                    operacao, valor_serializado = _OPERACAO_GRAVAR, pickle.dumps(valor)
+                bloco = self.__montar_registro(operacao, chave_serializada, valor_serializado)
+                blocos.append(bloco)
+                posicoes[chave] = (offset, len(chave_serializada), len(valor_serializado))
+                offset += len(bloco)
+
+            with open(self.__caminho_dados, 'ab') as arquivo:
+                arquivo.write(b''.join(blocos))
+            self.__tamanho_dados = offset
+
+            for chave, posicao in posicoes.items():
+                self.__descontar(chave)
+                if alteracoes[chave] is REMOVIDO:
+                    continue
+                self.__indice[chave] = posicao
+                self.__bytes_vivos += self.__tamanho_registro(posicao)
+
+            bytes_mortos = self.__tamanho_dados - _TAMANHO_CABECALHO_ARQUIVO - self.__bytes_vivos
+            if bytes_mortos > max(self.__limite_compactacao, self.__bytes_vivos):
+                self.__compactar_dados()
+            elif self.__tamanho_dados - self.__limite_indice > self.__limite_compactacao:
+                self.__gravar_indice()
+
+    def compactar(self, registros) -> None:
+        """
+        Regrava o arquivo de dados e o índice a partir dos registros
+        informados, com um novo número de geração.
+        """
+        with self.__trava:
+            itens = ((chave, pickle.dumps(valor)) for chave, valor in registros.items())
+            self.__reescrever(itens)
+
+    def fechar(self) -> None:
+        with self.__trava:
+            if self.__leitor is not None:
+                self.__leitor.close()
+                self.__leitor = None
+
+    def __abrir(self) -> None:
+        """
+        Valida o cabeçalho do arquivo de dados, carrega o índice (ou o
+        reconstrói) e percorre os registros posteriores a ele.
+        """
+        self.fechar()
+        self.__leitor = open(self.__caminho_dados, 'rb')
+        cabecalho = self.__leitor.read(_TAMANHO_CABECALHO_ARQUIVO)
+        if len(cabecalho) < _TAMANHO_CABECALHO_ARQUIVO or not cabecalho.startswith(_ASSINATURA_DADOS):
+            raise pickle.UnpicklingError(f"Arquivo de dados inválido: {self.__caminho_dados}.")
+        _, self.__geracao_dados = struct.unpack(_FORMATO_CABECALHO_ARQUIVO, cabecalho)
+
+        self.__indice = {}
+        self.__limite_indice = _TAMANHO_CABECALHO_ARQUIVO
+        try:
+            conteudo_indice = carregar_snapshot(self.__caminho_indice, 0)
+            if conteudo_indice['geracao'] == self.__geracao_dados:
+                self.__indice = conteudo_indice['posicoes']
+                self.__limite_indice = conteudo_indice['limite']
+        except (FileNotFoundError, pickle.UnpicklingError, EOFError, KeyError, TypeError):
+            pass  # Índice ausente ou inválido: reconstruído pela varredura completa
+
+        self.__bytes_vivos = sum(self.__tamanho_registro(posicao)
+                                 for posicao in self.__indice.values())
+        self.__percorrer_registros(self.__limite_indice)
+
+    def __percorrer_registros(self, inicio: int) -> None:
+        """
+        Aplica ao índice os registros a partir de `inicio`, lendo apenas as
+        chaves. Um registro incompleto ou com CRC inválido, típico de uma
+        queda durante a escrita, encerra a leitura e é truncado.
+        """
+        leitor = self.__leitor
+        tamanho_arquivo = os.fstat(leitor.fileno()).st_size
+        offset = inicio
+        leitor.seek(offset)
+        while offset + _TAMANHO_CABECALHO_REGISTRO <= tamanho_arquivo:
+            operacao, tamanho_chave, tamanho_valor, crc = struct.unpack(
+                _FORMATO_CABECALHO_REGISTRO, leitor.read(_TAMANHO_CABECALHO_REGISTRO))
+            fim = offset + _TAMANHO_CABECALHO_REGISTRO + tamanho_chave + tamanho_valor
+            if operacao not in (_OPERACAO_GRAVAR, _OPERACAO_REMOVER) or fim > tamanho_arquivo:
+                break
+            conteudo = leitor.read(tamanho_chave + tamanho_valor)
+            if zlib.crc32(conteudo) != crc:
+                break
+            try:
+                chave = pickle.loads(conteudo[:tamanho_chave])
+            except (pickle.UnpicklingError, EOFError, ValueError, TypeError, AttributeError):
+                break
+            self.__descontar(chave)
+            if operacao == _OPERACAO_GRAVAR:
+                posicao = (offset, tamanho_chave, tamanho_valor)
+                self.__indice[chave] = posicao
+                self.__bytes_vivos += self.__tamanho_registro(posicao)
+            offset = fim
+
+        if offset != tamanho_arquivo:
+            with open(self.__caminho_dados, 'r+b') as arquivo:
+                arquivo.truncate(offset)
+        self.__tamanho_dados = offset
+
+    def __compactar_dados(self) -> None:
+        """
+        Regrava o arquivo de dados apenas com os registros vivos, copiando
+        os bytes já serializados de cada valor.
+        """
+        def itens_vivos():
+            for chave, (inicio, tamanho_chave, tamanho_valor) in list(self.__indice.items()):
+                self.__leitor.seek(inicio + _TAMANHO_CABECALHO_REGISTRO + tamanho_chave)
+                yield chave, self.__leitor.read(tamanho_valor)
+        self.__reescrever(itens_vivos())
+
+    def __reescrever(self, itens) -> None:
+        """
+        Grava um novo arquivo de dados com os pares (chave, valor serializado)
+        informados, substituindo o atual atomicamente, e grava o índice
+        correspondente. A nova geração invalida qualquer índice anterior.
+        """
+        geracao = int.from_bytes(os.urandom(8), 'little')
+        indice = {}
+        bytes_vivos = 0
+        arquivo, caminho_temporario = abrir_temporario(self.__caminho_dados)
+        try:
+            with arquivo:
+                arquivo.write(struct.pack(_FORMATO_CABECALHO_ARQUIVO, _ASSINATURA_DADOS, geracao))
+                offset = _TAMANHO_CABECALHO_ARQUIVO
+                for chave, valor_serializado in itens:
+                    chave_serializada = pickle.dumps(chave)
+                    bloco = self.__montar_registro(_OPERACAO_GRAVAR, chave_serializada,
+                                                   valor_serializado)
+                    arquivo.write(bloco)
+                    posicao = (offset, len(chave_serializada), len(valor_serializado))
+                    indice[chave] = posicao
+                    bytes_vivos += len(bloco)
+                    offset += len(bloco)
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+        except BaseException:
+            descartar_temporario(caminho_temporario)
+            raise
+
+        self.fechar()
+        os.replace(caminho_temporario, self.__caminho_dados)
+        self.__leitor = open(self.__caminho_dados, 'rb')
+        self.__indice = indice
+        self.__geracao_dados = geracao
+        self.__tamanho_dados = offset
+        self.__bytes_vivos = bytes_vivos
+        self.__gravar_indice()
+
+    def __gravar_indice(self) -> None:
+        """
+        Grava o índice em disco registrando a geração e a posição final do
+        arquivo de dados que ele cobre.
+        """
+        gravar_snapshot(self.__caminho_indice, {
+            'geracao': self.__geracao_dados,
+            'limite': self.__tamanho_dados,
+            'posicoes': self.__indice,
+        }, 0)
+        self.__limite_indice = self.__tamanho_dados
+
+    def __descontar(self, chave) -> None:
+        """
+        Retira a chave do índice, descontando seu registro dos dados vivos.
+        """
+        posicao = self.__indice.pop(chave, None)
+        if posicao is not None:
+            self.__bytes_vivos -= self.__tamanho_registro(posicao)
+
+    @staticmethod
+    def __tamanho_registro(posicao: Posicao) -> int:
+        _, tamanho_chave, tamanho_valor = posicao
+        return _TAMANHO_CABECALHO_REGISTRO + tamanho_chave + tamanho_valor
+
+    @staticmethod
+    def __montar_registro(operacao: int, chave_serializada: bytes,
+                          valor_serializado: bytes) -> bytes:
+        conteudo = chave_serializada + valor_serializado
+        cabecalho = struct.pack(_FORMATO_CABECALHO_REGISTRO, operacao,
+                                len(chave_serializada), len(valor_serializado),
+                                zlib.crc32(conteudo))
+        return cabecalho + conteudo
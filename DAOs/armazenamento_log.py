@@ -0,0 +1,151 @@
+"""
+Estratégia de armazenamento estruturada em log (append-only).
+
+Em vez de regravar a tabela inteira a cada operação, cada alteração é
+acrescentada ao final de um arquivo de log ('<arquivo>.log') como um
+pequeno registro pickle ('set', chave, valor) ou ('del', chave, None).
+O custo de escrita por operação passa a ser proporcional ao registro
+alterado, e não ao tamanho da tabela.
+
+O snapshot ('<arquivo>') continua no mesmo formato usado pelos DAOs em modo
+snapshot, de modo que arquivos antigos são lidos sem conversão. No
+carregamento, o snapshot é lido e o log é reaplicado por cima dele.
+
+Compactação: quando o log ultrapassa o maior valor entre o limite mínimo
+configurado e o tamanho do próprio snapshot, o estado completo é gravado
+em um novo snapshot e o log é truncado. Como o log precisa crescer tanto
+quanto o snapshot para disparar uma compactação, o custo amortizado por
+operação permanece O(registro).
+
+O snapshot é gravado de forma atômica e com gerações (ver
+DAOs/arquivo_seguro.py). O log só vale sobre a geração mais recente: se ela
+estiver corrompida e o log tiver registros, o carregamento é recusado com
+SnapshotDesatualizadoException, pois reaplicar o log sobre uma geração
+anterior perderia as alterações consolidadas na geração corrompida. Com o
+log vazio, a geração anterior é usada como no modo snapshot. Se o snapshot
+mais recente não existe (queda durante uma compactação, entre o
+deslocamento das gerações e a gravação da nova), o log ainda não foi
+truncado e complementa a geração anterior, que é então usada.
+"""
+
+import os
+import pickle
+
+from DAOs.armazenamento import Armazenamento, REMOVIDO
+from DAOs.arquivo_seguro import carregar_geracao_valida, existe_snapshot, gravar_snapshot
+from Excecoes.snapshotDesatualizadoException import SnapshotDesatualizadoException
+
+
+class ArmazenamentoLog(Armazenamento):
+    _OPERACAO_GRAVAR = 'set'
+    _OPERACAO_REMOVER = 'del'
+
+    def __init__(self, datasource: str, limite_compactacao: int, geracoes: int) -> None:
+        """
+        Configura os caminhos do snapshot e do log. O limite de compactação
+        é o tamanho mínimo (em bytes) que o log precisa atingir antes de ser
+        consolidado no snapshot; `geracoes` é o número de snapshots
+        anteriores mantidos como cópia de segurança.
+        """
+        super().__init__(datasource)
+        self.__caminho_log = f"{datasource}.log"
+        self.__limite_compactacao = limite_compactacao
+        self.__geracoes = geracoes
+        self.__tamanho_snapshot = 0
+        self.__tamanho_log = 0
+
+    @property
+    def caminho_log(self) -> str:
+        return self.__caminho_log
+
+    def carregar(self) -> dict:
+        """
+        Lê o snapshot (se existir) e reaplica todos os registros do log em
+        ordem. Um registro incompleto no final do log, típico de uma queda
+        durante a escrita, é descartado e o arquivo é truncado no último
+        registro válido. Lança FileNotFoundError se nem snapshot nem log
+        existirem, e SnapshotDesatualizadoException se a geração mais
+        recente do snapshot estiver corrompida enquanto o log tem
+        registros, em vez de reaplicá-lo sobre uma geração anterior.
+        """
+        registros = {}
+        possui_snapshot = existe_snapshot(self._datasource, self.__geracoes)
+        existe_log = os.path.exists(self.__caminho_log)
+        if not possui_snapshot and not existe_log:
+            raise FileNotFoundError(self._datasource)
+
+        if possui_snapshot:
+            geracao, registros = carregar_geracao_valida(self._datasource, self.__geracoes)
+            # Sem '<arquivo>' (queda no meio de uma compactação), a geração 1
+            # é a que o log complementa; qualquer outro recuo perderia dados
+            interrompida = geracao == 1 and not os.path.exists(self._datasource)
+            if (geracao > 0 and not interrompida and existe_log
+                    and os.path.getsize(self.__caminho_log) > 0):
+                raise SnapshotDesatualizadoException(self._datasource, geracao)
+            if os.path.exists(self._datasource):
+                self.__tamanho_snapshot = os.path.getsize(self._datasource)
+
+        if existe_log:
+            self.__reaplicar_log(registros)
+        return registros
+
+    def persistir(self, registros: dict, alteracoes: dict) -> None:
+        """
+        Acrescenta as alterações ao log em uma única escrita. Em seguida
+        verifica se o log cresceu o bastante para justificar a compactação.
+        """
+        if not alteracoes:
+            return
+        blocos = []
+        for chave, valor in alteracoes.items():
+            if valor is REMOVIDO:
+                registro = (self._OPERACAO_REMOVER, chave, None)
+            else:
+                registro = (self._OPERACAO_GRAVAR, chave, valor)
+            blocos.append(pickle.dumps(registro))
+        dados = b"".join(blocos)
+        with open(self.__caminho_log, 'ab') as arquivo:
+            arquivo.write(dados)
+        self.__tamanho_log += len(dados)
+
+        if self.__tamanho_log > max(self.__limite_compactacao, self.__tamanho_snapshot):
+            self.compactar(registros)
+
+    def compactar(self, registros: dict) -> None:
+        """
+        Grava o estado completo em uma nova geração do snapshot (de forma
+        atômica) e só então trunca o log. Se o processo cair entre as duas
+        etapas, reaplicar o log sobre o snapshot novo produz o mesmo estado,
+        pois as operações são idempotentes.
+        """
+        gravar_snapshot(self._datasource, registros, self.__geracoes)
+        with open(self.__caminho_log, 'wb'):
+            pass
+        self.__tamanho_snapshot = os.path.getsize(self._datasource)
+        self.__tamanho_log = 0
+
+    def __reaplicar_log(self, registros: dict) -> None:
+        """
+        Percorre o log aplicando cada operação ao dicionário de registros.
+        Interrompe a leitura no primeiro registro ilegível e trunca o
+        restante do arquivo.
+        """
+        ultimo_offset_valido = 0
+        with open(self.__caminho_log, 'rb') as arquivo:
+            while True:
+                try:
+                    operacao, chave, valor = pickle.load(arquivo)
+                except (EOFError, pickle.UnpicklingError, ValueError,
+                        TypeError, AttributeError, IndexError):
+                    # Fim do log ou registro truncado por escrita interrompida
+                    break
+                if operacao == self._OPERACAO_GRAVAR:
+                    registros[chave] = valor
+                else:
+                    registros.pop(chave, None)
+                ultimo_offset_valido = arquivo.tell()
+
+        if os.path.getsize(self.__caminho_log) != ultimo_offset_valido:
+            with open(self.__caminho_log, 'r+b') as arquivo:
+                arquivo.truncate(ultimo_offset_valido)
+        self.__tamanho_log = ultimo_offset_valido
@@ -0,0 +1,44 @@
+"""
+Estratégia de armazenamento por snapshot completo em arquivo pickle.
+
+Reproduz o comportamento original dos DAOs: todo o dicionário de registros
+é serializado com pickle a cada alteração. É a estratégia mais simples e a
+que mantém os arquivos .pkl compatíveis com versões anteriores do sistema,
+mas o custo de cada escrita cresce com o tamanho da tabela.
+
+A gravação é atômica e mantém gerações anteriores do arquivo (ver
+DAOs/arquivo_seguro.py), de modo que uma queda durante a escrita não
+destrói os dados já gravados.
+"""
+
+from DAOs.armazenamento import Armazenamento
+from DAOs.arquivo_seguro import carregar_snapshot, gravar_snapshot
+
+
+class ArmazenamentoSnapshot(Armazenamento):
+    def __init__(self, datasource: str, geracoes: int) -> None:
+        """
+        Configura o arquivo do snapshot e quantas gerações anteriores são
+        mantidas como cópias de segurança.
+        """
+        super().__init__(datasource)
+        self.__geracoes = geracoes
+
+    def carregar(self) -> dict:
+        """
+        Desserializa a geração válida mais recente do snapshot.
+        """
+        return carregar_snapshot(self._datasource, self.__geracoes)
+
+    def persistir(self, registros: dict, alteracoes: dict) -> None:
+        """
+        Ignora o detalhamento das alterações e regrava o snapshot completo,
+        já que o formato não permite atualizações parciais.
+        """
+        self.compactar(registros)
+
+    def compactar(self, registros: dict) -> None:
+        """
+        Serializa todos os registros em uma nova geração do arquivo.
+        """
+        gravar_snapshot(self._datasource, registros, self.__geracoes)
@@ -0,0 +1,115 @@
+"""
+Estratégia de armazenamento em banco SQLite local.
+
+Cada DAO ganha uma tabela própria (derivada do nome do seu arquivo .pkl)
+dentro de um único banco SQLite. As linhas guardam a chave em sua forma
+nativa (inteiro ou texto, indexada como chave primária) e o objeto
+serializado com pickle. Cada operação do DAO grava apenas as linhas
+alteradas, dentro de uma transação.
+
+O banco opera em modo WAL, permitindo que vários terminais leiam enquanto
+outro grava. Na primeira abertura de uma tabela, se ainda existir o arquivo
+.pkl correspondente, seus registros são importados automaticamente.
+"""
+
+import os
+import pickle
+import re
+import sqlite3
+
+from DAOs.armazenamento import Armazenamento, REMOVIDO
+from DAOs.arquivo_seguro import carregar_snapshot, existe_snapshot
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    # Protocolo fixo para que o conteúdo não dependa da versão do Python
+    _PROTOCOLO_PICKLE = 4
+
+    def __init__(self, datasource: str, caminho_banco: str, geracoes: int) -> None:
+        """
+        Abre (ou cria) o banco e garante a existência da tabela do DAO. O
+        nome da tabela é o nome do arquivo sem extensão, com caracteres não
+        alfanuméricos substituídos por '_'. `geracoes` indica quantas
+        gerações do .pkl legado são consideradas na importação.
+        """
+        super().__init__(datasource)
+        self.__geracoes = geracoes
+        nome_base = os.path.splitext(os.path.basename(datasource))[0]
+        self.__tabela = re.sub(r'\W', '_', nome_base) or 'registros'
+        self.__conexao = sqlite3.connect(caminho_banco, check_same_thread=False)
+        self.__conexao.execute("PRAGMA journal_mode=WAL")
+        self.__conexao.execute("PRAGMA synchronous=NORMAL")
+        self.__tabela_nova = not self.__tabela_existe()
+        self.__conexao.execute(
+            f'CREATE TABLE IF NOT EXISTS "{self.__tabela}" '
+            f'(chave PRIMARY KEY, valor BLOB NOT NULL) WITHOUT ROWID')
+        self.__conexao.commit()
+
+    @property
+    def tabela(self) -> str:
+        return self.__tabela
+
+    def carregar(self) -> dict:
+        """
+        Lê todas as linhas da tabela. Se a tabela acabou de ser criada e o
+        arquivo .pkl legado existir, importa seu conteúdo antes da leitura.
+        """
+        if self.__tabela_nova and existe_snapshot(self._datasource, self.__geracoes):
+            self.compactar(carregar_snapshot(self._datasource, self.__geracoes))
+        self.__tabela_nova = False
+
+        cursor = self.__conexao.execute(f'SELECT chave, valor FROM "{self.__tabela}"')
+        return {chave: pickle.loads(valor) for chave, valor in cursor}
+
+    def persistir(self, registros: dict, alteracoes: dict) -> None:
+        """
+        Grava somente as linhas alteradas em uma única transação: inserção
+        ou substituição para valores novos e exclusão para chaves removidas.
+        """
+        gravacoes = []
+        remocoes = []
+        for chave, valor in alteracoes.items():
+            self.__validar_chave(chave)
+            if valor is REMOVIDO:
+                remocoes.append((chave,))
+            else:
+                gravacoes.append((chave, pickle.dumps(valor, self._PROTOCOLO_PICKLE)))
+        with self.__conexao:
+            if gravacoes:
+                self.__conexao.executemany(
+                    f'INSERT OR REPLACE INTO "{self.__tabela}" (chave, valor) VALUES (?, ?)',
+                    gravacoes)
+            if remocoes:
+                self.__conexao.executemany(
+                    f'DELETE FROM "{self.__tabela}" WHERE chave = ?', remocoes)
+
+    def compactar(self, registros: dict) -> None:
+        """
+        Substitui todo o conteúdo da tabela pelos registros informados.
+        """
+        linhas = []
+        for chave, valor in registros.items():
+            self.__validar_chave(chave)
+            linhas.append((chave, pickle.dumps(valor, self._PROTOCOLO_PICKLE)))
+        with self.__conexao:
+            self.__conexao.execute(f'DELETE FROM "{self.__tabela}"')
+            self.__conexao.executemany(
+                f'INSERT INTO "{self.__tabela}" (chave, valor) VALUES (?, ?)', linhas)
+
+    def fechar(self) -> None:
+        self.__conexao.close()
+
+    def __tabela_existe(self) -> bool:
+        cursor = self.__conexao.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (self.__tabela,))
+        return cursor.fetchone() is not None
+
+    def __validar_chave(self, chave) -> None:
+        """
+        Garante que a chave tem um tipo que o SQLite armazena de forma
+        nativa e indexável. Lança TypeError caso contrário.
+        """
+        if not isinstance(chave, (int, str)):
+            raise TypeError(
+                f"Chave '{chave!r}' não suportada pelo armazenamento SQLite de {self._datasource}.")
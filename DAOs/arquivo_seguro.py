@@ -0,0 +1,190 @@
+"""
+Gravação atômica de snapshots pickle com gerações e verificação de integridade.
+
+Gravar um .pkl sobrescrevendo o arquivo em uso deixa uma janela em que uma
+queda do processo (ou do sistema) resulta em um arquivo truncado, e com ele
+a perda de todos os registros. Este módulo evita essa janela:
+
+1. O conteúdo é serializado para um temporário de nome único na mesma
+   pasta ('<arquivo>.XXXXXXXX.tmp', de modo que gravações simultâneas não
+   disputam o mesmo temporário), precedido por um cabeçalho com
+   identificador de formato, CRC32 e tamanho do conteúdo, e sincronizado
+   com o disco (fsync). Se a gravação falhar, o temporário é removido.
+2. As gerações anteriores são deslocadas ('<arquivo>' vira '<arquivo>.1',
+   '<arquivo>.1' vira '<arquivo>.2', ...), mantendo até N cópias antigas.
+3. O temporário é renomeado para '<arquivo>' com os.replace, que é atômico.
+
+Na leitura, as gerações são examinadas da mais nova para a mais antiga e a
+primeira válida é usada. Cada candidata é lida no máximo uma vez: um
+arquivo cujo tamanho não confere com o cabeçalho é descartado sem ler o
+conteúdo, e o CRC32 é calculado sobre os mesmos bytes que serão
+desserializados. Gerações mais antigas só são abertas se as mais novas
+estiverem corrompidas.
+
+Arquivos gravados antes deste formato (pickle puro, sem cabeçalho) continuam
+sendo lidos normalmente.
+"""
+
+import os
+import pickle
+import struct
+import tempfile
+import zlib
+from typing import Any, BinaryIO, List, Tuple
+
+
+# Identificador gravado no início de todo snapshot com cabeçalho
+ASSINATURA = b'CAFERRI1'
+# Cabeçalho: assinatura, CRC32 do conteúdo e tamanho do conteúdo em bytes
+_FORMATO_CABECALHO = '<8sIQ'
+_TAMANHO_CABECALHO = struct.calcsize(_FORMATO_CABECALHO)
+
+# Erros que indicam um pickle truncado ou corrompido
+_ERROS_DESSERIALIZACAO = (pickle.UnpicklingError, EOFError, ValueError,
+                          TypeError, AttributeError, IndexError)
+
+# Máscara de permissões do processo, lida uma vez na importação: os
+# temporários são criados só para o dono e recebem as permissões de um
+# arquivo comum antes de substituir o original
+_MASCARA = os.umask(0)
+os.umask(_MASCARA)
+
+
+def caminhos_geracoes(caminho: str, geracoes: int) -> List[str]:
+    """
+    Lista os caminhos de todas as gerações de um snapshot, da mais nova
+    ('<arquivo>') para a mais antiga ('<arquivo>.N').
+    """
+    return [caminho] + [f"{caminho}.{indice}" for indice in range(1, geracoes + 1)]
+
+
+def existe_snapshot(caminho: str, geracoes: int) -> bool:
+    """
+    Indica se existe ao menos uma geração do snapshot em disco.
+    """
+    return any(os.path.exists(candidato) for candidato in caminhos_geracoes(caminho, geracoes))
+
+
+def gravar_snapshot(caminho: str, registros, geracoes: int) -> None:
+    """
+    Grava registros de forma atômica em `caminho`, preservando até
+    `geracoes` versões anteriores. Em nenhum momento a versão mais recente
+    válida deixa de existir em disco.
+    """
+    conteudo = pickle.dumps(registros)
+    cabecalho = struct.pack(_FORMATO_CABECALHO, ASSINATURA,
+                            zlib.crc32(conteudo), len(conteudo))
+    arquivo, caminho_temporario = abrir_temporario(caminho)
+    try:
+        with arquivo:
+            arquivo.write(cabecalho)
+            arquivo.write(conteudo)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+
+        if geracoes > 0:
+            candidatos = caminhos_geracoes(caminho, geracoes)
+            for mais_nova, mais_antiga in reversed(list(zip(candidatos, candidatos[1:]))):
+                try:
+                    os.replace(mais_nova, mais_antiga)
+                except FileNotFoundError:
+                    # Geração ainda inexistente (ou já deslocada por outra gravação)
+                    pass
+        os.replace(caminho_temporario, caminho)
+    except BaseException:
+        descartar_temporario(caminho_temporario)
+        raise
+    _sincronizar_diretorio(caminho)
+
+
+def abrir_temporario(caminho: str) -> Tuple[BinaryIO, str]:
+    """
+    Cria, na pasta de `caminho`, um arquivo temporário de nome único para
+    substituí-lo depois com os.replace. Retorna o arquivo aberto para
+    escrita binária e o caminho dele.
+    """
+    pasta, nome = os.path.split(caminho)
+    descritor, caminho_temporario = tempfile.mkstemp(prefix=f"{nome}.", suffix='.tmp',
+                                                     dir=pasta or '.')
+    try:
+        os.chmod(caminho_temporario, 0o666 & ~_MASCARA)
+        return os.fdopen(descritor, 'wb'), caminho_temporario
+    except BaseException:
+        os.close(descritor)
+        descartar_temporario(caminho_temporario)
+        raise
+
+
+def descartar_temporario(caminho_temporario: str) -> None:
+    """Remove um temporário de uma gravação que falhou, se ele existir."""
+    try:
+        os.remove(caminho_temporario)
+    except FileNotFoundError:
+        pass
+
+
+def carregar_snapshot(caminho: str, geracoes: int):
+    """
+    Retorna o conteúdo da geração válida mais recente. Lança
+    FileNotFoundError se nenhuma geração existir e pickle.UnpicklingError
+    se todas as existentes estiverem corrompidas.
+    """
+    return carregar_geracao_valida(caminho, geracoes)[1]
+
+
+def carregar_geracao_valida(caminho: str, geracoes: int) -> Tuple[int, Any]:
+    """
+    Como `carregar_snapshot`, mas retorna também o índice da geração lida:
+    0 para '<arquivo>', N para '<arquivo>.N'.
+    """
+    encontrou_arquivo = False
+    for indice, candidato in enumerate(caminhos_geracoes(caminho, geracoes)):
+        try:
+            with open(candidato, 'rb') as arquivo:
+                encontrou_arquivo = True
+                return indice, _ler_geracao(arquivo)
+        except FileNotFoundError:
+            continue
+        except _ERROS_DESSERIALIZACAO:
+            continue
+    if not encontrou_arquivo:
+        raise FileNotFoundError(caminho)
+    raise pickle.UnpicklingError(f"Nenhuma geração válida encontrada para {caminho}.")
+
+
+def _ler_geracao(arquivo):
+    """
+    Lê e valida uma geração. Snapshots com cabeçalho têm tamanho e CRC32
+    conferidos; arquivos legados são apenas desserializados. Lança um dos
+    erros de desserialização se a geração for inválida.
+    """
+    cabecalho = arquivo.read(_TAMANHO_CABECALHO)
+    if not cabecalho.startswith(ASSINATURA):
+        arquivo.seek(0)
+        return pickle.load(arquivo)
+
+    if len(cabecalho) < _TAMANHO_CABECALHO:
+        raise EOFError("Cabeçalho de snapshot incompleto.")
+    _, crc_esperado, tamanho = struct.unpack(_FORMATO_CABECALHO, cabecalho)
+    if os.fstat(arquivo.fileno()).st_size != _TAMANHO_CABECALHO + tamanho:
+        raise EOFError("Tamanho do snapshot não confere com o cabeçalho.")
+    conteudo = arquivo.read(tamanho)
+    if zlib.crc32(conteudo) != crc_esperado:
+        raise pickle.UnpicklingError("Checksum do snapshot não confere.")
+    return pickle.loads(conteudo)
+
+
+def _sincronizar_diretorio(caminho: str) -> None:
+    """
+    Sincroniza o diretório para que as renomeações sobrevivam a uma queda
+    do sistema. Ignorado em plataformas que não permitem abrir diretórios
+    (ex: Windows).
+    """
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    descritor = os.open(diretorio, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(descritor)
+    finally:
+        os.close(descritor)
@@ -8,15 +8,27 @@ específicas. Utiliza o ID do café como chave primária para indexação.
 Todas as operações validam que os objetos são instâncias de Cafe e que o
 ID é um inteiro antes de delegar para a classe base, garantindo integridade
 de tipos e prevenindo erros de runtime.
+
+Índices secundários: 'perfil' (perfil recomendado) e 'fornecedor' (CNPJ do
+fornecedor), usados nas recomendações e na validação de exclusão de
+fornecedores.
 """
 
 from typing import Optional
 
 from DAOs.dao import DAO
+from DAOs.mapa_identidade import mapa_identidade
 from entidade.cafe import Cafe
 
 
 class CafeDAO(DAO):
+    _mapeia_identidade = True
+    _indices = {
+        'perfil': lambda cafe: cafe.perfil_recomendado.perfil,
+        'fornecedor': lambda cafe: (cafe.empresa_fornecedora.cnpj
+                                    if cafe.empresa_fornecedora else None),
+    }
+
     def __init__(self):
         """
         Inicializa o DAO de cafés, configurando 'cafes.pkl' como arquivo de
@@ -57,3 +69,12 @@ class CafeDAO(DAO):
         """
         if isinstance(key, int):
             super().remove(key)
+
+    def _resolver_referencias(self, cafe: Cafe) -> None:
+        """
+        Aponta o fornecedor embutido no arquivo para a instância canônica
+        mantida pelo DAO de fornecedores, evitando cópias divergentes.
+        """
+        fornecedor = cafe.empresa_fornecedora
+        if fornecedor is not None:
+            cafe.empresa_fornecedora = mapa_identidade.resolver(fornecedor, fornecedor.cnpj)
@@ -0,0 +1,53 @@
+"""
+Carga concorrente dos DAOs na inicialização do sistema.
+
+Cada DAO lê e desserializa o próprio arquivo no construtor, e os arquivos
+são independentes entre si. Construí-los em sequência soma os tempos de
+leitura de todos; aqui as construções são submetidas a um pool de threads,
+de modo que a espera por disco de um arquivo se sobrepõe à dos demais.
+
+Threads (e não processos) são usadas porque os DAOs carregados mantêm
+recursos que não podem ser transferidos entre processos (travas, arquivos e
+conexões abertas) e porque as entidades precisam ser registradas no mapa de
+identidade do processo principal.
+
+O tempo de construção de cada DAO é medido e registrado no log, permitindo
+ver a composição do tempo de inicialização.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Tuple
+
+from DAOs.dao import DAO
+
+
+logger = logging.getLogger(__name__)
+
+
+def carregar_daos(fabricas: Dict[str, Callable[[], DAO]]) -> Tuple[Dict[str, DAO], Dict[str, float]]:
+    """
+    Constrói concorrentemente os DAOs produzidos pelas fábricas informadas.
+    Retorna os DAOs e o tempo de carga de cada arquivo (em segundos),
+    indexados pelo arquivo de persistência. Se a construção de algum DAO
+    falhar, a exceção é propagada depois que todas as cargas terminarem.
+    """
+    def construir(fabrica: Callable[[], DAO]) -> Tuple[DAO, float]:
+        inicio = time.perf_counter()
+        dao = fabrica()
+        return dao, time.perf_counter() - inicio
+
+    with ThreadPoolExecutor(max_workers=max(1, len(fabricas)),
+                            thread_name_prefix='carga-dao') as executor:
+        futuros = {nome: executor.submit(construir, fabrica)
+                   for nome, fabrica in fabricas.items()}
+
+    daos = {}
+    tempos = {}
+    for nome, futuro in futuros.items():
+        dao, duracao = futuro.result()
+        daos[nome] = dao
+        tempos[dao.datasource] = duracao
+        logger.info("Carga de %s: %.1f ms", dao.datasource, duracao * 1000)
+    return daos, tempos
@@ -10,13 +10,15 @@ ID é um inteiro antes de delegar para a classe base, garantindo integridade
 de tipos e prevenindo erros de runtime.
 """
 
-from typing import Optional
+from typing import Dict, Iterable, Optional
 
 from DAOs.dao import DAO
 from entidade.cliente import Cliente
 
 
 class ClienteDAO(DAO):
+    _mapeia_identidade = True
+
     def __init__(self):
         """
         Inicializa o DAO de clientes, configurando 'clientes.pkl' como arquivo
@@ -50,6 +52,15 @@ class ClienteDAO(DAO):
             return super().get(key)
         return None
 
+    def get_many(self, keys: Iterable[int]) -> Dict[int, Optional[Cliente]]:
+        """
+        Recupera vários clientes pelos IDs em uma única chamada. IDs não
+        encontrados (ou que não são inteiros) são mapeados para None.
+        """
+        keys = list(keys)
+        encontrados = super().get_many(key for key in keys if isinstance(key, int))
+        return {key: encontrados.get(key) for key in keys}
+
     def remove(self, key: int) -> None:
         """
         Remove um cliente do repositório pelo ID. Valida que a chave é um
@@ -0,0 +1,111 @@
+"""
+Configuração da camada de persistência.
+
+Centraliza a escolha da estratégia de armazenamento usada por cada DAO,
+permitindo trocar o formato de um arquivo sem alterar o código das
+subclasses (ClienteDAO, VendaDAO, etc.). Cada DAO é identificado pelo nome
+do seu arquivo de persistência.
+
+Modos disponíveis:
+- 'snapshot': reescreve o arquivo .pkl inteiro a cada alteração
+- 'log': acrescenta alterações em '<arquivo>.log' e compacta sob demanda
+- 'sqlite': grava linha a linha em uma tabela do banco ARQUIVO_SQLITE
+- 'indexado': lê só o índice de chaves na carga e cada registro sob demanda
+
+A variável de ambiente CAFERRI_PERSISTENCIA, quando definida, força o mesmo
+modo para todos os arquivos (ex: CAFERRI_PERSISTENCIA=sqlite python main.py).
+
+Gravação adiada (ver DAOs/escrita_adiada.py): desativada por padrão; pode ser
+ligada por ESCRITA_ADIADA ou pela variável de ambiente CAFERRI_ESCRITA_ADIADA=1.
+"""
+
+import os
+from typing import Dict
+
+from DAOs.armazenamento import Armazenamento
+from DAOs.armazenamento_indexado import ArmazenamentoIndexado
+from DAOs.armazenamento_log import ArmazenamentoLog
+from DAOs.armazenamento_snapshot import ArmazenamentoSnapshot
+from DAOs.armazenamento_sqlite import ArmazenamentoSQLite
+
+
+MODO_SNAPSHOT = 'snapshot'
+MODO_LOG = 'log'
+MODO_SQLITE = 'sqlite'
+MODO_INDEXADO = 'indexado'
+
+VARIAVEL_AMBIENTE_MODO = 'CAFERRI_PERSISTENCIA'
+
+# Modo usado pelos arquivos que não aparecem em MODOS_POR_ARQUIVO
+MODO_PADRAO = MODO_SNAPSHOT
+
+# Vendas recebem uma escrita a cada alteração do carrinho, por isso usam log
+MODOS_POR_ARQUIVO: Dict[str, str] = {
+    'vendas.pkl': MODO_LOG,
+}
+
+# Quantidade de snapshots anteriores mantidos como cópia de segurança
+# ('<arquivo>.1', '<arquivo>.2', ...), usados se o mais recente estiver corrompido
+GERACOES_SNAPSHOT = 2
+
+# Tamanho mínimo (em bytes) do log antes de consolidá-lo no snapshot
+TAMANHO_MINIMO_COMPACTACAO_LOG = 1024 * 1024
+
+# Banco compartilhado pelas tabelas dos DAOs em modo 'sqlite'
+ARQUIVO_SQLITE = 'caferri.db'
+
+# Registros lidos do disco mantidos em memória por DAO no modo 'indexado'
+TAMANHO_CACHE_INDEXADO = 256
+
+VARIAVEL_AMBIENTE_ESCRITA_ADIADA = 'CAFERRI_ESCRITA_ADIADA'
+
+# Grava as alterações em segundo plano em vez de a cada operação
+ESCRITA_ADIADA = False
+
+# Segundos sem novas alterações antes de gravar um DAO sujo
+INTERVALO_ESCRITA_ADIADA = 0.5
+
+# Quantidade de chaves pendentes em um DAO que antecipa a gravação
+MAXIMO_ALTERACOES_PENDENTES = 100
+
+
+def modo_persistencia(datasource: str) -> str:
+    """
+    Retorna o modo configurado para o arquivo informado, recorrendo ao
+    modo padrão quando não há configuração específica. A variável de
+    ambiente CAFERRI_PERSISTENCIA tem precedência sobre ambos.
+    """
+    modo_ambiente = os.environ.get(VARIAVEL_AMBIENTE_MODO)
+    if modo_ambiente:
+        return modo_ambiente
+    return MODOS_POR_ARQUIVO.get(datasource, MODO_PADRAO)
+
+
+def escrita_adiada_ativa() -> bool:
+    """
+    Indica se os DAOs devem usar gravação adiada. A variável de ambiente
+    CAFERRI_ESCRITA_ADIADA ('1' liga, '0' desliga) tem precedência sobre
+    ESCRITA_ADIADA.
+    """
+    valor_ambiente = os.environ.get(VARIAVEL_AMBIENTE_ESCRITA_ADIADA)
+    if valor_ambiente:
+        return valor_ambiente.strip().lower() not in ('0', 'false', 'nao', 'não')
+    return ESCRITA_ADIADA
+
+
+def criar_armazenamento(datasource: str) -> Armazenamento:
+    """
+    Instancia a estratégia de armazenamento configurada para o arquivo.
+    Lança ValueError se o modo configurado não for reconhecido.
+    """
+    modo = modo_persistencia(datasource)
+    if modo == MODO_SNAPSHOT:
+        return ArmazenamentoSnapshot(datasource, GERACOES_SNAPSHOT)
+    if modo == MODO_LOG:
+        return ArmazenamentoLog(datasource, TAMANHO_MINIMO_COMPACTACAO_LOG, GERACOES_SNAPSHOT)
+    if modo == MODO_SQLITE:
+        return ArmazenamentoSQLite(datasource, ARQUIVO_SQLITE, GERACOES_SNAPSHOT)
+    if modo == MODO_INDEXADO:
+        return ArmazenamentoIndexado(datasource, TAMANHO_CACHE_INDEXADO,
+                                     TAMANHO_MINIMO_COMPACTACAO_LOG, GERACOES_SNAPSHOT)
+    raise ValueError(f"Modo de persistência desconhecido para {datasource}: '{modo}'.")
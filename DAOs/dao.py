@@ -10,6 +10,30 @@ A classe mantém um cache em memória (__cache) que é sincronizado automaticame
 com o arquivo de persistência sempre que há modificações. O carregamento inicial
 ocorre no construtor, e se o arquivo não existir, um arquivo vazio é criado.
 
+A forma de gravação em disco é delegada a uma estratégia de armazenamento
+(ver DAOs/armazenamento.py), escolhida por arquivo em DAOs/configuracao.py.
+Cada operação informa à estratégia apenas as chaves alteradas, permitindo
+que modos como o log append-only gravem somente o registro modificado.
+
+Operações agrupadas: dentro de `with dao.batch():` as alterações ficam
+pendentes e são gravadas de uma só vez ao final do bloco. Se o bloco lançar
+exceção, o cache volta ao estado anterior e nada é gravado. Para agrupar
+vários DAOs, ver DAOs/unidade_de_trabalho.py. O lote pertence à thread que
+o abriu: ela mantém a trava do DAO até o fim do bloco, e as modificações de
+outras threads aguardam o lote terminar em vez de serem absorvidas por ele.
+Se a gravação falhar, as alterações continuam pendentes e são gravadas
+junto com a próxima alteração do DAO.
+
+Versão: cada DAO mantém um contador monotônico (`versao`) incrementado a
+cada alteração do cache, inclusive dentro de lotes e quando um lote é
+desfeito. Quem deriva resultados dos dados (ex: o cache de relatórios)
+guarda a versão usada e só recalcula quando ela muda.
+
+Gravação adiada: com a opção ativada em DAOs/configuracao.py, as alterações
+confirmadas não são gravadas na hora; ficam acumuladas no DAO e uma thread
+em segundo plano as grava (ver DAOs/escrita_adiada.py). As operações de
+modificação e a gravação sincronizam-se por uma trava própria de cada DAO.
+
 Responsabilidades:
 - Gerenciar o ciclo de vida dos dados (carregar ao iniciar, salvar ao modificar)
 - Fornecer interface unificada para operações de persistência
@@ -17,10 +41,27 @@ Responsabilidades:
 """
 
 import pickle
+import threading
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+from DAOs.armazenamento import REMOVIDO
+from DAOs.armazenamento_indexado import RegistrosSobDemanda
+from DAOs.configuracao import criar_armazenamento, escrita_adiada_ativa
+from DAOs.escrita_adiada import gerenciador_escrita_adiada
+from DAOs.mapa_identidade import mapa_identidade
+
+# Marca, nos níveis de lote, uma chave que não tinha alteração pendente
+_AUSENTE = object()
 
 
 class DAO(ABC):
+    # Subclasses que guardam entidades ativam o registro no mapa de identidade
+    _mapeia_identidade = False
+    # Índices secundários: nome do índice -> função que extrai o valor indexado
+    _indices: Dict[str, Callable] = {}
+
     @abstractmethod
     def __init__(self, datasource=''):
         """
@@ -29,28 +70,307 @@ class DAO(ABC):
         existir. O cache em memória é populado durante esta inicialização.
         """
         self.__datasource = datasource
+        self.__armazenamento = criar_armazenamento(datasource)
         self.__cache = {}  # Cache em memória sincronizado com o arquivo
+        # Um dicionário por nível de lote aberto: chave -> (valor no início do
+        # nível, alteração que estava pendente no início do nível ou _AUSENTE)
+        self.__niveis_lote: List[Dict] = []
+        self.__acoes_lote: List[List[Callable[[], None]]] = []  # Por nível: após gravar
+        self.__alteracoes_pendentes = {}  # Ainda não entregues ao armazenamento
+        self.__indices = None  # Montados sob demanda: índice -> valor -> chaves
+        self.__valores_indexados = {}  # Índice -> chave -> valor indexado atual
+        self.__escrita_adiada = escrita_adiada_ativa()
+        self.__alteracoes_adiadas = {}  # Confirmadas, aguardando a thread de gravação
+        self.__trava = threading.RLock()  # Protege cache e alterações adiadas
+        self.__trava_gravacao = threading.Lock()  # Serializa gravações no armazenamento
+        self.__versao = 0  # Incrementada a cada alteração do cache
         try:
             self.__load()
         except (FileNotFoundError, pickle.UnpicklingError, EOFError):
             self.__cache = {}
-            self.__dump()
+            self.__armazenamento.compactar(self.__cache)
+
+    @property
+    def versao(self) -> int:
+        """
+        Contador de modificações do DAO: cresce a cada alteração do cache e
+        nunca diminui, permitindo detectar mudanças sem comparar registros.
+        """
+        return self.__versao
+
+    @property
+    def datasource(self) -> str:
+        return self.__datasource
+
+    def __dump(self, alteracoes: dict):
+        """
+        Repassa as alterações de uma operação para a estratégia de
+        armazenamento. Chamado automaticamente após cada operação de
+        modificação (add, update, remove).
+        """
+        self.__armazenamento.persistir(self.__cache, alteracoes)
 
-    def __dump(self):
+    def __gravar(self, alteracoes: dict) -> None:
         """
-        Serializa o cache em memória para o arquivo usando pickle. Chamado
-        automaticamente após cada operação de modificação (add, update, remove).
+        Destino das alterações confirmadas: gravação imediata ou, com a
+        gravação adiada ativa, acúmulo para a thread de segundo plano.
         """
-        with open(self.__datasource, 'wb') as arquivo:
-            pickle.dump(self.__cache, arquivo)
+        if not self.__escrita_adiada:
+            self.__dump(alteracoes)
+            return
+        self.__alteracoes_adiadas.update(alteracoes)
+        gerenciador_escrita_adiada.agendar(self, len(self.__alteracoes_adiadas))
+
+    def _descarregar(self) -> None:
+        """
+        Grava as alterações adiadas acumuladas até agora. As alterações e
+        uma cópia do cache são tomadas sob a trava do DAO, de modo que a
+        escrita em disco não bloqueia novas operações. Se a gravação
+        falhar, as alterações voltam a ficar pendentes.
+        """
+        with self.__trava_gravacao:
+            with self.__trava:
+                alteracoes = self.__alteracoes_adiadas
+                if not alteracoes:
+                    return
+                self.__alteracoes_adiadas = {}
+                registros = self.__cache.copy()
+            try:
+                self.__armazenamento.persistir(registros, alteracoes)
+            except BaseException:
+                with self.__trava:
+                    alteracoes.update(self.__alteracoes_adiadas)
+                    self.__alteracoes_adiadas = alteracoes
+                raise
 
     def __load(self):
         """
-        Carrega os dados do arquivo para o cache em memória usando pickle.
-        Chamado automaticamente durante a inicialização do DAO.
+        Carrega os dados persistidos para o cache em memória através da
+        estratégia de armazenamento. Chamado automaticamente durante a
+        inicialização do DAO.
+        """
+        self.__cache = self.__armazenamento.carregar()
+        if not self._mapeia_identidade:
+            return
+        if isinstance(self.__cache, RegistrosSobDemanda):
+            # Registros ainda não lidos são canonicalizados no primeiro acesso
+            self.__cache.ao_materializar = self.__canonicalizar_materializado
+            return
+        for key, obj in self.__cache.items():
+            obj = mapa_identidade.registrar(obj, key)
+            self._resolver_referencias(obj)
+            self.__cache[key] = obj
+
+    def __canonicalizar_materializado(self, key, obj):
+        """
+        Canonicaliza um registro lido do disco sob demanda. Se a entidade já
+        estiver viva em memória, essa instância prevalece: ela pode conter
+        alterações mais recentes que a versão gravada.
+        """
+        obj = mapa_identidade.resolver(obj, key)
+        self._resolver_referencias(obj)
+        return obj
+
+    def _resolver_referencias(self, obj) -> None:
+        """
+        Substitui entidades referenciadas por obj pelas instâncias canônicas
+        do mapa de identidade. A implementação padrão não faz nada; DAOs de
+        entidades que embutem outras (ex: fornecedor do café) sobrescrevem.
+        """
+
+    def __registrar_alteracao(self, key, obj, anterior):
+        """
+        Encaminha a alteração de uma chave para o disco. Fora de um lote a
+        gravação é imediata; dentro de um lote a alteração fica pendente e o
+        valor que a chave tinha no início do nível atual é guardado para
+        permitir o desfazimento.
+        """
+        self.__atualizar_indices(key, obj)
+        self.__versao += 1
+        if self.__niveis_lote:
+            nivel = self.__niveis_lote[-1]
+            if key not in nivel:
+                nivel[key] = (anterior, self.__alteracoes_pendentes.get(key, _AUSENTE))
+            self.__alteracoes_pendentes[key] = obj
+            return
+        self.__alteracoes_pendentes[key] = obj
+        self.__gravar_pendentes()
+
+    def __gravar_pendentes(self) -> None:
+        """
+        Entrega as alterações pendentes ao armazenamento. Elas só deixam de
+        estar pendentes depois que a gravação tem sucesso; se falhar, são
+        gravadas novamente junto com a próxima alteração.
+        """
+        alteracoes = self.__alteracoes_pendentes
+        if alteracoes:
+            self.__gravar(alteracoes)
+            self.__alteracoes_pendentes = {}
+
+    def _compactar(self) -> None:
+        """
+        Regrava o estado completo do cache de uma só vez, consolidando
+        qualquer histórico acumulado pela estratégia de armazenamento. Usado
+        por subclasses após migrações de formato.
+        """
+        with self.__trava_gravacao, self.__trava:
+            self.__alteracoes_adiadas = {}  # Já incluídas no estado completo
+            self.__armazenamento.compactar(self.__cache)
+
+    @contextmanager
+    def batch(self):
+        """
+        Agrupa as operações do bloco em uma única gravação. Ao sair do bloco
+        sem erros, cada chave alterada é gravada uma vez; se ocorrer exceção,
+        o cache é restaurado e o arquivo permanece intocado. Blocos aninhados
+        são incorporados ao lote mais externo; se um bloco aninhado falhar,
+        apenas as alterações feitas nele são desfeitas.
         """
-        with open(self.__datasource, 'rb') as arquivo:
-            self.__cache = pickle.load(arquivo)
+        self._iniciar_lote()
+        try:
+            yield self
+        except BaseException:
+            self._desfazer_lote()
+            raise
+        self._confirmar_lote()
+
+    def _iniciar_lote(self) -> None:
+        """
+        Abre um nível de lote. A trava do DAO fica com a thread atual até o
+        nível ser confirmado ou desfeito; enquanto houver lote aberto, as
+        alterações ficam pendentes em memória.
+        """
+        self.__trava.acquire()
+        self.__niveis_lote.append({})
+        self.__acoes_lote.append([])
+
+    def _confirmar_lote(self) -> None:
+        """
+        Encerra um nível de lote, incorporando-o ao nível de fora. Apenas o
+        nível mais externo grava as alterações pendentes no disco; se a
+        gravação falhar, o nível é encerrado mesmo assim e a exceção é
+        propagada, com as alterações ainda pendentes.
+        """
+        if not self.__niveis_lote:
+            return
+        try:
+            nivel = self.__niveis_lote.pop()
+            acoes = self.__acoes_lote.pop()
+            if self.__niveis_lote:
+                externo = self.__niveis_lote[-1]
+                for key, estado in nivel.items():
+                    externo.setdefault(key, estado)
+                self.__acoes_lote[-1].extend(acoes)
+            else:
+                self.__gravar_pendentes()
+                for acao in acoes:
+                    acao()
+        finally:
+            self.__trava.release()
+
+    def _desfazer_lote(self) -> None:
+        """
+        Descarta o nível de lote atual, devolvendo ao cache os valores que as
+        chaves tinham antes da primeira alteração dentro do nível. Os níveis
+        de fora permanecem abertos.
+        """
+        if not self.__niveis_lote:
+            return
+        try:
+            nivel = self.__niveis_lote.pop()
+            self.__acoes_lote.pop()
+            for key, (valor, pendente) in nivel.items():
+                if valor is REMOVIDO:
+                    self.__cache.pop(key, None)
+                else:
+                    self.__cache[key] = valor
+                self.__atualizar_indices(key, valor)
+                if pendente is _AUSENTE:
+                    self.__alteracoes_pendentes.pop(key, None)
+                else:
+                    self.__alteracoes_pendentes[key] = pendente
+            if nivel:
+                self.__versao += 1
+        finally:
+            self.__trava.release()
+
+    def ao_confirmar(self, acao: Callable[[], None]) -> None:
+        """
+        Agenda uma ação para quando as alterações atuais forem gravadas:
+        fora de lote, executa na hora; dentro de um lote, executa depois que
+        o lote mais externo gravar com sucesso, e é descartada se o nível em
+        que foi agendada for desfeito ou a gravação falhar. Útil para marcar
+        como gravado um estado derivado só quando ele chegou ao disco.
+        """
+        with self.__trava:
+            if self.__acoes_lote:
+                self.__acoes_lote[-1].append(acao)
+                return
+        acao()
+
+    def find_by(self, indice: str, valor) -> list:
+        """
+        Retorna os objetos cujo valor no índice secundário informado é igual
+        a `valor`, sem percorrer todos os registros. Lança KeyError se o
+        índice não estiver declarado no DAO.
+        """
+        if indice not in self._indices:
+            raise KeyError(
+                f"Índice '{indice}' não está definido em {self.__datasource}.")
+        with self.__trava:
+            if self.__indices is None:
+                self.__construir_indices()
+            chaves = list(self.__indices[indice].get(valor, ()))
+        # Os objetos são obtidos fora da trava; chaves removidas nesse meio-tempo são ignoradas
+        objetos = (self.get(key) for key in chaves)
+        return [obj for obj in objetos if obj is not None]
+
+    def contar_por(self, indice: str, valor) -> int:
+        """
+        Retorna quantos objetos têm o valor informado no índice secundário,
+        sem materializá-los. Lança KeyError se o índice não estiver
+        declarado no DAO.
+        """
+        if indice not in self._indices:
+            raise KeyError(
+                f"Índice '{indice}' não está definido em {self.__datasource}.")
+        with self.__trava:
+            if self.__indices is None:
+                self.__construir_indices()
+            return len(self.__indices[indice].get(valor, ()))
+
+    def __construir_indices(self) -> None:
+        """
+        Monta todos os índices declarados percorrendo o cache uma única vez.
+        Requer a trava do DAO, que também protege toda consulta e
+        atualização dos índices.
+        """
+        self.__indices = {nome: {} for nome in self._indices}
+        self.__valores_indexados = {nome: {} for nome in self._indices}
+        for key, obj in self.__cache.items():
+            self.__atualizar_indices(key, obj)
+
+    def __atualizar_indices(self, key, obj) -> None:
+        """
+        Move a chave para o grupo correspondente ao novo valor de cada índice,
+        retirando-a do grupo antigo. Com obj igual a REMOVIDO, apenas retira.
+        Não faz nada enquanto os índices ainda não foram montados.
+        """
+        if self.__indices is None:
+            return
+        for nome, extrair_valor in self._indices.items():
+            grupos = self.__indices[nome]
+            valores = self.__valores_indexados[nome]
+            if key in valores:
+                valor_antigo = valores.pop(key)
+                grupo = grupos[valor_antigo]
+                grupo.discard(key)
+                if not grupo:
+                    del grupos[valor_antigo]
+            if obj is not REMOVIDO:
+                valor_novo = extrair_valor(obj)
+                valores[key] = valor_novo
+                grupos.setdefault(valor_novo, set()).add(key)
 
     def add(self, key, obj):
         """
@@ -58,8 +378,12 @@ class DAO(ABC):
         imediatamente no arquivo. Se já existir um objeto com a mesma chave,
         ele será sobrescrito.
         """
-        self.__cache[key] = obj
-        self.__dump()
+        with self.__trava:
+            anterior = self.__cache.get(key, REMOVIDO)
+            self.__cache[key] = obj
+            if self._mapeia_identidade:
+                mapa_identidade.substituir(obj, key)
+            self.__registrar_alteracao(key, obj, anterior)
 
     def update(self, key, obj):
         """
@@ -67,9 +391,13 @@ class DAO(ABC):
         existir, garantindo que apenas registros existentes sejam modificados.
         """
         try:
-            if self.__cache[key] is not None:
-                self.__cache[key] = obj
-                self.__dump()
+            with self.__trava:
+                anterior = self.__cache[key]
+                if anterior is not None:
+                    self.__cache[key] = obj
+                    if self._mapeia_identidade:
+                        mapa_identidade.substituir(obj, key)
+                    self.__registrar_alteracao(key, obj, anterior)
         except KeyError:
             raise KeyError(
                 f"Não existe registro com chave '{key}' para atualizar em {self.__datasource}.")
@@ -84,6 +412,19 @@ class DAO(ABC):
         except KeyError:
             return None
 
+    def get_many(self, keys) -> dict:
+        """
+        Recupera vários objetos de uma vez: {chave: objeto}, com None para
+        as chaves inexistentes, como em `get`. No modo indexado, os registros
+        que ainda não estão em memória são lidos juntos, em ordem de posição
+        no arquivo de dados.
+        """
+        keys = list(keys)
+        encontrados = self.__cache
+        if isinstance(encontrados, RegistrosSobDemanda):
+            encontrados = encontrados.obter_varios(keys)
+        return {key: encontrados.get(key) for key in keys}
+
     def remove(self, key):
         """
         Remove um objeto do cache pela chave e persiste a alteração. Lança
@@ -91,12 +432,21 @@ class DAO(ABC):
         existentes sejam removidos.
         """
         try:
-            self.__cache.pop(key)
-            self.__dump()
+            with self.__trava:
+                anterior = self.__cache.pop(key)
+                if self._mapeia_identidade:
+                    mapa_identidade.descartar(type(anterior), key)
+                self.__registrar_alteracao(key, REMOVIDO, anterior)
         except KeyError:
             raise KeyError(
                 f"Não existe registro com chave '{key}' para remover em {self.__datasource}.")
 
+    def quantidade(self) -> int:
+        """
+        Retorna o número de registros armazenados sem materializá-los.
+        """
+        return len(self.__cache)
+
     def get_all(self):
         """
         Retorna todos os valores armazenados no cache como uma view. Útil
@@ -0,0 +1,111 @@
+"""
+Gravação adiada (write-behind) das alterações dos DAOs.
+
+Quando ativada em DAOs/configuracao.py, as operações de modificação dos DAOs
+apenas atualizam o cache em memória e marcam o DAO como "sujo". Uma thread
+em segundo plano grava as alterações acumuladas depois que o DAO fica
+INTERVALO_ESCRITA_ADIADA segundos sem receber novas alterações (debounce),
+ou imediatamente quando o número de chaves pendentes atinge
+MAXIMO_ALTERACOES_PENDENTES. Assim, cliques seguidos na tela (ex: montar o
+carrinho de uma venda) não esperam pelo disco.
+
+Como as alterações pendentes só existem em memória, o encerramento do
+sistema deve chamar descarregar_todos(); a mesma chamada também é
+registrada com atexit como garantia adicional.
+"""
+
+import atexit
+import logging
+import threading
+import time
+import weakref
+
+import DAOs.configuracao as configuracao
+
+
+logger = logging.getLogger(__name__)
+
+
+class GerenciadorEscritaAdiada:
+    def __init__(self) -> None:
+        self.__condicao = threading.Condition()
+        self.__sujos = {}  # DAO -> None, preservando a ordem de chegada
+        self.__registrados = weakref.WeakSet()  # Todos os DAOs já agendados
+        self.__ultima_alteracao = 0.0
+        self.__forcar = False
+        self.__thread = None
+
+    def agendar(self, dao, pendentes: int) -> None:
+        """
+        Marca o DAO como sujo e reinicia a contagem do intervalo de debounce.
+        Se o DAO já acumula `pendentes` chaves acima do máximo configurado, a
+        gravação é antecipada.
+        """
+        with self.__condicao:
+            self.__sujos[dao] = None
+            self.__registrados.add(dao)
+            self.__ultima_alteracao = time.monotonic()
+            if pendentes >= configuracao.MAXIMO_ALTERACOES_PENDENTES:
+                self.__forcar = True
+            if self.__thread is None:
+                self.__thread = threading.Thread(
+                    target=self.__executar, name='escrita-adiada', daemon=True)
+                self.__thread.start()
+            self.__condicao.notify()
+
+    def descarregar_todos(self) -> None:
+        """
+        Grava de forma síncrona as alterações pendentes de todos os DAOs que
+        já usaram a gravação adiada, inclusive os que a thread de segundo
+        plano está gravando neste momento (a gravação de cada DAO é
+        serializada, então esta chamada espera a que estiver em andamento e
+        grava o que tiver sobrado). Deve ser chamado antes de encerrar o
+        processo. Se algum DAO falhar, os demais ainda são gravados e a
+        primeira falha é propagada ao final.
+        """
+        with self.__condicao:
+            daos = list(self.__registrados)
+            self.__sujos.clear()
+            self.__forcar = False
+        primeira_falha = None
+        for dao in daos:
+            try:
+                dao._descarregar()
+            except Exception as erro:
+                logger.exception("Falha ao descarregar %s.", dao.datasource)
+                if primeira_falha is None:
+                    primeira_falha = erro
+        if primeira_falha is not None:
+            raise primeira_falha
+
+    def __executar(self) -> None:
+        """
+        Laço da thread de gravação: espera haver DAOs sujos, aguarda o
+        intervalo de debounce (ou o sinal de máximo atingido) e grava cada
+        DAO fora da trava do gerenciador.
+        """
+        while True:
+            with self.__condicao:
+                while not self.__sujos:
+                    self.__condicao.wait()
+                while not self.__forcar:
+                    restante = (self.__ultima_alteracao
+                                + configuracao.INTERVALO_ESCRITA_ADIADA - time.monotonic())
+                    if restante <= 0:
+                        break
+                    self.__condicao.wait(restante)
+                daos = list(self.__sujos)
+                self.__sujos.clear()
+                self.__forcar = False
+            for dao in daos:
+                try:
+                    dao._descarregar()
+                except Exception:
+                    # As alterações voltam a ficar pendentes no DAO; tenta de novo
+                    logger.exception("Falha na gravação adiada; nova tentativa agendada.")
+                    self.agendar(dao, 0)
+
+
+# Instância única compartilhada por todos os DAOs do processo
+gerenciador_escrita_adiada = GerenciadorEscritaAdiada()
+atexit.register(gerenciador_escrita_adiada.descarregar_todos)
@@ -3,21 +3,35 @@ DAO especializado para persistência do estado do estoque.
 
 Este módulo gerencia a persistência do inventário de produtos usando uma
 estrutura de dados diferente dos outros DAOs. Ao invés de armazenar objetos
-completos, armazena um dicionário que mapeia IDs de produtos para quantidades,
-otimizando o armazenamento e facilitando a serialização.
+completos, armazena os buffers brutos dos vetores do Estoque (IDs de
+produtos e quantidades por slot), que são gravados sem conversão para
+dicionário a cada alteração.
 
 Utiliza uma chave fixa ('ESTOQUE') para armazenar todo o estado do estoque
 em uma única entrada no cache, simplificando o gerenciamento e garantindo
 que apenas um estado de estoque exista por vez.
+
+Arquivos antigos, que guardam um dicionário {id_produto: quantidade}, são
+lidos normalmente e convertidos para vetores na carga.
+
+O estado das encomendas (vendas aguardando reposição) fica em uma segunda
+chave fixa ('ENCOMENDAS'), gravada apenas quando as encomendas mudam. Os
+limites de reposição definidos por produto ficam em uma terceira
+('LIMITES_REPOSICAO'), também gravada apenas quando mudam.
 """
 
-from typing import Dict
+import sys
+from array import array
+from typing import Dict, Tuple
 
 from DAOs.dao import DAO
 
 
 class EstoqueDAO(DAO):
     _CHAVE = 'ESTOQUE'
+    _CHAVE_ENCOMENDAS = 'ENCOMENDAS'
+    _CHAVE_LIMITES = 'LIMITES_REPOSICAO'
+    _FORMATO_VETORES = 'vetores-q'
 
     def __init__(self):
         """
@@ -26,21 +40,86 @@ class EstoqueDAO(DAO):
         """
         super().__init__('estoque.pkl')
 
+    def salvar_buffers(self, ids: bytes, quantidades: bytes) -> None:
+        """
+        Persiste o estado completo do estoque a partir dos buffers brutos
+        de um array('q') de IDs e de um array('q') de quantidades, ambos
+        indexados por slot.
+        """
+        super().add(self._CHAVE, {
+            'formato': self._FORMATO_VETORES,
+            'ordem_bytes': sys.byteorder,
+            'ids': ids,
+            'quantidades': quantidades,
+        })
+
+    def carregar_buffers(self) -> Tuple[array, array]:
+        """
+        Carrega os vetores (IDs, quantidades) do estoque. Estados gravados no
+        formato antigo de dicionário são convertidos, um produto por slot.
+        Retorna vetores vazios se não houver dados salvos.
+        """
+        dados_estoque = super().get(self._CHAVE)
+        ids = array('q')
+        quantidades = array('q')
+        if not isinstance(dados_estoque, dict):
+            return ids, quantidades
+        if dados_estoque.get('formato') == self._FORMATO_VETORES:
+            ids.frombytes(dados_estoque['ids'])
+            quantidades.frombytes(dados_estoque['quantidades'])
+            if dados_estoque['ordem_bytes'] != sys.byteorder:
+                ids.byteswap()
+                quantidades.byteswap()
+            return ids, quantidades
+        for id_produto, quantidade in dados_estoque.items():
+            ids.append(int(id_produto))
+            quantidades.append(int(quantidade))
+        return ids, quantidades
+
     def salvar(self, itens: Dict[int, int]) -> None:
         """
-        Persiste o estado completo do estoque. Recebe um dicionário mapeando
-        IDs de produtos para quantidades e armazena usando a chave fixa.
+        Persiste o estado completo do estoque a partir de um dicionário
+        mapeando IDs de produtos para quantidades.
         """
-        super().add(self._CHAVE, itens)
+        ids = array('q', (int(id_produto) for id_produto in itens))
+        quantidades = array('q', (int(quantidade) for quantidade in itens.values()))
+        self.salvar_buffers(ids.tobytes(), quantidades.tobytes())
 
     def carregar(self) -> Dict[int, int]:
         """
-        Carrega o estado completo do estoque do arquivo. Converte todas as
-        chaves e valores para inteiros, garantindo tipos consistentes mesmo
-        se os dados foram salvos com tipos diferentes. Retorna dicionário
+        Carrega o estado completo do estoque como dicionário mapeando IDs de
+        produtos para quantidades, ignorando slots vagos. Retorna dicionário
         vazio se não houver dados salvos.
         """
-        dados_estoque = super().get(self._CHAVE)
-        if isinstance(dados_estoque, dict):
-            return {int(k): int(v) for k, v in dados_estoque.items()}
-        return {}
+        ids, quantidades = self.carregar_buffers()
+        return {id_produto: quantidade for id_produto, quantidade in zip(ids, quantidades)
+                if id_produto >= 0 and quantidade > 0}
+
+    def salvar_encomendas(self, encomendas: dict) -> None:
+        """
+        Persiste o estado das encomendas exportado pelo Estoque.
+        """
+        super().add(self._CHAVE_ENCOMENDAS, encomendas)
+
+    def carregar_encomendas(self) -> dict:
+        """
+        Carrega o estado das encomendas. Retorna dicionário vazio se não
+        houver encomendas salvas.
+        """
+        encomendas = super().get(self._CHAVE_ENCOMENDAS)
+        return encomendas if isinstance(encomendas, dict) else {}
+
+    def salvar_limites(self, limites: Dict[int, int]) -> None:
+        """
+        Persiste os limites de reposição exportados pelo Estoque, {ID do
+        produto: limite}.
+        """
+        super().add(self._CHAVE_LIMITES, limites)
+
+    def carregar_limites(self) -> Dict[int, int]:
+        """
+        Carrega os limites de reposição. Retorna dicionário vazio se não
+        houver limites salvos (todos os produtos usam o limite padrão).
+        """
+        limites = super().get(self._CHAVE_LIMITES)
+        return limites if isinstance(limites, dict) else {}
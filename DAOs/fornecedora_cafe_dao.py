@@ -18,6 +18,8 @@ from entidade.fornecedora_cafe import FornecedoraCafe
 
 
 class FornecedoraCafeDAO(DAO):
+    _mapeia_identidade = True
+
     def __init__(self):
         """
         Inicializa o DAO de fornecedores de café, configurando
@@ -18,6 +18,8 @@ from entidade.fornecedora_maquina import FornecedoraMaquina
 
 
 class FornecedoraMaquinaDAO(DAO):
+    _mapeia_identidade = True
+
     def __init__(self):
         """
         Inicializa o DAO de fornecedores de máquinas, configurando
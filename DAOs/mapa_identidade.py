@@ -0,0 +1,89 @@
+"""
+Mapa de identidade compartilhado por todos os DAOs.
+
+Cada arquivo .pkl é desserializado de forma independente, então uma mesma
+entidade referenciada em arquivos diferentes (ex: a FornecedoraCafe embutida
+em cada Cafe de 'cafes.pkl' e a registrada em 'fornecedores_cafe.pkl') vira
+vários objetos distintos em memória. Como as entidades são comparadas por
+identidade em todo o sistema, essas cópias quebram buscas, comparações e
+alterações.
+
+O mapa garante que cada par (classe, chave) corresponda a uma única
+instância canônica:
+- registrar(): usado pelo DAO dono da entidade. Seus dados são a versão
+  oficial; se já houver uma instância canônica criada a partir de uma
+  referência, ela recebe o estado oficial e continua sendo a canônica.
+- resolver(): usado para referências encontradas dentro de outras
+  entidades. Retorna a instância canônica existente ou adota a referência
+  como canônica provisória até que o DAO dono a registre.
+
+As instâncias são guardadas por referência fraca, de modo que o mapa não
+impede a coleta de entidades que deixaram de ser usadas.
+"""
+
+import threading
+import weakref
+
+
+class MapaDeIdentidade:
+    def __init__(self) -> None:
+        self.__instancias = weakref.WeakValueDictionary()
+        self.__trava = threading.Lock()
+
+    def registrar(self, obj, chave):
+        """
+        Registra a versão oficial de uma entidade. Se já existir instância
+        canônica para a mesma chave, copia o estado de obj para ela e a
+        retorna; caso contrário, obj passa a ser a instância canônica.
+        """
+        identificador = (type(obj), chave)
+        with self.__trava:
+            existente = self.__instancias.get(identificador)
+            if existente is None:
+                self.__instancias[identificador] = obj
+                return obj
+            if existente is not obj:
+                existente.__dict__.update(obj.__dict__)
+            return existente
+
+    def resolver(self, obj, chave):
+        """
+        Resolve uma referência para a instância canônica. Se ainda não
+        houver instância canônica, obj é adotado provisoriamente.
+        """
+        if obj is None:
+            return None
+        identificador = (type(obj), chave)
+        with self.__trava:
+            existente = self.__instancias.get(identificador)
+            if existente is None:
+                self.__instancias[identificador] = obj
+                return obj
+            return existente
+
+    def obter(self, tipo: type, chave):
+        """
+        Retorna a instância canônica da chave, ou None se não houver uma
+        (nunca registrada ou já coletada).
+        """
+        with self.__trava:
+            return self.__instancias.get((tipo, chave))
+
+    def substituir(self, obj, chave) -> None:
+        """
+        Define obj como instância canônica, sem copiar estado. Usado quando
+        uma entidade é adicionada ou atualizada explicitamente pelo sistema.
+        """
+        with self.__trava:
+            self.__instancias[(type(obj), chave)] = obj
+
+    def descartar(self, tipo: type, chave) -> None:
+        """
+        Remove a associação de uma chave, usado quando a entidade é excluída.
+        """
+        with self.__trava:
+            self.__instancias.pop((tipo, chave), None)
+
+
+# Instância única compartilhada por todos os DAOs do processo
+mapa_identidade = MapaDeIdentidade()
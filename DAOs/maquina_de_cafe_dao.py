@@ -8,15 +8,24 @@ tipo específicas. Utiliza o ID da máquina como chave primária para indexaçã
 Todas as operações validam que os objetos são instâncias de MaquinaDeCafe e
 que o ID é um inteiro antes de delegar para a classe base, garantindo
 integridade de tipos e prevenindo erros de runtime.
+
+Índice secundário: 'fornecedor' (CNPJ do fornecedor da máquina).
 """
 
 from typing import Optional
 
 from DAOs.dao import DAO
+from DAOs.mapa_identidade import mapa_identidade
 from entidade.maquina_de_cafe import MaquinaDeCafe
 
 
 class MaquinaDeCafeDAO(DAO):
+    _mapeia_identidade = True
+    _indices = {
+        'fornecedor': lambda maquina: (maquina.empresa_fornecedora.cnpj
+                                       if maquina.empresa_fornecedora else None),
+    }
+
     def __init__(self):
         """
         Inicializa o DAO de máquinas de café, configurando 'maquinas.pkl' como
@@ -58,3 +67,12 @@ class MaquinaDeCafeDAO(DAO):
         """
         if isinstance(key, int):
             super().remove(key)
+
+    def _resolver_referencias(self, maquina: MaquinaDeCafe) -> None:
+        """
+        Aponta o fornecedor embutido no arquivo para a instância canônica
+        mantida pelo DAO de fornecedores, evitando cópias divergentes.
+        """
+        fornecedor = maquina.empresa_fornecedora
+        if fornecedor is not None:
+            maquina.empresa_fornecedora = mapa_identidade.resolver(fornecedor, fornecedor.cnpj)
@@ -0,0 +1,84 @@
+"""
+Unidade de trabalho que agrupa gravações de vários DAOs.
+
+Algumas operações de negócio alteram mais de um repositório de uma vez; a
+finalização de uma venda, por exemplo, modifica o estoque e a própria venda.
+Sem agrupamento, cada alteração intermediária dispara uma gravação em disco.
+
+A UnidadeDeTrabalho abre um lote em cada DAO participante, de modo que cada
+arquivo é gravado exatamente uma vez ao final do bloco `with`. Se o bloco
+lançar exceção, todos os DAOs descartam suas alterações pendentes e
+restauram o cache, deixando memória e disco como estavam antes do bloco.
+
+Cada lote mantém a trava do seu DAO com a thread atual até o fim do bloco.
+Para que duas unidades com DAOs em comum não se bloqueiem mutuamente, os
+lotes são abertos sempre na mesma ordem (pelo arquivo de cada DAO).
+
+A confirmação não é atômica entre arquivos: cada DAO grava o seu arquivo
+em sequência. Se a gravação de um DAO falhar, os demais ainda são
+confirmados e, ao final, GravacaoIncompletaException informa quais arquivos
+foram gravados e quais falharam; as alterações dos que falharam continuam
+pendentes no respectivo DAO, e os arquivos ficam divergentes até a próxima
+gravação bem-sucedida dele.
+
+Observação: o desfazimento restaura quais objetos estão associados a cada
+chave. Alterações feitas diretamente nos atributos de uma entidade (ex:
+cliente.saldo) continuam sob responsabilidade de quem as fez, que deve
+desfazê-las dentro do bloco antes de propagar a exceção (ver
+Venda.desfazer_finalizacao).
+"""
+
+from DAOs.dao import DAO
+from Excecoes.gravacaoIncompletaException import GravacaoIncompletaException
+
+
+class UnidadeDeTrabalho:
+    def __init__(self, *daos: DAO) -> None:
+        """
+        Recebe os DAOs que participarão da unidade de trabalho. DAOs
+        repetidos são considerados uma única vez.
+        """
+        self.__daos = []
+        for dao in daos:
+            if all(dao is not existente for existente in self.__daos):
+                self.__daos.append(dao)
+        self.__daos.sort(key=lambda dao: dao.datasource)
+
+    def __enter__(self) -> "UnidadeDeTrabalho":
+        abertos = []
+        try:
+            for dao in self.__daos:
+                dao._iniciar_lote()
+                abertos.append(dao)
+        except BaseException:
+            for dao in reversed(abertos):
+                dao._desfazer_lote()
+            raise
+        return self
+
+    def __exit__(self, tipo_excecao, excecao, rastreamento) -> bool:
+        """
+        Confirma os lotes de todos os DAOs quando o bloco termina sem erros
+        ou desfaz todos eles em caso de exceção. Nunca suprime a exceção.
+        Todos os lotes são encerrados mesmo que a gravação de algum DAO
+        falhe; nesse caso, lança GravacaoIncompletaException.
+        """
+        if tipo_excecao is not None:
+            for dao in reversed(self.__daos):
+                dao._desfazer_lote()
+            return False
+        gravados, falhas = [], []
+        for posicao, dao in enumerate(self.__daos):
+            try:
+                dao._confirmar_lote()
+            except Exception as erro:
+                falhas.append((dao.datasource, erro))
+            except BaseException:
+                for restante in reversed(self.__daos[posicao + 1:]):
+                    restante._desfazer_lote()
+                raise
+            else:
+                gravados.append(dao.datasource)
+        if falhas:
+            raise GravacaoIncompletaException(gravados, falhas) from falhas[0][1]
+        return False
@@ -6,24 +6,68 @@ herdando a funcionalidade base de DAO e adicionando validações de tipo
 específicas. Utiliza o ID da venda (id_venda) como chave primária para
 indexação, diferente dos outros DAOs que usam apenas 'id'.
 
-Todas as operações validam que os objetos são instâncias de Venda e que o
-id_venda é um inteiro antes de delegar para a classe base, garantindo
-integridade de tipos e prevenindo erros de runtime.
+As vendas são persistidas por referência: em vez de serializar o objeto
+Venda com o Cliente e os Produtos embutidos, cada venda é gravada como um
+registro compacto com o ID do cliente e os itens do carrinho (ID do produto,
+quantidade, preço unitário, nome, tipo e fornecedor no momento da venda).
+Os objetos Venda são
+reidratados sob demanda através dos resolvedores informados pelo
+controlador, de modo que cliente e produtos do carrinho são as mesmas
+instâncias mantidas por ClienteDAO, CafeDAO e MaquinaDeCafeDAO. As vendas
+reidratadas são canonizadas no mapa de identidade (por referência fraca):
+enquanto uma venda estiver em uso, todas as consultas retornam a mesma
+instância, e a existência da venda é sempre decidida pelo registro, de modo
+que vendas de lotes desfeitos deixam de ser encontradas.
+
+Se um cliente ou produto tiver sido excluído depois da venda, os dados
+registrados no próprio registro são usados para montar um objeto
+substituto, preservando o histórico (inclusive o tipo e o fornecedor do
+produto, usados pelos agregados). Itens gravados antes de o tipo e o
+fornecedor serem registrados continuam sendo lidos, sem esses dados.
+
+Arquivos antigos, que guardam objetos Venda completos, são convertidos para
+o formato por referência na primeira carga.
+
+Índices secundários: 'cliente' (ID do cliente) e 'status' (status da venda).
 """
 
-from typing import Optional
+from typing import Callable, Optional
 
 from DAOs.dao import DAO
+from DAOs.mapa_identidade import mapa_identidade
+from entidade.cliente import Cliente
+from entidade.produto import Produto
+from entidade.produto_removido import ProdutoRemovido
 from entidade.venda import Venda
 
 
 class VendaDAO(DAO):
-    def __init__(self):
+    _indices = {
+        'cliente': lambda registro: registro['cliente_id'],
+        'status': lambda registro: registro['status_venda'],
+    }
+
+    def __init__(self, resolver_cliente: Optional[Callable[[int], Optional[Cliente]]] = None,
+                 resolver_produto: Optional[Callable[[int], Optional[Produto]]] = None):
         """
         Inicializa o DAO de vendas, configurando 'vendas.pkl' como arquivo
-        de persistência e carregando os dados existentes.
+        de persistência e carregando os dados existentes. Os resolvedores
+        recebem um ID e retornam a entidade correspondente (ou None se não
+        existir mais); são consultados apenas quando uma venda é acessada.
         """
         super().__init__('vendas.pkl')
+        self.__resolver_cliente = resolver_cliente
+        self.__resolver_produto = resolver_produto
+        self.__converter_registros_legados()
+
+    def definir_resolvedores(self, resolver_cliente: Callable[[int], Optional[Cliente]],
+                             resolver_produto: Callable[[int], Optional[Produto]]) -> None:
+        """
+        Define os resolvedores depois da construção, permitindo carregar o
+        DAO antes de o controlador que os fornece existir.
+        """
+        self.__resolver_cliente = resolver_cliente
+        self.__resolver_produto = resolver_produto
 
     def add(self, venda: Venda) -> None:
         """
@@ -31,7 +75,8 @@ class VendaDAO(DAO):
         instância de Venda e que possui um id_venda inteiro antes de persistir.
         """
         if isinstance(venda, Venda) and isinstance(venda.id_venda, int):
-            super().add(venda.id_venda, venda)
+            super().add(venda.id_venda, self.__para_registro(venda))
+            mapa_identidade.substituir(venda, venda.id_venda)
 
     def update(self, venda: Venda) -> None:
         """
@@ -40,16 +85,21 @@ class VendaDAO(DAO):
         sejam atualizadas.
         """
         if isinstance(venda, Venda) and isinstance(venda.id_venda, int):
-            super().update(venda.id_venda, venda)
+            super().update(venda.id_venda, self.__para_registro(venda))
+            mapa_identidade.substituir(venda, venda.id_venda)
 
     def get(self, key: int) -> Optional[Venda]:
         """
-        Recupera uma venda pelo ID. Retorna None se não encontrada, permitindo
-        verificação de existência sem exceções.
+        Recupera uma venda pelo ID, reidratando-a na primeira consulta.
+        Retorna None se não encontrada, permitindo verificação de existência
+        sem exceções.
         """
-        if isinstance(key, int):
-            return super().get(key)
-        return None
+        if not isinstance(key, int):
+            return None
+        registro = super().get(key)
+        if registro is None:
+            return None
+        return self.__canonica(registro)
 
     def remove(self, key: int) -> None:
         """
@@ -58,3 +108,88 @@ class VendaDAO(DAO):
         """
         if isinstance(key, int):
             super().remove(key)
+            mapa_identidade.descartar(Venda, key)
+
+    def get_all(self) -> list:
+        """
+        Retorna todas as vendas reidratadas. Vendas ainda não acessadas são
+        reconstruídas neste momento a partir dos registros persistidos.
+        """
+        return [self.__canonica(registro) for registro in super().get_all()]
+
+    def __canonica(self, registro: dict) -> Venda:
+        """
+        Retorna a instância da venda em uso, reidratando-a do registro se
+        nenhuma estiver.
+        """
+        venda = mapa_identidade.obter(Venda, registro['id_venda'])
+        if venda is None:
+            # Se outra thread reidratar a mesma venda, prevalece a primeira
+            venda = mapa_identidade.resolver(self.__materializar(registro), registro['id_venda'])
+        return venda
+
+    def __materializar(self, registro: dict) -> Venda:
+        """
+        Reconstrói um objeto Venda a partir de seu registro, resolvendo
+        cliente e produtos pelos IDs.
+        """
+        cliente = self.__resolver(self.__resolver_cliente, registro['cliente_id'])
+        if cliente is None:
+            # Cliente excluído: substituto só com os dados registrados na venda
+            cliente = Cliente(registro['cliente_id'], registro['cliente_nome'], "", "",
+                              0.0, "Doce e Suave")
+
+        carrinho = {}
+        for id_produto, quantidade, preco_unitario, nome, *classificacao in registro['itens']:
+            produto = self.__resolver(self.__resolver_produto, id_produto)
+            if produto is None:
+                produto = ProdutoRemovido(nome, preco_unitario, id_produto, *classificacao)
+            carrinho[produto] = carrinho.get(produto, 0) + quantidade
+
+        venda = Venda(registro['id_venda'], cliente)
+        venda.restaurar_estado(carrinho, registro['valor_total'],
+                               registro['status_venda'], registro['data_venda'])
+        return venda
+
+    def __para_registro(self, venda: Venda) -> dict:
+        """
+        Converte uma venda no registro compacto gravado em disco, contendo
+        apenas IDs, quantidades, preços e os nomes, tipos e fornecedores
+        necessários para exibir e agregar a venda caso as entidades
+        referenciadas sejam excluídas.
+        """
+        return {
+            'id_venda': venda.id_venda,
+            'cliente_id': venda.cliente.id,
+            'cliente_nome': venda.cliente.nome,
+            'data_venda': venda.data_venda,
+            'valor_total': venda.valor_total,
+            'status_venda': venda.status_venda,
+            'itens': [(produto.id, quantidade, produto.preco_venda, produto.nome,
+                       *ProdutoRemovido.classificar(produto))
+                      for produto, quantidade in venda.carrinho.items()],
+        }
+
+    def __converter_registros_legados(self) -> None:
+        """
+        Converte vendas gravadas no formato antigo (objeto Venda completo)
+        para registros por referência, regravando o arquivo uma única vez.
+        Como a conversão é feita para todos os registros de uma só vez, basta
+        inspecionar o primeiro para saber se o arquivo ainda é legado, sem
+        desserializar a tabela inteira em modos com carga sob demanda.
+        """
+        registros = super().get_all()
+        primeiro = next(iter(registros), None)
+        if not isinstance(primeiro, Venda):
+            return
+        legados = [registro for registro in registros if isinstance(registro, Venda)]
+        with self.batch():
+            for venda in legados:
+                super().update(venda.id_venda, self.__para_registro(venda))
+        self._compactar()
+
+    @staticmethod
+    def __resolver(resolvedor, identificador):
+        if resolvedor is None:
+            return None
+        return resolvedor(identificador)
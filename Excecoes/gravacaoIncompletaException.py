@@ -0,0 +1,22 @@
+"""
+Exceção lançada quando uma unidade de trabalho não consegue gravar todos os DAOs.
+
+A confirmação de uma unidade de trabalho grava um arquivo por DAO, e uma
+falha no meio deixa os arquivos já gravados com as alterações novas. Esta
+exceção informa quais DAOs foram gravados e quais falharam (com o erro de
+cada um), para que a inconsistência possa ser diagnosticada. As alterações
+dos DAOs que falharam continuam pendentes em memória e são gravadas junto
+com a próxima alteração de cada um.
+"""
+
+from typing import List, Tuple
+
+
+class GravacaoIncompletaException(Exception):
+    def __init__(self, gravados: List[str], falhas: List[Tuple[str, Exception]]):
+        self.gravados = gravados
+        self.falhas = falhas
+        descricao_falhas = "; ".join(f"{nome}: {erro}" for nome, erro in falhas)
+        super().__init__(
+            f"Falha ao gravar {descricao_falhas}. "
+            f"Gravados: {', '.join(gravados) if gravados else 'nenhum'}.")
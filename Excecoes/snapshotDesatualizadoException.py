@@ -0,0 +1,23 @@
+"""
+Exceção lançada quando o log de um arquivo não pode ser reaplicado com segurança.
+
+No modo log, as alterações registradas no log valem sobre a geração mais
+recente do snapshot. Se essa geração estiver corrompida e só uma geração
+anterior for válida, reaplicar o log sobre ela misturaria estados de
+momentos diferentes e perderia, sem aviso, as alterações consolidadas na
+geração corrompida. O carregamento é então recusado com esta exceção, que
+indica o arquivo afetado e a geração encontrada, para recuperação manual
+(ex: restaurar o snapshot ou aceitar explicitamente a geração anterior
+removendo o log).
+"""
+
+
+class SnapshotDesatualizadoException(Exception):
+    def __init__(self, caminho: str, geracao: int):
+        self.caminho = caminho
+        self.geracao = geracao
+        super().__init__(
+            f"O snapshot mais recente de '{caminho}' está corrompido e a geração válida "
+            f"mais nova é '{caminho}.{geracao}'. O log não pode ser reaplicado sobre ela "
+            f"sem perder dados; restaure o snapshot ou remova o log para aceitar a "
+            f"geração anterior.")
@@ -0,0 +1,151 @@
+"""
+Teste de estresse e benchmark da finalização concorrente de vendas.
+
+Vários caixas (threads) finalizam vendas aleatórias ao mesmo tempo contra um
+único Estoque em memória. Dois arranjos são comparados:
+- 'trava global': cada finalização inteira é protegida por uma única trava
+  e o estoque usa uma só listra
+- 'travas finas': apenas as travas do próprio sistema (por cliente e
+  listras por produto)
+
+Para simular o trabalho feito durante a finalização enquanto a trava do
+cliente está adquirida (ex: autorização do pagamento), cada venda aguarda
+LATENCIA_MS milissegundos dentro da trava do cliente (ou da trava global).
+
+Ao final de cada execução são verificados os invariantes:
+- nenhuma quantidade do estoque ficou negativa em nenhum momento (checado a
+  cada notificação de alteração)
+- unidades vendidas + unidades restantes = unidades iniciais, por produto
+- saldo de cada cliente = saldo inicial - total das suas vendas finalizadas
+
+Execute com: python benchmark_concorrencia.py [threads] [vendas_por_thread]
+"""
+
+import hashlib
+import random
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+
+from entidade.cafe import Cafe
+from entidade.cliente import Cliente
+from entidade.estoque import Estoque
+from entidade.fornecedora_cafe import FornecedoraCafe
+from entidade.travas import travas_clientes
+from entidade.venda import Venda
+from Excecoes.estoqueInsuficienteException import EstoqueInsuficienteException
+from Excecoes.produtoNaoEmEstoqueException import ProdutoNaoEmEstoqueException
+from Excecoes.saldoInsuficienteException import SaldoInsuficienteException
+
+
+PRODUTOS = 200
+UNIDADES_POR_PRODUTO = 40
+CLIENTES = 100
+SALDO_INICIAL = 2000.0
+LATENCIA_MS = 1.0
+
+
+def criar_cenario(listras: int):
+    """Cria produtos, clientes e um estoque abastecido."""
+    fornecedora = FornecedoraCafe("Fornecedora Benchmark", "00000000000100",
+                                  "Rua A, 1", "48999990000", "Brasil")
+    produtos = [Cafe(f"Café {i}", 5.0, 10.0 + (i % 7), i, "01/01/2025", "Brasil",
+                     "Bourbon", 1000, "Média", "Doce", "Doce e Suave", fornecedora)
+                for i in range(PRODUTOS)]
+    senha = hashlib.sha256(b"benchmark").hexdigest()
+    clientes = [Cliente(i, f"Cliente {i}", f"cliente{i}@email.com", senha,
+                        SALDO_INICIAL, "Doce e Suave") for i in range(CLIENTES)]
+    estoque = Estoque(listras=listras)
+    for produto in produtos:
+        estoque.cadastrar_novo_produto(produto, UNIDADES_POR_PRODUTO)
+    return produtos, clientes, estoque
+
+
+def executar(threads: int, vendas_por_thread: int, trava_global: bool) -> dict:
+    """
+    Executa o cenário e retorna o throughput e o resultado dos invariantes.
+    """
+    produtos, clientes, estoque = criar_cenario(1 if trava_global else Estoque.LISTRAS_PADRAO)
+    quantidade_negativa = []
+
+    def verificar_buffers(estoque_alterado: Estoque) -> None:
+        _, buffer_quantidades = estoque_alterado.exportar_buffers()
+        quantidades = array('q')
+        quantidades.frombytes(buffer_quantidades)
+        if quantidades and min(quantidades) < 0:
+            quantidade_negativa.append(min(quantidades))
+    estoque.definir_callback_alteracao(verificar_buffers)
+
+    trava_unica = threading.Lock()
+    vendidos = Counter()
+    gastos = Counter()
+    registro = threading.Lock()
+    contadores = Counter()
+
+    def caixa(semente: int) -> None:
+        aleatorio = random.Random(semente)
+        for numero in range(vendas_por_thread):
+            cliente = aleatorio.choice(clientes)
+            venda = Venda(semente * vendas_por_thread + numero, cliente)
+            for produto in aleatorio.sample(produtos, aleatorio.randint(1, 4)):
+                venda.adicionar_produto(produto, aleatorio.randint(1, 3))
+            trava = trava_unica if trava_global else travas_clientes.obter(cliente.id)
+            try:
+                with trava:
+                    time.sleep(LATENCIA_MS / 1000)
+                    venda.finalizar_venda(estoque)
+            except (EstoqueInsuficienteException, ProdutoNaoEmEstoqueException,
+                    SaldoInsuficienteException):
+                with registro:
+                    contadores['recusadas'] += 1
+                continue
+            with registro:
+                contadores['finalizadas'] += 1
+                gastos[cliente.id] += venda.valor_total
+                for produto, quantidade in venda.carrinho.items():
+                    vendidos[produto.id] += quantidade
+
+    trabalhadores = [threading.Thread(target=caixa, args=(indice,)) for indice in range(threads)]
+    inicio = time.perf_counter()
+    for trabalhador in trabalhadores:
+        trabalhador.start()
+    for trabalhador in trabalhadores:
+        trabalhador.join()
+    duracao = time.perf_counter() - inicio
+
+    estoque_conservado = all(vendidos[produto.id] + estoque.quantidade(produto.id)
+                             == UNIDADES_POR_PRODUTO for produto in produtos)
+    saldos_conservados = all(abs(SALDO_INICIAL - gastos[cliente.id] - cliente.saldo) < 1e-6
+                             and cliente.saldo >= 0 for cliente in clientes)
+    return {
+        'vendas_por_segundo': (threads * vendas_por_thread) / duracao,
+        'finalizadas': contadores['finalizadas'],
+        'recusadas': contadores['recusadas'],
+        'invariantes': (not quantidade_negativa and estoque_conservado and saldos_conservados),
+    }
+
+
+def main():
+    """Executa os dois arranjos e exibe a comparação."""
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    vendas_por_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    print("\n" + "=" * 72)
+    print(f"FINALIZAÇÃO CONCORRENTE ({threads} caixas x {vendas_por_thread} vendas, "
+          f"latência {LATENCIA_MS} ms)")
+    print("=" * 72)
+    print(f"{'Arranjo':<14} | {'Vendas/s':>10} | {'Finalizadas':>11} | "
+          f"{'Recusadas':>9} | {'Invariantes':>11}")
+    print("-" * 72)
+    for rotulo, trava_global in (("trava global", True), ("travas finas", False)):
+        resultado = executar(threads, vendas_por_thread, trava_global)
+        print(f"{rotulo:<14} | {resultado['vendas_por_segundo']:>10.0f} | "
+              f"{resultado['finalizadas']:>11} | {resultado['recusadas']:>9} | "
+              f"{'OK' if resultado['invariantes'] else 'FALHOU':>11}")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
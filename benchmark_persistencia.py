@@ -0,0 +1,112 @@
+"""
+Benchmark das estratégias de persistência dos DAOs.
+
+Compara os modos configuráveis em DAOs/configuracao.py ('snapshot', 'log',
+'sqlite' e 'indexado') usando o ClienteDAO com uma massa de dados sintética.
+Para cada modo são medidos:
+- Tempo de carga inicial (construção do DAO com a tabela já populada)
+- Latência média de update de um único registro
+- Latência média de add de um registro novo
+
+Cada modo também é medido com a gravação adiada ligada, caso em que as
+latências refletem apenas o caminho interativo (a gravação ocorre na thread
+de segundo plano).
+
+Os arquivos são criados em um diretório temporário, sem tocar nos arquivos
+.pkl do sistema. Execute com: python benchmark_persistencia.py [registros]
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+import DAOs.configuracao as configuracao
+from DAOs.cliente_dao import ClienteDAO
+from DAOs.escrita_adiada import gerenciador_escrita_adiada
+from entidade.cliente import Cliente
+
+
+MODOS = [configuracao.MODO_SNAPSHOT, configuracao.MODO_LOG, configuracao.MODO_SQLITE,
+         configuracao.MODO_INDEXADO]
+OPERACOES_MEDIDAS = 200
+
+
+def criar_clientes(quantidade: int) -> list:
+    """Gera clientes sintéticos com IDs sequenciais."""
+    senha = hashlib.sha256(b"benchmark").hexdigest()
+    return [Cliente(i, f"Cliente {i}", f"cliente{i}@email.com", senha,
+                    1000.0 + i, "Doce e Suave") for i in range(quantidade)]
+
+
+def medir_modo(modo: str, clientes: list, adiada: bool = False) -> dict:
+    """
+    Executa o cenário completo para um modo em um diretório temporário e
+    retorna os tempos medidos em milissegundos.
+    """
+    configuracao.MODO_PADRAO = modo
+    configuracao.ESCRITA_ADIADA = adiada
+    configuracao.MODOS_POR_ARQUIVO.pop('clientes.pkl', None)
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        try:
+            dao = ClienteDAO()
+            with dao.batch():
+                for cliente in clientes:
+                    dao.add(cliente)
+            gerenciador_escrita_adiada.descarregar_todos()
+
+            inicio = time.perf_counter()
+            dao = ClienteDAO()
+            tempo_carga = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            for i in range(OPERACOES_MEDIDAS):
+                cliente = dao.get(i % len(clientes))
+                cliente.saldo = cliente.saldo + 1
+                dao.update(cliente)
+            tempo_update = (time.perf_counter() - inicio) / OPERACOES_MEDIDAS
+
+            senha = hashlib.sha256(b"benchmark").hexdigest()
+            inicio = time.perf_counter()
+            for i in range(OPERACOES_MEDIDAS):
+                id_novo = len(clientes) + i
+                dao.add(Cliente(id_novo, f"Novo {id_novo}", "novo@email.com",
+                                senha, 0.0, "Doce e Suave"))
+            tempo_add = (time.perf_counter() - inicio) / OPERACOES_MEDIDAS
+            gerenciador_escrita_adiada.descarregar_todos()
+        finally:
+            os.chdir(diretorio_original)
+
+    return {
+        "carga": tempo_carga * 1000,
+        "update": tempo_update * 1000,
+        "add": tempo_add * 1000,
+    }
+
+
+def main():
+    """Executa o benchmark para todos os modos e exibe a tabela de resultados."""
+    os.environ.pop(configuracao.VARIAVEL_AMBIENTE_MODO, None)
+    os.environ.pop(configuracao.VARIAVEL_AMBIENTE_ESCRITA_ADIADA, None)
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    clientes = criar_clientes(quantidade)
+
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK DE PERSISTÊNCIA ({quantidade} registros)")
+    print("=" * 60)
+    print(f"{'Modo':<17} | {'Carga (ms)':>10} | {'Update (ms)':>11} | {'Add (ms)':>10}")
+    print("-" * 60)
+    for adiada in (False, True):
+        for modo in MODOS:
+            resultado = medir_modo(modo, clientes, adiada)
+            rotulo = f"{modo} (adiada)" if adiada else modo
+            print(f"{rotulo:<17} | {resultado['carga']:>10.2f} | "
+                  f"{resultado['update']:>11.3f} | {resultado['add']:>10.3f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark das agregações usadas pelos relatórios de vendas.
+
+Gera um histórico sintético de vendas finalizadas (por padrão 1.000.000 de
+linhas de carrinho) e compara o cálculo dos agregados dos relatórios
+(faturamento, unidades por café e por máquina, unidades por fornecedor e
+gasto por cliente) feito de três formas:
+- 'laço em objetos': uma passada pelos objetos Venda, com dicionários
+  (agregar_vendas)
+- 'tabela (laço)': a tabela de fatos colunar consultada sem NumPy
+- 'tabela (NumPy)': a tabela de fatos com group-bys vetorizados
+
+Também é medido o tempo de montagem da tabela de fatos, e os resultados das
+três formas são comparados entre si.
+
+Nenhum arquivo é gravado. Execute com: python benchmark_relatorios.py [linhas]
+"""
+
+import datetime
+import hashlib
+import random
+import sys
+import time
+
+from controle.agregadorVendas import agregar_vendas
+from controle.tabelaFatosVendas import NUMPY_DISPONIVEL, TabelaFatosVendas
+from entidade.cafe import Cafe
+from entidade.cliente import Cliente
+from entidade.fornecedora_cafe import FornecedoraCafe
+from entidade.fornecedora_maquina import FornecedoraMaquina
+from entidade.maquina_de_cafe import MaquinaDeCafe
+from entidade.venda import Venda
+
+
+CAFES = 400
+MAQUINAS = 100
+FORNECEDORES = 20
+CLIENTES = 5000
+LINHAS_POR_VENDA = 4
+
+
+def criar_historico(linhas: int) -> list:
+    """Gera vendas finalizadas sintéticas com LINHAS_POR_VENDA itens cada."""
+    aleatorio = random.Random(42)
+    fornecedoras_cafe = [FornecedoraCafe(f"Fornecedora Café {i}", f"{i:014d}", "Rua A, 1",
+                                         "48999990000", "Arábica") for i in range(FORNECEDORES)]
+    fornecedoras_maquina = [FornecedoraMaquina(f"Fornecedora Máquina {i}", f"{i + 100:014d}",
+                                               "Rua B, 2", "48999990001", "Itália")
+                            for i in range(FORNECEDORES)]
+    produtos = [Cafe(f"Café {i}", 5.0, 10.0 + i % 9, i, "01/01/2025", "Brasil", "Bourbon",
+                     1000, "Média", "Doce", "Doce e Suave", fornecedoras_cafe[i % FORNECEDORES])
+                for i in range(CAFES)]
+    produtos += [MaquinaDeCafe(f"Máquina {i}", 300.0, 500.0 + i, CAFES + i, "01/01/2025",
+                               fornecedoras_maquina[i % FORNECEDORES])
+                 for i in range(MAQUINAS)]
+    senha = hashlib.sha256(b"benchmark").hexdigest()
+    clientes = [Cliente(i, f"Cliente {i}", f"cliente{i}@email.com", senha, 0.0, "Doce e Suave")
+                for i in range(CLIENTES)]
+
+    inicio = datetime.datetime(2024, 1, 1)
+    vendas = []
+    for id_venda in range(linhas // LINHAS_POR_VENDA):
+        carrinho = {produto: aleatorio.randint(1, 5)
+                    for produto in aleatorio.sample(produtos, LINHAS_POR_VENDA)}
+        valor_total = sum(produto.preco_venda * quantidade for produto, quantidade in carrinho.items())
+        venda = Venda(id_venda, aleatorio.choice(clientes))
+        venda.restaurar_estado(carrinho, valor_total, "Finalizada",
+                               inicio + datetime.timedelta(minutes=id_venda))
+        vendas.append(venda)
+    return vendas
+
+
+def medir(funcao):
+    """Executa a função e retorna (resultado, segundos)."""
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+
+def resumo(agregados) -> tuple:
+    """Resumo comparável dos agregados (gastos arredondados a centavos)."""
+    return (round(agregados.receita_total, 2), agregados.quantidade_vendas,
+            agregados.unidades_por_cafe, agregados.unidades_por_maquina,
+            agregados.unidades_por_fornecedor,
+            {cliente: round(gasto, 2) for cliente, gasto in agregados.gasto_por_cliente.items()})
+
+
+def main():
+    """Gera o histórico, mede as três formas e exibe a comparação."""
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    vendas = criar_historico(linhas)
+
+    tabela_laco, tempo_montagem = medir(lambda: TabelaFatosVendas.de_vendas(vendas, usar_numpy=False))
+    medicoes = [("laço em objetos", *medir(lambda: agregar_vendas(vendas))),
+                ("tabela (laço)", *medir(tabela_laco.agregar))]
+    if NUMPY_DISPONIVEL:
+        tabela_numpy = TabelaFatosVendas.de_vendas(vendas, usar_numpy=True)
+        medicoes.append(("tabela (NumPy)", *medir(tabela_numpy.agregar)))
+
+    referencia = resumo(medicoes[0][1])
+    base = medicoes[0][2]
+    print("\n" + "=" * 64)
+    print(f"AGREGAÇÃO DOS RELATÓRIOS ({len(tabela_laco)} linhas, {len(vendas)} vendas)")
+    print("=" * 64)
+    print(f"Montagem da tabela de fatos: {tempo_montagem * 1000:.0f} ms")
+    print("-" * 64)
+    print(f"{'Forma':<18} | {'Tempo (ms)':>10} | {'Aceleração':>10} | {'Resultado':>10}")
+    print("-" * 64)
+    for rotulo, agregados, duracao in medicoes:
+        confere = "OK" if resumo(agregados) == referencia else "DIVERGE"
+        print(f"{rotulo:<18} | {duracao * 1000:>10.1f} | {base / duracao:>9.1f}x | {confere:>10}")
+    if not NUMPY_DISPONIVEL:
+        print("(NumPy não instalado: forma vetorizada não medida)")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
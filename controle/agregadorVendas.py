@@ -0,0 +1,157 @@
+"""
+    Motor de agregação das vendas finalizadas usado pelos relatórios.
+
+    Em vez de cada relatório filtrar as vendas e percorrer todos os carrinhos
+    por conta própria, os agregados de todas as vendas finalizadas são
+    mantidos juntos:
+    - faturamento total e quantidade de vendas
+    - unidades vendidas por café e por máquina
+    - unidades vendidas por fornecedor (cafés e máquinas)
+    - valor gasto por cliente
+
+    Os agregados são indexados por IDs (produtos e clientes) e por CNPJ
+    (fornecedores), acompanhados dos nomes vistos nas vendas, de modo que os
+    relatórios se tornam apenas formatadores sobre o resultado, com custo
+    proporcional ao número de chaves distintas e não ao de vendas. Produtos
+    excluídos do catálogo depois da venda continuam contados, pelo tipo e
+    fornecedor registrados na venda.
+
+    Eles são atualizados incrementalmente a cada venda finalizada
+    (`registrar_venda`), exportados como estruturas simples para
+    persistência e podem ser reconstruídos do histórico em uma única
+    passada (`agregar_vendas`).
+    """
+
+from typing import Dict, Iterable
+
+from entidade.produto_removido import ProdutoRemovido
+from entidade.venda import Venda
+
+
+class AgregadosVendas:
+    def __init__(self) -> None:
+        """
+        Inicializa agregados vazios, prontos para receber vendas
+        finalizadas através de `registrar_venda`.
+        """
+        self.__receita_total = 0.0
+        self.__quantidade_vendas = 0
+        self.__unidades_por_cafe: Dict[int, int] = {}
+        self.__unidades_por_maquina: Dict[int, int] = {}
+        self.__unidades_por_fornecedor: Dict[str, int] = {}
+        self.__gasto_por_cliente: Dict[int, float] = {}
+        self.__nomes_produtos: Dict[int, str] = {}
+        self.__nomes_fornecedores: Dict[str, str] = {}
+
+    def registrar_venda(self, venda: Venda) -> None:
+        """
+        Acrescenta uma venda finalizada a todos os agregados, percorrendo
+        seu carrinho uma única vez.
+        """
+        self.__receita_total += venda.valor_total
+        self.__quantidade_vendas += 1
+        id_cliente = venda.cliente.id
+        self.__gasto_por_cliente[id_cliente] = (
+            self.__gasto_por_cliente.get(id_cliente, 0) + venda.valor_total)
+
+        for produto, quantidade in venda.carrinho.items():
+            tipo, fornecedor = ProdutoRemovido.classificar(produto)
+            if tipo == ProdutoRemovido.TIPO_CAFE:
+                unidades = self.__unidades_por_cafe
+            elif tipo == ProdutoRemovido.TIPO_MAQUINA:
+                unidades = self.__unidades_por_maquina
+            else:
+                # Vendas antigas não registravam o tipo de produtos excluídos
+                continue
+            unidades[produto.id] = unidades.get(produto.id, 0) + quantidade
+            self.__nomes_produtos[produto.id] = produto.nome
+
+            if fornecedor is not None:
+                cnpj, nome_fornecedor = fornecedor
+                self.__unidades_por_fornecedor[cnpj] = (
+                    self.__unidades_por_fornecedor.get(cnpj, 0) + quantidade)
+                self.__nomes_fornecedores[cnpj] = nome_fornecedor
+
+    @property
+    def receita_total(self) -> float:
+        return self.__receita_total
+
+    @property
+    def quantidade_vendas(self) -> int:
+        return self.__quantidade_vendas
+
+    @property
+    def unidades_por_cafe(self) -> Dict[int, int]:
+        return self.__unidades_por_cafe
+
+    @property
+    def unidades_por_maquina(self) -> Dict[int, int]:
+        return self.__unidades_por_maquina
+
+    @property
+    def unidades_por_fornecedor(self) -> Dict[str, int]:
+        """
+        Unidades vendidas indexadas pelo CNPJ do fornecedor.
+        """
+        return self.__unidades_por_fornecedor
+
+    @property
+    def gasto_por_cliente(self) -> Dict[int, float]:
+        return self.__gasto_por_cliente
+
+    def nome_produto(self, id_produto: int) -> str:
+        return self.__nomes_produtos.get(id_produto, f"ID {id_produto}")
+
+    def nome_fornecedor(self, cnpj: str) -> str:
+        return self.__nomes_fornecedores.get(cnpj, cnpj)
+
+    def exportar(self) -> dict:
+        """
+        Exporta os agregados como estruturas simples (números, strings e
+        dicionários), prontas para serialização.
+        """
+        return {
+            'receita_total': self.__receita_total,
+            'quantidade_vendas': self.__quantidade_vendas,
+            'unidades_por_cafe': dict(self.__unidades_por_cafe),
+            'unidades_por_maquina': dict(self.__unidades_por_maquina),
+            'unidades_por_fornecedor': dict(self.__unidades_por_fornecedor),
+            'gasto_por_cliente': dict(self.__gasto_por_cliente),
+            'nomes_produtos': dict(self.__nomes_produtos),
+            'nomes_fornecedores': dict(self.__nomes_fornecedores),
+        }
+
+    def restaurar(self, estado: dict) -> None:
+        """
+        Substitui o conteúdo destes agregados por um estado gerado por
+        `exportar`, mantendo o mesmo objeto. Usado para desfazer
+        `registrar_venda` quando a gravação da venda é desfeita.
+        """
+        self.__receita_total = estado['receita_total']
+        self.__quantidade_vendas = estado['quantidade_vendas']
+        self.__unidades_por_cafe = dict(estado['unidades_por_cafe'])
+        self.__unidades_por_maquina = dict(estado['unidades_por_maquina'])
+        self.__unidades_por_fornecedor = dict(estado['unidades_por_fornecedor'])
+        self.__gasto_por_cliente = dict(estado['gasto_por_cliente'])
+        self.__nomes_produtos = dict(estado['nomes_produtos'])
+        self.__nomes_fornecedores = dict(estado['nomes_fornecedores'])
+
+    @classmethod
+    def de_estado(cls, estado: dict) -> "AgregadosVendas":
+        """
+        Reconstrói os agregados a partir de um estado gerado por `exportar`.
+        """
+        agregados = cls()
+        agregados.restaurar(estado)
+        return agregados
+
+def agregar_vendas(vendas: Iterable[Venda]) -> AgregadosVendas:
+    """
+    Calcula os agregados de todas as vendas informadas em uma única
+    passada. Vendas que não estejam finalizadas são ignoradas.
+    """
+    agregados = AgregadosVendas()
+    for venda in vendas:
+        if venda.status_venda == "Finalizada":
+            agregados.registrar_venda(venda)
+    return agregados
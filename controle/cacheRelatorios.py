@@ -0,0 +1,70 @@
+"""
+    Cache dos resultados dos relatórios, invalidado pelas versões dos DAOs.
+
+    Cada resultado (título, linhas e arquivo .txt gerado) é guardado junto
+    com as versões (`DAO.versao`) dos DAOs de que o relatório depende, no
+    momento em que foi calculado. Uma consulta só é atendida pelo cache se
+    todas essas versões continuarem iguais; qualquer alteração em um desses
+    DAOs invalida exatamente os relatórios que dependem dele, sem afetar os
+    demais.
+
+    As versões devem ser lidas antes de calcular o relatório: se os dados
+    mudarem durante o cálculo, o resultado fica associado às versões antigas
+    e é recalculado na consulta seguinte.
+
+    O número de entradas é limitado (as menos usadas recentemente saem
+    primeiro), já que cada combinação de período e limite gera uma entrada.
+    """
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+
+# (título, linhas, caminho do .txt gerado ou "" se a gravação falhou)
+ResultadoRelatorio = Tuple[str, List[str], str]
+
+
+class CacheRelatorios:
+    MAXIMO_ENTRADAS_PADRAO = 32
+
+    def __init__(self, maximo_entradas: int = MAXIMO_ENTRADAS_PADRAO) -> None:
+        """
+        Inicializa o cache vazio, com no máximo `maximo_entradas` resultados.
+        """
+        self.__maximo_entradas = maximo_entradas
+        self.__entradas: "OrderedDict[Hashable, Tuple[tuple, ResultadoRelatorio]]" = OrderedDict()
+        self.__trava = threading.Lock()
+
+    def obter(self, chave: Hashable, versoes: tuple) -> Optional[ResultadoRelatorio]:
+        """
+        Retorna o resultado guardado para a chave se ele foi calculado com as
+        mesmas versões informadas; caso contrário, descarta-o e retorna None.
+        """
+        with self.__trava:
+            entrada = self.__entradas.get(chave)
+            if entrada is None:
+                return None
+            versoes_guardadas, resultado = entrada
+            if versoes_guardadas != versoes:
+                del self.__entradas[chave]
+                return None
+            self.__entradas.move_to_end(chave)
+            return resultado
+
+    def guardar(self, chave: Hashable, versoes: tuple, resultado: ResultadoRelatorio) -> None:
+        """
+        Guarda o resultado calculado com as versões informadas, removendo a
+        entrada usada há mais tempo se o limite for ultrapassado.
+        """
+        with self.__trava:
+            self.__entradas[chave] = (versoes, resultado)
+            self.__entradas.move_to_end(chave)
+            while len(self.__entradas) > self.__maximo_entradas:
+                self.__entradas.popitem(last=False)
+
+    def limpar(self) -> None:
+        with self.__trava:
+            self.__entradas.clear()
+
+    def __len__(self) -> int:
+        return len(self.__entradas)
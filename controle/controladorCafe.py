@@ -15,6 +15,8 @@
     Além das operações padrão, implementa a funcionalidade `buscar_cafes_por_perfil`,
     essencial para a lógica de recomendação a clientes."""
 
+from typing import Optional
+
 from Excecoes.fornecedorNaoEncontradoException import FornecedorNaoEncontradoException
 from controle.buscaProdutoMixin import BuscaProdutoMixin
 from entidade.perfil_consumidor import PerfilConsumidor
@@ -27,15 +29,16 @@ from DAOs.cafe_dao import CafeDAO
 
 
 class ControladorCafe(BuscaProdutoMixin):
-    def __init__(self, controlador_sistema) -> None:
+    def __init__(self, controlador_sistema, cafe_dao: Optional[CafeDAO] = None) -> None:
         """
         Inicializa o controlador de cafés, recebendo referência ao controlador
         sistema para acesso a outros módulos. Cria instâncias da tela e do DAO
-        necessários para operações de interface e persistência.
+        necessários para operações de interface e persistência; o DAO pode
+        ser fornecido já carregado (ver DAOs/carregador_paralelo.py).
         """
         self._controlador_sistema = controlador_sistema
         self.__tela_cafe = TelaCafe()
-        self.__cafe_dao = CafeDAO()
+        self.__cafe_dao = cafe_dao if cafe_dao is not None else CafeDAO()
 
     @property
     def cafes(self) -> list:
@@ -139,13 +142,17 @@ class ControladorCafe(BuscaProdutoMixin):
         Busca todos os cafés que correspondem ao perfil de consumidor fornecido.
         Usado pelo ControladorCliente para gerar recomendações personalizadas
         baseadas no perfil do cliente. Retorna lista vazia se nenhum café
-        corresponder ao perfil.
+        corresponder ao perfil. Consulta o índice por perfil do DAO.
         """
-        cafes_encontrados = []
-        for cafe in self.cafes:
-            if cafe.perfil_recomendado.perfil == perfil:
-                cafes_encontrados.append(cafe)
-        return cafes_encontrados
+        return self.__cafe_dao.find_by('perfil', perfil)
+
+    def cafes_do_fornecedor(self, cnpj: str) -> list:
+        """
+        Retorna os cafés fornecidos pela empresa com o CNPJ informado,
+        consultando o índice por fornecedor do DAO. Usado para impedir a
+        exclusão de fornecedores que ainda possuem cafés cadastrados.
+        """
+        return self.__cafe_dao.find_by('fornecedor', cnpj)
 
     def lista_cafe(self) -> None:
         """
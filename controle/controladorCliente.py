@@ -19,6 +19,8 @@
     """
 
 import hashlib
+from typing import Dict, Iterable, Optional
+
 from entidade.perfil_consumidor import PerfilConsumidor
 from limite.telaCliente import TelaCliente
 from entidade.cliente import Cliente
@@ -28,10 +30,14 @@ from DAOs.cliente_dao import ClienteDAO
 
 
 class ControladorCliente:
-    def __init__(self, controlador_sistema) -> None:
+    def __init__(self, controlador_sistema, cliente_dao: Optional[ClienteDAO] = None) -> None:
         self.__controlador_sistema = controlador_sistema
         self.__tela_cliente = TelaCliente()
-        self.__cliente_dao = ClienteDAO()
+        self.__cliente_dao = cliente_dao if cliente_dao is not None else ClienteDAO()
+
+    @property
+    def cliente_dao(self) -> ClienteDAO:
+        return self.__cliente_dao
 
     @property
     def clientes(self) -> list:
@@ -54,6 +60,19 @@ class ControladorCliente:
             raise ClienteNaoEncontradoException()
         return cliente
 
+    def pega_clientes_por_ids(self, ids: Iterable[int]) -> Dict[int, Optional[Cliente]]:
+        """
+        Recupera vários clientes pelos IDs em uma única consulta ao DAO.
+        Retorna {id: cliente}, com None para os IDs não encontrados (ex:
+        clientes excluídos), sem lançar exceção. Usado por quem cruza muitas
+        vendas com seus clientes (ex: relatórios). Lança TypeError se algum
+        ID não for inteiro.
+        """
+        ids = list(ids)
+        if not all(isinstance(id, int) for id in ids):
+            raise TypeError("O ID do cliente deve ser um número inteiro.")
+        return self.__cliente_dao.get_many(ids)
+
     def incluir_cliente(self) -> None:
         """
         Processa o cadastro de um novo cliente. Coleta dados do usuário através
@@ -180,10 +199,9 @@ class ControladorCliente:
                 "Senha incorreta! Exclusão cancelada.")
             return
 
-        vendas_com_cliente = []
-        for venda in self.__controlador_sistema.controlador_venda.vendas:
-            if venda.cliente == cliente and venda.status_venda == "Em andamento":
-                vendas_com_cliente.append(venda)
+        vendas_com_cliente = [
+            venda for venda in self.__controlador_sistema.controlador_venda.vendas_do_cliente(cliente.id)
+            if venda.status_venda != "Finalizada"]
 
         if vendas_com_cliente:
             self.__tela_cliente.mostra_mensagem(
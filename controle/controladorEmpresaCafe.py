@@ -11,6 +11,8 @@
     """
 
 
+from typing import Optional
+
 from controle.buscaProdutoMixin import BuscaProdutoMixin
 from limite.telaEmpresaCafe import TelaEmpresaCafe
 from entidade.fornecedora_cafe import FornecedoraCafe
@@ -19,13 +21,15 @@ from DAOs.fornecedora_cafe_dao import FornecedoraCafeDAO
 
 
 class ControladorEmpresaCafe(BuscaProdutoMixin):
-    def __init__(self, controlador_sistema):
+    def __init__(self, controlador_sistema,
+                 fornecedores_dao: Optional[FornecedoraCafeDAO] = None):
         self._controlador_sistema = controlador_sistema
-        self.__fornecedores_cafe = FornecedoraCafeDAO()
+        self.__fornecedores_cafe = (fornecedores_dao if fornecedores_dao is not None
+                                    else FornecedoraCafeDAO())
         self.__tela_empresa_cafe = TelaEmpresaCafe()
 
     def tem_empresas(self) -> bool:
-        return len(list(self.__fornecedores_cafe.get_all())) > 0
+        return self.__fornecedores_cafe.quantidade() > 0
 
     def pega_fornecedor_por_cnpj(self, cnpj: str) -> FornecedoraCafe:
         """
@@ -136,10 +140,8 @@ class ControladorEmpresaCafe(BuscaProdutoMixin):
         fornecedor = self.pega_fornecedor_por_cnpj(cnpj_fornecedor)
 
         # Verifica se existe algum café usando este fornecedor
-        cafes_usando_fornecedor = []
-        for cafe in self._controlador_sistema.controlador_cafe.cafes:
-            if cafe.empresa_fornecedora == fornecedor:
-                cafes_usando_fornecedor.append(cafe)
+        cafes_usando_fornecedor = self._controlador_sistema.controlador_cafe.cafes_do_fornecedor(
+            fornecedor.cnpj)
 
         if cafes_usando_fornecedor:
             self.__tela_empresa_cafe.mostra_mensagem(
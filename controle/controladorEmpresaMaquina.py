@@ -12,6 +12,8 @@
     """
 
 
+from typing import Optional
+
 from controle.buscaProdutoMixin import BuscaProdutoMixin
 from limite.telaEmpresaMaquina import TelaEmpresaMaquina
 from entidade.fornecedora_maquina import FornecedoraMaquina
@@ -20,13 +22,15 @@ from DAOs.fornecedora_maquina_dao import FornecedoraMaquinaDAO
 
 
 class ControladorEmpresaMaquina(BuscaProdutoMixin):
-    def __init__(self, controlador_sistema):
+    def __init__(self, controlador_sistema,
+                 fornecedores_dao: Optional[FornecedoraMaquinaDAO] = None):
         self._controlador_sistema = controlador_sistema
-        self.__fornecedores_maquina = FornecedoraMaquinaDAO()
+        self.__fornecedores_maquina = (fornecedores_dao if fornecedores_dao is not None
+                                       else FornecedoraMaquinaDAO())
         self.__tela_empresa_maquina = TelaEmpresaMaquina()
 
     def tem_empresas(self) -> bool:
-        return len(list(self.__fornecedores_maquina.get_all())) > 0
+        return self.__fornecedores_maquina.quantidade() > 0
 
     def pega_fornecedor_por_cnpj(self, cnpj: str) -> FornecedoraMaquina:
         """
@@ -140,10 +144,8 @@ class ControladorEmpresaMaquina(BuscaProdutoMixin):
         fornecedor = self.pega_fornecedor_por_cnpj(cnpj_fornecedor)
 
         # Verifica se existe alguma máquina usando este fornecedor
-        maquinas_usando_fornecedor = []
-        for maquina in self._controlador_sistema.controlador_maquina_de_cafe.maquinas:
-            if maquina.empresa_fornecedora == fornecedor:
-                maquinas_usando_fornecedor.append(maquina)
+        maquinas_usando_fornecedor = self._controlador_sistema.controlador_maquina_de_cafe.maquinas_do_fornecedor(
+            fornecedor.cnpj)
 
         if maquinas_usando_fornecedor:
             self.__tela_empresa_maquina.mostra_mensagem(
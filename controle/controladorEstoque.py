@@ -10,37 +10,73 @@
     capacidade de localizar qualquer produto (seja um `Cafe` ou uma
     `MaquinaDeCafe`) em todo o sistema pelo seu ID, permitindo uma
     integração coesa entre os diferentes módulos de produtos.
+
+    Também recebe os alertas de estoque baixo do `Estoque`, emitidos quando
+    uma retirada (venda ou baixa manual) leva um produto ao seu limite de
+    reposição. Como o aviso chega durante a retirada (possivelmente dentro
+    da unidade de trabalho de uma venda e em outra thread), o alerta é
+    apenas registrado no log e enfileirado; a fila é exibida ao usuário
+    por `mostrar_alertas_pendentes`, chamado pelos menus depois que a
+    operação termina.
     """
 
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
 from controle.buscaProdutoMixin import BuscaProdutoMixin
 from limite.telaEstoque import TelaEstoque
 from entidade.estoque import Estoque
+from entidade.produto import Produto
 from Excecoes.produtoNaoEncontradoException import ProdutoNaoEncontradoException
 from Excecoes.produtoNaoEmEstoqueException import ProdutoNaoEmEstoqueException
 from Excecoes.estoqueInsuficienteException import EstoqueInsuficienteException
 from DAOs.estoque_dao import EstoqueDAO
 
 
+logger = logging.getLogger(__name__)
+
 class ControladorEstoque(BuscaProdutoMixin):
-    def __init__(self, controlador_sistema) -> None:
+    def __init__(self, controlador_sistema, estoque_dao: Optional[EstoqueDAO] = None) -> None:
         self._controlador_sistema = controlador_sistema
-        self.__estoque = Estoque()
-        self.__estoque_dao = EstoqueDAO()
+        self.__estoque = Estoque(self.__resolver_produto)
+        self.__estoque_dao = estoque_dao if estoque_dao is not None else EstoqueDAO()
         self.__tela_estoque = TelaEstoque()
+        self.__versao_encomendas_gravada = None
+        self.__versao_limites_gravada = None
+        self.__alertas_pendentes: Deque[str] = deque()  # Aguardando exibição
         self.__carregar_do_dao()
         self.__estoque.definir_callback_alteracao(self.__persistir_estado)
+        self.__estoque.definir_callback_estoque_baixo(self.__alertar_estoque_baixo)
 
     @property
     def estoque(self) -> Estoque:
         return self.__estoque
 
+    @property
+    def estoque_dao(self) -> EstoqueDAO:
+        return self.__estoque_dao
+
     @property
     def produtos_em_estoque(self) -> dict:
         return self.__estoque.produtos_em_estoque
 
+    @property
+    def produtos_com_estoque_baixo(self) -> Dict[Produto, Tuple[int, int]]:
+        return self.__estoque.produtos_com_estoque_baixo()
+
     def tem_produtos_em_estoque(self) -> bool:
         return sum(self.__estoque.produtos_em_estoque.values()) > 0
 
+    def mostrar_alertas_pendentes(self) -> None:
+        """
+        Exibe ao usuário os alertas de estoque baixo enfileirados desde a
+        última exibição. Deve ser chamado pela thread da interface, depois
+        que a operação que gerou os alertas terminou.
+        """
+        while self.__alertas_pendentes:
+            self.__tela_estoque.mostra_mensagem(self.__alertas_pendentes.popleft())
+
     def listar_estoque(self) -> None:
         """
         Exibe inventário completo do estoque. Extrai informações de cada
@@ -79,17 +115,19 @@ class ControladorEstoque(BuscaProdutoMixin):
             self.__tela_estoque.mostra_mensagem(
                 "Use a opção 'Repor Estoque' para adicionar mais unidades.")
         else:
-            self.__estoque.cadastrar_novo_produto(
+            atendidas = self.__estoque.cadastrar_novo_produto(
                 produto, dados_produto["quantidade"])
             self.__tela_estoque.mostra_mensagem(
                 f"'{produto.nome}' adicionado ao estoque com sucesso!")
+            self.__informar_encomendas_atendidas(atendidas)
 
     def repor_estoque(self) -> None:
         """
         Adiciona quantidade a um produto já existente no estoque. Lista
         estoque primeiro para facilitar seleção, valida que produto está
-        cadastrado e incrementa quantidade. Persistência ocorre via callback
-        automático após alteração.
+        cadastrado e incrementa quantidade. As novas unidades atendem
+        primeiro as encomendas que aguardam o produto. Persistência ocorre
+        via callback automático após alteração.
         """
         self.listar_estoque()
         dados_produto = self.__tela_estoque.pega_dados_produto_estoque()
@@ -98,10 +136,11 @@ class ControladorEstoque(BuscaProdutoMixin):
         produto = self.pega_produto_por_id(dados_produto["id_produto"])
 
         if self.__estoque.produto_ja_existe(produto):
-            self.__estoque.adicionar_quantidade(
+            atendidas = self.__estoque.adicionar_quantidade(
                 produto, dados_produto["quantidade"])
             self.__tela_estoque.mostra_mensagem(
                 f"Estoque de '{produto.nome}' atualizado.")
+            self.__informar_encomendas_atendidas(atendidas)
         else:
             self.__tela_estoque.mostra_mensagem(
                 f"ERRO: '{produto.nome}' não está no estoque.")
@@ -124,6 +163,23 @@ class ControladorEstoque(BuscaProdutoMixin):
         self.__tela_estoque.mostra_mensagem(
             "Baixa de estoque realizada com sucesso.")
 
+    def definir_limite_reposicao(self) -> None:
+        """
+        Define o limite de reposição de um produto: com essa quantidade ou
+        menos, ele aparece no relatório de estoque baixo e suas retiradas
+        geram alerta. O produto não precisa estar em estoque no momento.
+        Persistência via callback automático.
+        """
+        dados_produto = self.__tela_estoque.pega_dados_produto_estoque(
+            rotulo_quantidade='Limite de Reposição:')
+        if not dados_produto:
+            return
+        produto = self.pega_produto_por_id(dados_produto["id_produto"])
+        self.__estoque.definir_limite_reposicao(produto.id, dados_produto["quantidade"])
+        self.__tela_estoque.mostra_mensagem(
+            f"Limite de reposição de '{produto.nome}' definido em "
+            f"{dados_produto['quantidade']} unidades.")
+
     def retornar(self) -> None:
         """
         Retorna ao menu principal do sistema, delegando navegação para o
@@ -144,6 +200,7 @@ class ControladorEstoque(BuscaProdutoMixin):
             2: self.adicionar_novo_produto,
             3: self.repor_estoque,
             4: self.baixar_estoque,
+            5: self.definir_limite_reposicao,
             0: self.retornar
         }
         while True:
@@ -163,6 +220,7 @@ class ControladorEstoque(BuscaProdutoMixin):
             except (ProdutoNaoEncontradoException, ProdutoNaoEmEstoqueException,
                     EstoqueInsuficienteException) as e:
                 self.__tela_estoque.mostra_mensagem(f"ERRO: {e}")
+            self.mostrar_alertas_pendentes()
 
     def __carregar_do_dao(self) -> None:
         """
@@ -172,16 +230,74 @@ class ControladorEstoque(BuscaProdutoMixin):
         existem mais (foram excluídos), mantendo consistência. Persiste
         estado após carregamento para sincronizar arquivo.
         """
-        dados_estoque = self.__estoque_dao.carregar()
-        for id_produto, quantidade in dados_estoque.items():
-            try:
-                produto = self.pega_produto_por_id(id_produto)
-                self.__estoque.cadastrar_novo_produto(produto, quantidade)
-            except ProdutoNaoEncontradoException:
+        ids, quantidades = self.__estoque_dao.carregar_buffers()
+        produtos = {}
+        for id_produto in ids:
+            if id_produto == Estoque.SLOT_LIVRE:
                 continue
-        self.__persistir_estado(self.__estoque.produtos_em_estoque)
+            produto = self.__resolver_produto(id_produto)
+            if produto is not None:
+                produtos[id_produto] = produto
+        self.__estoque.restaurar(ids, quantidades, produtos)
+        self.__estoque.restaurar_encomendas(self.__estoque_dao.carregar_encomendas())
+        self.__estoque.restaurar_limites(self.__estoque_dao.carregar_limites())
+        self.__persistir_estado(self.__estoque)
+
+    def __persistir_estado(self, estoque: Estoque) -> None:
+        """
+        Grava os buffers brutos do estoque, sem conversão para dicionário,
+        e o estado das encomendas e os limites de reposição quando mudaram
+        desde a última gravação. As versões só são marcadas como gravadas
+        depois que o lote mais externo do DAO (ex: a unidade de trabalho de
+        uma venda) grava com sucesso; se ele for desfeito, o estado volta a
+        ser gravado na próxima alteração.
+        """
+        with self.__estoque_dao.batch():
+            versao_encomendas = estoque.versao_encomendas
+            versao_limites = estoque.versao_limites
+            self.__estoque_dao.salvar_buffers(*estoque.exportar_buffers())
+            if versao_encomendas != self.__versao_encomendas_gravada:
+                self.__estoque_dao.salvar_encomendas(estoque.exportar_encomendas())
+                self.__estoque_dao.ao_confirmar(
+                    lambda: self.__marcar_encomendas_gravadas(versao_encomendas))
+            if versao_limites != self.__versao_limites_gravada:
+                self.__estoque_dao.salvar_limites(estoque.exportar_limites())
+                self.__estoque_dao.ao_confirmar(
+                    lambda: self.__marcar_limites_gravados(versao_limites))
+
+    def __marcar_encomendas_gravadas(self, versao: int) -> None:
+        self.__versao_encomendas_gravada = versao
+
+    def __marcar_limites_gravados(self, versao: int) -> None:
+        self.__versao_limites_gravada = versao
 
-    def __persistir_estado(self, produtos: dict) -> None:
-        mapa_produtos_por_id = {
-            produto.id: quantidade for produto, quantidade in produtos.items()}
-        self.__estoque_dao.salvar(mapa_produtos_por_id)
+    def __alertar_estoque_baixo(self, id_produto: int, quantidade: int, limite: int) -> None:
+        """
+        Recebe do estoque o aviso de que uma retirada levou o produto ao
+        limite de reposição, registrando-o no log e enfileirando-o para
+        exibição. Nada é exibido aqui: o aviso pode chegar no meio da
+        gravação de uma venda e fora da thread da interface.
+        """
+        produto = self.__resolver_produto(id_produto)
+        nome = produto.nome if produto is not None else f"ID {id_produto}"
+        logger.warning("Estoque baixo: %s (ID %s) com %s unidade(s), limite %s",
+                       nome, id_produto, quantidade, limite)
+        self.__alertas_pendentes.append(
+            f"ALERTA: estoque de '{nome}' chegou a {quantidade} unidade(s) "
+            f"(limite de reposição: {limite}).")
+
+    def __informar_encomendas_atendidas(self, atendidas: list) -> None:
+        if atendidas:
+            self.__tela_estoque.mostra_mensagem(
+                f"{len(atendidas)} encomenda(s) atendida(s) com a reposição: "
+                + ", ".join(str(id_venda) for id_venda in atendidas))
+
+    def __resolver_produto(self, id_produto: int) -> Optional[Produto]:
+        """
+        Resolve um ID de produto para exibição, retornando None se o produto
+        não existir mais.
+        """
+        try:
+            return self.pega_produto_por_id(id_produto)
+        except ProdutoNaoEncontradoException:
+            return None
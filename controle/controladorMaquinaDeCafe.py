@@ -11,6 +11,8 @@
     """
 
 
+from typing import Optional
+
 from Excecoes.fornecedorNaoEncontradoException import FornecedorNaoEncontradoException
 from controle.buscaProdutoMixin import BuscaProdutoMixin
 from limite.telaMaquinaDeCafe import TelaMaquinaCafe
@@ -20,15 +22,23 @@ from DAOs.maquina_de_cafe_dao import MaquinaDeCafeDAO
 
 
 class ControladorMaquinaDeCafe(BuscaProdutoMixin):
-    def __init__(self, controlador_sistema) -> None:
+    def __init__(self, controlador_sistema,
+                 maquina_dao: Optional[MaquinaDeCafeDAO] = None) -> None:
         self._controlador_sistema = controlador_sistema
         self.__tela_maquina = TelaMaquinaCafe()
-        self.__maquina_dao = MaquinaDeCafeDAO()
+        self.__maquina_dao = maquina_dao if maquina_dao is not None else MaquinaDeCafeDAO()
 
     @property
     def maquinas(self) -> list:
         return list(self.__maquina_dao.get_all())
 
+    def maquinas_do_fornecedor(self, cnpj: str) -> list:
+        """
+        Retorna as máquinas fornecidas pela empresa com o CNPJ informado,
+        consultando o índice por fornecedor do DAO.
+        """
+        return self.__maquina_dao.find_by('fornecedor', cnpj)
+
     def pega_maquina_por_id(self, id: int) -> MaquinaDeCafe:
         """
         Recupera uma máquina específica pelo ID. Valida que o ID é um inteiro
@@ -4,20 +4,101 @@
     Ela centraliza toda a lógica de análise de dados, mantendo os outros
     controladores focados em suas responsabilidades operacionais (CRUD) e
     delegando a exibição final dos resultados para a `TelaRelatorio`.
+
+    Os relatórios de vendas são formatadores sobre os agregados mantidos
+    pelo `ControladorVenda` (ver `agregadorVendas`), atualizados a cada venda
+    finalizada; gerá-los custa o número de chaves distintas (produtos,
+    fornecedores, clientes), e não o número de vendas do histórico.
+
+    Eles também podem ser restritos a um período e divididos por dia,
+    semana ou mês (`PeriodoRelatorio`). Nesse caso, cada intervalo é apurado
+    sobre a tabela de fatos de vendas, localizando suas linhas por busca
+    binária na coluna de datas, sem tocar no histórico fora do período. Os
+    relatórios de estoque e de encomendas refletem o estado atual e não
+    dependem de período.
+
+    Os rankings (cafés, máquinas, fornecedores e clientes) podem ser
+    limitados às K maiores chaves, selecionadas com `heapq.nlargest` sem
+    ordenar o restante, que é resumido em uma linha de "outros".
+
+    Os resultados são memorizados (`CacheRelatorios`) junto com as versões
+    dos DAOs de que cada relatório depende (ver `_relatorio_versionado`):
+    abrir de novo um relatório sem que esses dados tenham mudado exibe as
+    linhas guardadas, sem recalcular nem gravar outro arquivo .txt.
+
+    Além do .txt legível, os dados de cada relatório podem ser exportados em
+    CSV ou JSONL (`exportar_relatorio`): os registros, com colunas tipadas,
+    são produzidos por geradores e gravados em fluxo pelo
+    `exportadorRelatorios`, sem montar o relatório inteiro em memória.
     """
 
+import functools
+import heapq
+from operator import itemgetter
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from controle.agregadorVendas import AgregadosVendas
+from controle.cacheRelatorios import CacheRelatorios
+from controle.exportadorRelatorios import (TIPO_DATA_HORA, TIPO_DECIMAL, TIPO_INTEIRO,
+                                           TIPO_TEXTO, Coluna, SAIDAS_ESTRUTURADAS,
+                                           SaidaTexto, exportar_estruturado, exportar_texto)
+from controle.periodoRelatorio import PeriodoRelatorio
 from limite.telaRelatorio import TelaRelatorio
-from Excecoes.clienteNaoEncontradoException import ClienteNaoEncontradoException
-from entidade.cafe import Cafe
-from entidade.maquina_de_cafe import MaquinaDeCafe
-from datetime import datetime
+from DAOs.dao import DAO
+from Excecoes.produtoNaoEncontradoException import ProdutoNaoEncontradoException
+from datetime import datetime, timedelta
 import os
 
 
+def _relatorio_versionado(*dependencias: str):
+    """
+    Decora um método de relatório que retorna (título, linhas). O resultado
+    é memorizado pelos argumentos da chamada e pelas versões dos DAOs
+    nomeados em `dependencias`, salvo em arquivo .txt apenas quando
+    recalculado, e exibido na tela de relatórios.
+    """
+    def decorador(calcular):
+        @functools.wraps(calcular)
+        def gerar(self, *args, **kwargs):
+            chave = (calcular.__name__, args, tuple(sorted(kwargs.items())))
+            self._exibir_versionado(chave, dependencias,
+                                    lambda: calcular(self, *args, **kwargs))
+        return gerar
+    return decorador
+
+
 class ControladorRelatorios:
-    def __init__(self, controlador_sistema) -> None:
+    PASTA_PADRAO = "relatorios"
+    FORMATO_TEXTO = "txt"
+    FORMATOS = (FORMATO_TEXTO,) + tuple(SAIDAS_ESTRUTURADAS)
+
+    def __init__(self, controlador_sistema, daos: Optional[Dict[str, DAO]] = None) -> None:
+        """
+        Inicializa o controlador de relatórios. `daos` mapeia os nomes usados
+        nas dependências dos relatórios ('venda', 'cliente', 'estoque',
+        'cafe', 'maquina') para os DAOs carregados; sem ele, os resultados
+        não são memorizados.
+        """
         self.__controlador_sistema = controlador_sistema
         self.__tela_relatorios = TelaRelatorio()
+        self.__daos = daos
+        self.__cache = CacheRelatorios()
+
+    def __agregados(self) -> AgregadosVendas:
+        return self.__controlador_sistema.controlador_venda.agregados
+
+    def __caminho_arquivo(self, titulo: str, extensao: str, pasta: Optional[str] = None) -> str:
+        """
+        Caminho único (com timestamp) para um arquivo do relatório na pasta
+        informada ('relatorios' por padrão), criada se não existir.
+        """
+        pasta = pasta if pasta is not None else self.PASTA_PADRAO
+        if not os.path.exists(pasta):
+            os.makedirs(pasta)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        nome_arquivo_safe = titulo.replace(" ", "_").replace("/", "-")
+        return os.path.join(pasta, f"{nome_arquivo_safe}_{timestamp}{extensao}")
 
     def __salvar_relatorio_em_arquivo(self, titulo: str, linhas_relatorio: list) -> str:
         """
@@ -26,233 +107,501 @@ class ControladorRelatorios:
         retorna string vazia sem interromper a exibição do relatório na tela.
         """
         try:
-            pasta = "relatorios"
-            if not os.path.exists(pasta):
-                os.makedirs(pasta)
-
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            nome_arquivo_safe = titulo.replace(" ", "_").replace("/", "-")
-            nome_arquivo = os.path.join(pasta, f"{nome_arquivo_safe}_{timestamp}.txt")
-
-            with open(nome_arquivo, 'w', encoding='utf-8') as arquivo:
-                arquivo.write("=" * 60 + "\n")
-                arquivo.write(f"{titulo.upper()}\n")
-                arquivo.write("=" * 60 + "\n\n")
-                arquivo.write("\n".join(linhas_relatorio))
-                arquivo.write(f"\n\n{'=' * 60}\n")
-                arquivo.write(f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-
+            nome_arquivo = self.__caminho_arquivo(titulo, SaidaTexto.extensao)
+            exportar_texto(nome_arquivo, titulo, linhas_relatorio)
             return nome_arquivo
         except (IOError, OSError, PermissionError):
             # Falha ao salvar arquivo não impede exibição do relatório na tela
             return ""
 
-    def relatorio_vendas_finalizadas(self):
+    def __intervalos_de_vendas(self, periodo: Optional[PeriodoRelatorio]
+                               ) -> Iterator[Tuple[Optional[str], Optional[datetime],
+                                                   Optional[datetime], AgregadosVendas]]:
         """
-        Gera relatório de todas as vendas finalizadas no sistema. Filtra
-        vendas por status "Finalizada", extrai informações relevantes (ID,
-        cliente, valor) e calcula total arrecadado. Formata dados para
-        exibição na tela de relatórios e salva automaticamente em arquivo .txt.
+        Gera (rótulo, início, fim, agregados) de cada intervalo a apurar.
+        Sem período, um único intervalo com os agregados de todo o histórico;
+        com período, os agregados de cada intervalo, apurados sobre a tabela
+        de fatos, omitindo intervalos da granularidade sem vendas.
         """
-        vendas_finalizadas = [
-            v for v in self.__controlador_sistema.controlador_venda.vendas if (
-                v.status_venda == "Finalizada")]
-
+        if periodo is None:
+            yield None, None, None, self.__agregados()
+            return
+
+        tabela = self.__controlador_sistema.controlador_venda.tabela_fatos
+        for rotulo, inicio, fim in periodo.intervalos(*tabela.datas_extremas()):
+            agregados = tabela.agregar_periodo(inicio, fim)
+            if rotulo is None or agregados.quantidade_vendas:
+                yield rotulo, inicio, fim, agregados
+
+    def __linhas_de_vendas(self, periodo: Optional[PeriodoRelatorio],
+                           gerar_linhas: Callable[..., List[str]],
+                           mensagem_vazio: Optional[str]) -> List[str]:
+        """
+        Monta as linhas de um relatório de vendas chamando `gerar_linhas` com
+        os agregados e os limites de cada intervalo; com granularidade, cada
+        intervalo vira uma seção com o seu rótulo.
+        """
+        vazio = [mensagem_vazio] if mensagem_vazio is not None else []
         linhas_relatorio = []
-        total_arrecadado = 0.0
-
-        for venda in vendas_finalizadas:
-            linhas_relatorio.append(
-                f"ID: {venda.id_venda} | Cliente: {venda.cliente.nome} | "
-                f"Valor: R$ {venda.valor_total:.2f}"
-            )
-            total_arrecadado += venda.valor_total
-
-        linhas_relatorio.append(
-            f"\nTOTAL ARRECADADO: R$ {total_arrecadado:.2f}")
-
-        self.__salvar_relatorio_em_arquivo("Vendas Finalizadas", linhas_relatorio)
-        self.__tela_relatorios.mostra_relatorio(
-            "Vendas Finalizadas", linhas_relatorio)
-
-    def relatorio_cafes_mais_vendidos(self):
+        for rotulo, inicio, fim, agregados in self.__intervalos_de_vendas(periodo):
+            if rotulo is None:
+                linhas_relatorio.extend(gerar_linhas(agregados, inicio, fim))
+            else:
+                if linhas_relatorio:
+                    linhas_relatorio.append("")
+                linhas_relatorio.append(f"--- {rotulo} ---")
+                linhas_relatorio.extend(gerar_linhas(agregados, inicio, fim) or vazio)
+        return linhas_relatorio or vazio
+
+    @staticmethod
+    def __ranking(totais: dict, limite: Optional[int]) -> Tuple[list, int, float]:
         """
-        Analisa vendas finalizadas para identificar cafés mais vendidos.
-        Contabiliza quantidade vendida de cada café em todas as vendas,
-        ordena por quantidade (decrescente) e formata para exibição.
-        Mostra mensagem se nenhum café foi vendido. Salva automaticamente
-        em arquivo .txt.
+        Ordena as chaves pelo total (decrescente, empates na ordem original).
+        Com `limite`, seleciona só as maiores com `heapq.nlargest`, em
+        O(n log k), e retorna também quantas chaves ficaram de fora e a soma
+        dos seus totais, para a linha de "outros".
         """
-        vendas_finalizadas = [
-            v for v in self.__controlador_sistema.controlador_venda.vendas if (
-                v.status_venda == "Finalizada")]
-        contagem_cafes = {}
-
-        for venda in vendas_finalizadas:
-            for produto, quantidade in venda.carrinho.items():
-                if isinstance(produto, Cafe):
-                    # Usa ID como chave para agrupar produtos iguais
-                    cafe_id = produto.id
-                    if cafe_id not in contagem_cafes:
-                        contagem_cafes[cafe_id] = {'produto': produto, 'total': 0}
-                    contagem_cafes[cafe_id]['total'] += quantidade
-
-        cafes_ordenados = sorted(
-            contagem_cafes.values(), key=lambda item: item['total'], reverse=True)
-
+        if limite is None or limite >= len(totais):
+            return sorted(totais.items(), key=itemgetter(1), reverse=True), 0, 0
+        maiores = heapq.nlargest(limite, totais.items(), key=itemgetter(1))
+        soma_outros = sum(totais.values()) - sum(total for _, total in maiores)
+        return maiores, len(totais) - limite, soma_outros
+
+    @staticmethod
+    def __titulo(titulo: str, periodo: Optional[PeriodoRelatorio],
+                 limite: Optional[int] = None) -> str:
+        detalhes = []
+        if limite is not None:
+            detalhes.append(f"Top {limite}")
+        if periodo is not None:
+            detalhes.append(periodo.descricao())
+        return f"{titulo} ({', '.join(detalhes)})" if detalhes else titulo
+
+    def _exibir_versionado(self, chave: tuple, dependencias: Tuple[str, ...],
+                           calcular: Callable[[], Tuple[str, List[str]]]) -> None:
+        """
+        Exibe o relatório identificado por `chave`, reaproveitando o
+        resultado memorizado se as versões dos DAOs em `dependencias` não
+        mudaram desde o cálculo. Caso contrário, calcula, salva em arquivo
+        .txt e memoriza o resultado com as versões lidas antes do cálculo.
+        """
+        versoes = (tuple(self.__daos[nome].versao for nome in dependencias)
+                   if self.__daos is not None else None)
+        resultado = self.__cache.obter(chave, versoes) if versoes is not None else None
+        if resultado is None:
+            titulo, linhas_relatorio = calcular()
+            arquivo = self.__salvar_relatorio_em_arquivo(titulo, linhas_relatorio)
+            if versoes is not None:
+                self.__cache.guardar(chave, versoes, (titulo, linhas_relatorio, arquivo))
+        else:
+            titulo, linhas_relatorio, arquivo = resultado
+            if not arquivo or not os.path.exists(arquivo):
+                # O arquivo anterior foi apagado (ou não pôde ser gravado)
+                arquivo = self.__salvar_relatorio_em_arquivo(titulo, linhas_relatorio)
+                self.__cache.guardar(chave, versoes, (titulo, linhas_relatorio, arquivo))
+        self.__tela_relatorios.mostra_relatorio(titulo, linhas_relatorio)
+
+    @_relatorio_versionado('venda', 'cliente')
+    def relatorio_vendas_finalizadas(self, periodo: Optional[PeriodoRelatorio] = None):
+        """
+        Gera relatório das vendas finalizadas, com ID, cliente e valor de
+        cada uma, e o total arrecadado, obtido dos agregados. Sem período,
+        as vendas vêm do índice por status; com período, da tabela de fatos.
+        Formata dados para exibição na tela de relatórios e salva
+        automaticamente em arquivo .txt.
+        """
+        controlador_venda = self.__controlador_sistema.controlador_venda
+
+        def gerar_linhas(agregados, inicio, fim):
+            if periodo is not None and not agregados.quantidade_vendas:
+                return []
+            linhas = [f"ID: {venda.id_venda} | Cliente: {venda.cliente.nome} | "
+                      f"Valor: R$ {venda.valor_total:.2f}"
+                      for venda in controlador_venda.vendas_finalizadas(inicio, fim)]
+            linhas.append(f"\nTOTAL ARRECADADO: R$ {agregados.receita_total:.2f}")
+            return linhas
+
+        linhas_relatorio = self.__linhas_de_vendas(
+            periodo, gerar_linhas, "Nenhuma venda finalizada no período.")
+        return self.__titulo("Vendas Finalizadas", periodo), linhas_relatorio
+
+    @_relatorio_versionado('venda')
+    def relatorio_cafes_mais_vendidos(self, periodo: Optional[PeriodoRelatorio] = None,
+                                      limite: Optional[int] = None):
+        """
+        Lista os cafés mais vendidos a partir das unidades por café dos
+        agregados, ordenados por quantidade (decrescente), no período
+        informado ou em todo o histórico. Com `limite`, lista só os mais
+        vendidos e resume os demais em uma linha. Mostra mensagem se nenhum
+        café foi vendido. Salva automaticamente em arquivo .txt.
+        """
+        def gerar_linhas(agregados, inicio, fim):
+            cafes_ordenados, outros, unidades_outros = self.__ranking(
+                agregados.unidades_por_cafe, limite)
+            linhas = [f"Café: {agregados.nome_produto(id_cafe)} (ID: {id_cafe}) | "
+                      f"Total Vendido: {total_vendido} unidades"
+                      for id_cafe, total_vendido in cafes_ordenados]
+            if outros:
+                linhas.append(f"Outros {outros} cafés | Total Vendido: {unidades_outros} unidades")
+            return linhas
+
+        mensagem_vazio = ("Nenhum café vendido até o momento." if periodo is None
+                          else "Nenhum café vendido no período.")
+        linhas_relatorio = self.__linhas_de_vendas(periodo, gerar_linhas, mensagem_vazio)
+        return self.__titulo("Cafés Mais Vendidos", periodo, limite), linhas_relatorio
+
+    @_relatorio_versionado('venda')
+    def relatorio_maquinas_mais_vendidas(self, periodo: Optional[PeriodoRelatorio] = None,
+                                         limite: Optional[int] = None):
+        """
+        Lista as máquinas mais vendidas a partir das unidades por máquina
+        dos agregados, ordenadas por quantidade (decrescente), no período
+        informado ou em todo o histórico. Com `limite`, lista só as mais
+        vendidas e resume as demais em uma linha. Mostra mensagem se nenhuma
+        máquina foi vendida. Salva automaticamente em arquivo .txt.
+        """
+        def gerar_linhas(agregados, inicio, fim):
+            maquinas_ordenadas, outras, unidades_outras = self.__ranking(
+                agregados.unidades_por_maquina, limite)
+            linhas = [f"Máquina: {agregados.nome_produto(id_maquina)} (ID: {id_maquina}) | "
+                      f"Total Vendido: {total_vendido} unidades"
+                      for id_maquina, total_vendido in maquinas_ordenadas]
+            if outras:
+                linhas.append(
+                    f"Outras {outras} máquinas | Total Vendido: {unidades_outras} unidades")
+            return linhas
+
+        mensagem_vazio = ("Nenhuma máquina vendida até o momento." if periodo is None
+                          else "Nenhuma máquina vendida no período.")
+        linhas_relatorio = self.__linhas_de_vendas(periodo, gerar_linhas, mensagem_vazio)
+        return self.__titulo("Máquinas Mais Vendidas", periodo, limite), linhas_relatorio
+
+    @_relatorio_versionado('venda')
+    def relatorio_empresas_fornecedoras_mais_ativas(self, periodo: Optional[PeriodoRelatorio] = None,
+                                                    limite: Optional[int] = None):
+        """
+        Lista os fornecedores (de cafés e máquinas) pelo total de unidades
+        vendidas dos seus produtos, a partir dos agregados, ordenados por
+        volume (decrescente), no período informado ou em todo o histórico.
+        Com `limite`, lista só os mais ativos e resume os demais em uma
+        linha. Salva automaticamente em arquivo .txt.
+        """
+        def gerar_linhas(agregados, inicio, fim):
+            empresas_ordenadas, outras, unidades_outras = self.__ranking(
+                agregados.unidades_por_fornecedor, limite)
+            linhas = [f"Empresa: {agregados.nome_fornecedor(cnpj)} (CNPJ: {cnpj}) | "
+                      f"Total de Produtos Vendidos: {total_vendido} unidades"
+                      for cnpj, total_vendido in empresas_ordenadas]
+            if outras:
+                linhas.append(f"Outras {outras} empresas | "
+                              f"Total de Produtos Vendidos: {unidades_outras} unidades")
+            return linhas
+
+        linhas_relatorio = self.__linhas_de_vendas(
+            periodo, gerar_linhas, "Nenhuma venda de produtos de fornecedores registrada.")
+        return (self.__titulo("Empresas Fornecedoras Mais Ativas", periodo, limite),
+                linhas_relatorio)
+
+    @_relatorio_versionado('venda', 'cliente')
+    def relatorio_clientes_por_valor(self, periodo: Optional[PeriodoRelatorio] = None,
+                                     limite: Optional[int] = None):
+        """
+        Lista o total gasto por cada cliente a partir dos agregados,
+        ordenado por valor (decrescente), no período informado ou em todo o
+        histórico. Com `limite`, lista só os que mais gastaram (buscando
+        apenas esses clientes) e resume os demais em uma linha. Os clientes
+        listados são buscados de uma só vez (`pega_clientes_por_ids`); os
+        excluídos após a venda aparecem como tal. Formata dados para
+        exibição e salva automaticamente em arquivo .txt.
+        """
+        controlador_cliente = self.__controlador_sistema.controlador_cliente
+
+        def gerar_linhas(agregados, inicio, fim):
+            clientes_ordenados, outros, gasto_outros = self.__ranking(
+                agregados.gasto_por_cliente, limite)
+            clientes = controlador_cliente.pega_clientes_por_ids(
+                cliente_id for cliente_id, _ in clientes_ordenados)
+            linhas = []
+            for cliente_id, total_gasto in clientes_ordenados:
+                cliente = clientes[cliente_id]
+                if cliente is not None:
+                    linhas.append(
+                        f"Cliente: {cliente.nome} (ID: {cliente_id}) | Total Gasto: R$ {total_gasto:.2f}")
+                else:
+                    linhas.append(
+                        f"Cliente ID: {cliente_id} (Excluído) | Total Gasto: R$ {total_gasto:.2f}")
+            if outros:
+                linhas.append(f"Outros {outros} clientes | Total Gasto: R$ {gasto_outros:.2f}")
+            return linhas
+
+        mensagem_vazio = None if periodo is None else "Nenhum cliente comprou no período."
+        linhas_relatorio = self.__linhas_de_vendas(periodo, gerar_linhas, mensagem_vazio)
+        return self.__titulo("Clientes por Valor Gasto", periodo, limite), linhas_relatorio
+
+    @_relatorio_versionado('estoque', 'cafe', 'maquina')
+    def relatorio_estoque_baixo(self):
+        """
+        Lista os produtos com quantidade igual ou menor ao seu limite de
+        reposição (5 unidades, salvo limite definido para o produto), dos
+        mais críticos para os menos. Os produtos vêm do índice de estoque
+        baixo mantido pelo `Estoque`, sem percorrer o restante do estoque.
+        Mostra mensagem se nenhum produto estiver com estoque baixo. Salva
+        automaticamente em arquivo .txt.
+        """
+        produtos = self.__controlador_sistema.controlador_estoque.produtos_com_estoque_baixo
         linhas_relatorio = []
-        for item in cafes_ordenados:
-            cafe = item['produto']
-            total_vendido = item['total']
-            linhas_relatorio.append(
-                f"Café: {cafe.nome} (ID: {cafe.id}) | Total Vendido: {total_vendido} unidades")
 
-        if not linhas_relatorio:
-            linhas_relatorio.append("Nenhum café vendido até o momento.")
-        self.__salvar_relatorio_em_arquivo("Cafés Mais Vendidos", linhas_relatorio)
-        self.__tela_relatorios.mostra_relatorio(
-            "Cafés Mais Vendidos", linhas_relatorio)
-
-    def relatorio_maquinas_mais_vendidas(self):
-        """
-        Analisa vendas finalizadas para identificar máquinas mais vendidas.
-        Filtra produtos que são máquinas, contabiliza quantidades vendidas,
-        ordena por quantidade (decrescente) e formata para exibição.
-        Mostra mensagem se nenhuma máquina foi vendida. Salva automaticamente
-        em arquivo .txt.
-        """
-        vendas_finalizadas = [
-            v for v in self.__controlador_sistema.controlador_venda.vendas if (
-                v.status_venda == "Finalizada")]
-        contagem_maquinas = {}
-
-        for venda in vendas_finalizadas:
-            for produto, quantidade in venda.carrinho.items():
-                if isinstance(produto, MaquinaDeCafe):
-                    # Usa ID como chave para agrupar produtos iguais
-                    maquina_id = produto.id
-                    if maquina_id not in contagem_maquinas:
-                        contagem_maquinas[maquina_id] = {'produto': produto, 'total': 0}
-                    contagem_maquinas[maquina_id]['total'] += quantidade
-
-        maquinas_ordenadas = sorted(
-            contagem_maquinas.values(), key=lambda item: item['total'], reverse=True)
-
-        linhas_relatorio = []
-        for item in maquinas_ordenadas:
-            maquina = item['produto']
-            total_vendido = item['total']
+        for produto, (quantidade, limite) in produtos.items():
             linhas_relatorio.append(
-                f"Máquina: {maquina.nome} (ID: {maquina.id}) | "
-                f"Total Vendido: {total_vendido} unidades")
+                f"-> PRODUTO: {produto.nome} (ID: {produto.id}) | RESTAM APENAS: {quantidade} "
+                f"unidades | LIMITE: {limite}"
+            )
 
         if not linhas_relatorio:
-            linhas_relatorio.append("Nenhuma máquina vendida até o momento.")
-        self.__salvar_relatorio_em_arquivo("Máquinas Mais Vendidas", linhas_relatorio)
-        self.__tela_relatorios.mostra_relatorio(
-            "Máquinas Mais Vendidas", linhas_relatorio)
+            linhas_relatorio.append("Nenhum produto com estoque baixo.")
+
+        return "Produtos com Estoque Baixo", linhas_relatorio
 
-    def relatorio_empresas_fornecedoras_mais_ativas(self):
+    @_relatorio_versionado('estoque', 'cafe', 'maquina')
+    def relatorio_encomendas_pendentes(self):
         """
-        Analisa vendas para identificar fornecedores mais ativos. Agrupa
-        produtos vendidos por fornecedor (cafés e máquinas), contabiliza
-        total de unidades vendidas de cada fornecedor e ordena por volume.
-        Usa reflexão para identificar produtos com atributo empresa_fornecedora.
+        Lista o volume pendente das encomendas por produto: unidades em falta
+        e quantidade de vendas aguardando reposição, ordenados pelo volume
+        (decrescente). Mostra mensagem se não houver encomendas pendentes.
         Salva automaticamente em arquivo .txt.
         """
-        vendas_finalizadas = [
-            v for v in self.__controlador_sistema.controlador_venda.vendas if (
-                v.status_venda == "Finalizada")]
-        contagem_empresas = {}
-
-        for venda in vendas_finalizadas:
-            for produto, quantidade in venda.carrinho.items():
-                if hasattr(produto, 'empresa_fornecedora'):
-                    fornecedor = produto.empresa_fornecedora
-                    if fornecedor is not None:
-                        contagem_empresas[fornecedor] = contagem_empresas.get(
-                            fornecedor, 0) + quantidade
-
-        empresas_ordenadas = sorted(
-            contagem_empresas.items(), key=lambda item: item[1], reverse=True)
+        controlador_estoque = self.__controlador_sistema.controlador_estoque
+        pendentes = controlador_estoque.estoque.encomendas_pendentes()
 
         linhas_relatorio = []
-        for empresa, total_vendido in empresas_ordenadas:
-            if empresa is not None:
-                linhas_relatorio.append(
-                    f"Empresa: {empresa.nome} (CNPJ: {empresa.cnpj}) | "
-                    f"Total de Produtos Vendidos: {total_vendido} unidades")
-
-        if not linhas_relatorio:
+        total_unidades = 0
+        for id_produto, (unidades, vendas) in sorted(
+                pendentes.items(), key=lambda item: item[1][0], reverse=True):
+            try:
+                nome = controlador_estoque.pega_produto_por_id(id_produto).nome
+            except ProdutoNaoEncontradoException:
+                nome = "Produto excluído"
             linhas_relatorio.append(
-                "Nenhuma venda de produtos de fornecedores registrada.")
+                f"Produto: {nome} (ID: {id_produto}) | Em falta: {unidades} unidades | "
+                f"Vendas aguardando: {vendas}")
+            total_unidades += unidades
 
-        self.__salvar_relatorio_em_arquivo("Empresas Fornecedoras Mais Ativas", linhas_relatorio)
-        self.__tela_relatorios.mostra_relatorio(
-            "Empresas Fornecedoras Mais Ativas", linhas_relatorio)
+        if linhas_relatorio:
+            linhas_relatorio.append(f"\nTOTAL EM FALTA: {total_unidades} unidades")
+        else:
+            linhas_relatorio.append("Nenhuma encomenda pendente.")
 
-    def relatorio_clientes_por_valor(self):
+        return "Encomendas Pendentes", linhas_relatorio
+
+    def __registros_de_vendas(self, periodo: Optional[PeriodoRelatorio],
+                              gerar_registros: Callable[..., Iterator[tuple]]
+                              ) -> Iterator[tuple]:
         """
-        Analisa vendas para calcular total gasto por cada cliente. Agrupa
-        vendas por ID do cliente, soma valores totais e ordena por valor
-        (decrescente). Trata casos onde cliente foi excluído após venda,
-        exibindo informação apropriada. Formata dados para exibição e salva
-        automaticamente em arquivo .txt.
+        Gera os registros de uma exportação de vendas, intervalo a
+        intervalo; com granularidade, cada registro começa pelo rótulo do
+        seu intervalo (coluna 'periodo').
         """
-        gastos_por_cliente = {}
-        vendas_finalizadas = [
-            v for v in self.__controlador_sistema.controlador_venda.vendas if (
-                v.status_venda == "Finalizada")]
-
-        for venda in vendas_finalizadas:
-            cliente_id = venda.cliente.id
-            gastos_por_cliente[cliente_id] = gastos_por_cliente.get(
-                cliente_id, 0) + venda.valor_total
-
-        clientes_ordenados = sorted(
-            gastos_por_cliente.items(), key=lambda item: item[1], reverse=True)
-
-        linhas_relatorio = []
+        com_rotulo = periodo is not None and periodo.granularidade is not None
+        for rotulo, inicio, fim, agregados in self.__intervalos_de_vendas(periodo):
+            for registro in gerar_registros(agregados, inicio, fim):
+                yield (rotulo,) + registro if com_rotulo else registro
+
+    def __registros_vendas_finalizadas(self, agregados, inicio, fim, limite):
+        for venda in self.__controlador_sistema.controlador_venda.vendas_finalizadas(inicio, fim):
+            yield (venda.id_venda, venda.cliente.id, venda.cliente.nome,
+                   venda.valor_total, venda.data_venda)
+
+    def __registros_clientes_por_valor(self, agregados, inicio, fim, limite):
+        controlador_cliente = self.__controlador_sistema.controlador_cliente
+        clientes_ordenados = self.__ranking(agregados.gasto_por_cliente, limite)[0]
+        clientes = controlador_cliente.pega_clientes_por_ids(
+            cliente_id for cliente_id, _ in clientes_ordenados)
         for cliente_id, total_gasto in clientes_ordenados:
+            cliente = clientes[cliente_id]
+            yield cliente_id, cliente.nome if cliente is not None else None, total_gasto
+
+    def __registros_cafes_mais_vendidos(self, agregados, inicio, fim, limite):
+        for id_cafe, unidades in self.__ranking(agregados.unidades_por_cafe, limite)[0]:
+            yield id_cafe, agregados.nome_produto(id_cafe), unidades
+
+    def __registros_maquinas_mais_vendidas(self, agregados, inicio, fim, limite):
+        for id_maquina, unidades in self.__ranking(agregados.unidades_por_maquina, limite)[0]:
+            yield id_maquina, agregados.nome_produto(id_maquina), unidades
+
+    def __registros_empresas_fornecedoras(self, agregados, inicio, fim, limite):
+        for cnpj, unidades in self.__ranking(agregados.unidades_por_fornecedor, limite)[0]:
+            yield cnpj, agregados.nome_fornecedor(cnpj), unidades
+
+    def __registros_estoque_baixo(self) -> Iterator[tuple]:
+        produtos = self.__controlador_sistema.controlador_estoque.produtos_com_estoque_baixo
+        for produto, (quantidade, limite) in produtos.items():
+            yield produto.id, produto.nome, quantidade, limite
+
+    def __registros_encomendas_pendentes(self) -> Iterator[tuple]:
+        controlador_estoque = self.__controlador_sistema.controlador_estoque
+        pendentes = controlador_estoque.estoque.encomendas_pendentes()
+        for id_produto, (unidades, vendas) in sorted(
+                pendentes.items(), key=lambda item: item[1][0], reverse=True):
             try:
-                cliente = self.__controlador_sistema.controlador_cliente.pega_cliente_por_id(
-                    cliente_id)
-                linhas_relatorio.append(
-                    f"Cliente: {cliente.nome} (ID: {cliente_id}) | Total Gasto: R$ {total_gasto:.2f}")
-            except ClienteNaoEncontradoException:
-                linhas_relatorio.append(
-                    f"Cliente ID: {cliente_id} (Excluído) | Total Gasto: R$ {total_gasto:.2f}")
-
-        self.__salvar_relatorio_em_arquivo("Clientes por Valor Gasto", linhas_relatorio)
-        self.__tela_relatorios.mostra_relatorio(
-            "Clientes por Valor Gasto", linhas_relatorio)
+                nome = controlador_estoque.pega_produto_por_id(id_produto).nome
+            except ProdutoNaoEncontradoException:
+                nome = None
+            yield id_produto, nome, unidades, vendas
 
-    def relatorio_estoque_baixo(self):
+    def relatorios_exportaveis(self) -> Dict[str, Tuple[str, bool, bool]]:
         """
-        Identifica produtos com estoque abaixo do limite mínimo (5 unidades).
-        Itera sobre todos os produtos em estoque, filtra aqueles com quantidade
-        igual ou menor ao limite e formata alerta para exibição. Mostra mensagem
-        se nenhum produto estiver com estoque baixo. Salva automaticamente
-        em arquivo .txt.
+        Relatórios que podem ser exportados em formato estruturado: nome ->
+        (título, aceita período, aceita limite).
         """
-        LIMITE_MINIMO = 5
+        return {nome: (titulo, por_periodo, com_limite)
+                for nome, (titulo, _, _, _, por_periodo, com_limite)
+                in self.__exportacoes().items()}
 
-        produtos_em_estoque = self.__controlador_sistema.controlador_estoque.produtos_em_estoque
-        linhas_relatorio = []
-
-        for produto, quantidade in produtos_em_estoque.items():
-            if quantidade <= LIMITE_MINIMO:
-                linhas_relatorio.append(
-                    f"-> PRODUTO: {produto.nome} (ID: {produto.id}) | RESTAM APENAS: {quantidade} unidades"
-                )
+    def __exportacoes(self) -> Dict[str, Tuple[str, List[Coluna], Callable, Callable, bool, bool]]:
+        """
+        Definição das exportações: nome -> (título, colunas, gerador de
+        registros, método do relatório legível, se é um relatório de vendas
+        por período, se aceita limite).
+        """
+        return {
+            'vendas_finalizadas': (
+                "Vendas Finalizadas",
+                [('id_venda', TIPO_INTEIRO), ('id_cliente', TIPO_INTEIRO),
+                 ('cliente', TIPO_TEXTO), ('valor_total', TIPO_DECIMAL),
+                 ('data_venda', TIPO_DATA_HORA)],
+                self.__registros_vendas_finalizadas, self.relatorio_vendas_finalizadas,
+                True, False),
+            'clientes_por_valor': (
+                "Clientes por Valor Gasto",
+                [('id_cliente', TIPO_INTEIRO), ('cliente', TIPO_TEXTO),
+                 ('total_gasto', TIPO_DECIMAL)],
+                self.__registros_clientes_por_valor, self.relatorio_clientes_por_valor,
+                True, True),
+            'cafes_mais_vendidos': (
+                "Cafés Mais Vendidos",
+                [('id_cafe', TIPO_INTEIRO), ('cafe', TIPO_TEXTO),
+                 ('unidades_vendidas', TIPO_INTEIRO)],
+                self.__registros_cafes_mais_vendidos, self.relatorio_cafes_mais_vendidos,
+                True, True),
+            'maquinas_mais_vendidas': (
+                "Máquinas Mais Vendidas",
+                [('id_maquina', TIPO_INTEIRO), ('maquina', TIPO_TEXTO),
+                 ('unidades_vendidas', TIPO_INTEIRO)],
+                self.__registros_maquinas_mais_vendidas, self.relatorio_maquinas_mais_vendidas,
+                True, True),
+            'empresas_fornecedoras_mais_ativas': (
+                "Empresas Fornecedoras Mais Ativas",
+                [('cnpj', TIPO_TEXTO), ('empresa', TIPO_TEXTO),
+                 ('unidades_vendidas', TIPO_INTEIRO)],
+                self.__registros_empresas_fornecedoras, self.relatorio_empresas_fornecedoras_mais_ativas,
+                True, True),
+            'estoque_baixo': (
+                "Produtos com Estoque Baixo",
+                [('id_produto', TIPO_INTEIRO), ('produto', TIPO_TEXTO),
+                 ('quantidade', TIPO_INTEIRO), ('limite_reposicao', TIPO_INTEIRO)],
+                self.__registros_estoque_baixo, self.relatorio_estoque_baixo,
+                False, False),
+            'encomendas_pendentes': (
+                "Encomendas Pendentes",
+                [('id_produto', TIPO_INTEIRO), ('produto', TIPO_TEXTO),
+                 ('unidades_em_falta', TIPO_INTEIRO), ('vendas_aguardando', TIPO_INTEIRO)],
+                self.__registros_encomendas_pendentes, self.relatorio_encomendas_pendentes,
+                False, False),
+        }
 
-        if not linhas_relatorio:
-            linhas_relatorio.append("Nenhum produto com estoque baixo.")
+    def exportar_relatorio(self, relatorio: str, formato: str,
+                           periodo: Optional[PeriodoRelatorio] = None,
+                           limite: Optional[int] = None,
+                           pasta: Optional[str] = None) -> str:
+        """
+        Exporta um relatório para a pasta informada ('relatorios' por
+        padrão), sem passar pela tela: em 'txt', o relatório legível; em
+        'csv' ou 'jsonl', os dados com colunas tipadas e o esquema ao lado
+        do arquivo, gravados à medida que são gerados. Período e limite
+        valem apenas para os relatórios que os aceitam. Retorna o caminho do
+        arquivo gerado. Lança ValueError se o relatório ou o formato forem
+        desconhecidos e OSError se o arquivo não puder ser gravado.
+        """
+        try:
+            titulo, colunas, gerar, metodo, por_periodo, com_limite = \
+                self.__exportacoes()[relatorio]
+        except KeyError:
+            raise ValueError(f"Relatório desconhecido: {relatorio}")
+        if formato not in self.FORMATOS:
+            raise ValueError(f"Formato de exportação desconhecido: {formato}")
+
+        if formato == self.FORMATO_TEXTO:
+            # Calcula direto pelo método original, sem o cache nem a tela
+            argumentos = ()
+            if por_periodo:
+                argumentos = (periodo, limite) if com_limite else (periodo,)
+            titulo, linhas_relatorio = metodo.__wrapped__(self, *argumentos)
+            caminho = self.__caminho_arquivo(titulo, SaidaTexto.extensao, pasta)
+            exportar_texto(caminho, titulo, linhas_relatorio)
+            return caminho
+
+        limite = limite if com_limite else None
+        if por_periodo:
+            if periodo is not None and periodo.granularidade is not None:
+                colunas = [('periodo', TIPO_TEXTO)] + colunas
+            registros = self.__registros_de_vendas(
+                periodo, lambda agregados, inicio, fim: gerar(agregados, inicio, fim, limite))
+            titulo = self.__titulo(titulo, periodo, limite)
+        else:
+            registros = gerar()
+
+        caminho = self.__caminho_arquivo(titulo, SAIDAS_ESTRUTURADAS[formato].extensao, pasta)
+        exportar_estruturado(caminho, formato, colunas, registros)
+        return caminho
+
+    @staticmethod
+    def __monta_periodo(dados: dict) -> Optional[PeriodoRelatorio]:
+        """
+        Monta o período a partir dos dados coletados pela tela. Retorna None
+        para todo o histórico sem divisão. Lança ValueError se o período
+        informado for inválido.
+        """
+        if dados["ultimos_dias"] is not None:
+            return PeriodoRelatorio.ultimos_dias(dados["ultimos_dias"], dados["granularidade"])
+        inicio, fim = dados["inicio"], dados["fim"]
+        if inicio is None and fim is None and dados["granularidade"] is None:
+            return None
+        # A data final informada é inclusiva: o período vai até o fim desse dia
+        fim = fim + timedelta(days=1) if fim is not None else None
+        return PeriodoRelatorio(inicio, fim, dados["granularidade"])
+
+    def __exportar_dados(self) -> None:
+        """
+        Coleta o relatório e o formato da exportação (e, para relatórios de
+        vendas, o período e o limite), exporta os dados e informa o caminho
+        do arquivo gerado.
+        """
+        exportaveis = self.relatorios_exportaveis()
+        escolha = self.__tela_relatorios.pega_exportacao(
+            {nome: titulo for nome, (titulo, _, _) in exportaveis.items()})
+        if escolha is None:
+            return
+        _, por_periodo, com_limite = exportaveis[escolha["relatorio"]]
+
+        periodo, limite = None, None
+        if por_periodo:
+            dados = self.__tela_relatorios.pega_opcoes_relatorio(com_limite=com_limite)
+            if dados is None:
+                return
+            try:
+                periodo = self.__monta_periodo(dados)
+            except ValueError as e:
+                self.__tela_relatorios.mostra_mensagem(str(e))
+                return
+            limite = dados["limite"]
 
-        titulo_relatorio = f"Produtos com Estoque Abaixo de {LIMITE_MINIMO} Unidades"
-        self.__salvar_relatorio_em_arquivo(titulo_relatorio, linhas_relatorio)
-        self.__tela_relatorios.mostra_relatorio(
-            titulo_relatorio, linhas_relatorio)
+        try:
+            caminho = self.exportar_relatorio(escolha["relatorio"], escolha["formato"],
+                                              periodo, limite)
+        except (ValueError, OSError) as e:
+            self.__tela_relatorios.mostra_mensagem(f"Falha ao exportar os dados: {e}")
+            return
+        self.__tela_relatorios.mostra_mensagem(f"Dados exportados para: {caminho}")
 
     def abre_tela(self) -> None:
         mapa_opcoes = {
@@ -261,8 +610,14 @@ class ControladorRelatorios:
             3: self.relatorio_estoque_baixo,
             4: self.relatorio_cafes_mais_vendidos,
             5: self.relatorio_maquinas_mais_vendidas,
-            6: self.relatorio_empresas_fornecedoras_mais_ativas
+            6: self.relatorio_empresas_fornecedoras_mais_ativas,
+            7: self.relatorio_encomendas_pendentes,
+            8: self.__exportar_dados
         }
+        # Relatórios de vendas, que aceitam período e granularidade, e
+        # rankings entre eles, que aceitam limite (top K)
+        opcoes_com_periodo = {1, 2, 4, 5, 6}
+        opcoes_com_limite = {2, 4, 5, 6}
 
         while True:
             opcao = self.__tela_relatorios.tela_opcoes()
@@ -273,8 +628,22 @@ class ControladorRelatorios:
                 break
 
             funcao_escolhida = mapa_opcoes.get(opcao)
-            if funcao_escolhida:
-                funcao_escolhida()
-            else:
+            if not funcao_escolhida:
                 self.__tela_relatorios.mostra_mensagem(
                     "Opção inválida, por favor escolha uma das opções listadas.")
+            elif opcao in opcoes_com_periodo:
+                dados = self.__tela_relatorios.pega_opcoes_relatorio(
+                    com_limite=opcao in opcoes_com_limite)
+                if dados is None:
+                    continue
+                try:
+                    periodo = self.__monta_periodo(dados)
+                except ValueError as e:
+                    self.__tela_relatorios.mostra_mensagem(str(e))
+                    continue
+                if opcao in opcoes_com_limite:
+                    funcao_escolhida(periodo, dados["limite"])
+                else:
+                    funcao_escolhida(periodo)
+            else:
+                funcao_escolhida()
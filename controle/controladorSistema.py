@@ -23,6 +23,8 @@
       uns aos outros através das propriedades expostas pelo `ControladorSistema`.
     """
 
+from typing import Dict, Optional
+
 from controle.controladorEmpresaCafe import ControladorEmpresaCafe
 from controle.controladorEmpresaMaquina import ControladorEmpresaMaquina
 from limite.telaSistema import TelaSistema
@@ -32,20 +34,69 @@ from controle.controladorMaquinaDeCafe import ControladorMaquinaDeCafe
 from controle.controladorVenda import ControladorVenda
 from controle.controladorEstoque import ControladorEstoque
 from controle.controladorRelatorio import ControladorRelatorios
+from DAOs.agregados_venda_dao import AgregadosVendaDAO
+from DAOs.carregador_paralelo import carregar_daos
+from DAOs.cafe_dao import CafeDAO
+from DAOs.cliente_dao import ClienteDAO
+from DAOs.estoque_dao import EstoqueDAO
+from DAOs.escrita_adiada import gerenciador_escrita_adiada
+from DAOs.fornecedora_cafe_dao import FornecedoraCafeDAO
+from DAOs.fornecedora_maquina_dao import FornecedoraMaquinaDAO
+from DAOs.maquina_de_cafe_dao import MaquinaDeCafeDAO
+from DAOs.venda_dao import VendaDAO
 
 
 class ControladorSistema:
 
     def __init__(self) -> None:
-        self.__tela_sistema = TelaSistema()
-        self.__controlador_cliente = ControladorCliente(self)
-        self.__controlador_cafe = ControladorCafe(self)
-        self.__controlador_maquina_de_cafe = ControladorMaquinaDeCafe(self)
-        self.__controlador_venda = ControladorVenda(self)
-        self.__controlador_estoque = ControladorEstoque(self)
-        self.__controlador_empresa_cafe = ControladorEmpresaCafe(self)
-        self.__controlador_empresa_maquina = ControladorEmpresaMaquina(self)
-        self.__controlador_relatorios = ControladorRelatorios(self)
+        """
+        Carrega todos os arquivos de persistência em paralelo e só então
+        monta os controladores com os DAOs já carregados. O estoque é o
+        último a ser montado, pois resolve os IDs de produtos gravados
+        através dos controladores de cafés e máquinas. A tela principal só é
+        criada em `inicializa_sistema`, de modo que o sistema pode ser
+        montado sem interface gráfica (ex: `gerar_relatorios.py`).
+        """
+        self.__tela_sistema: Optional[TelaSistema] = None
+        daos, self.__tempos_carregamento = carregar_daos({
+            'cliente': ClienteDAO,
+            'cafe': CafeDAO,
+            'maquina': MaquinaDeCafeDAO,
+            'venda': VendaDAO,
+            'agregados_venda': AgregadosVendaDAO,
+            'estoque': EstoqueDAO,
+            'fornecedores_cafe': FornecedoraCafeDAO,
+            'fornecedores_maquina': FornecedoraMaquinaDAO,
+        })
+        self.__controlador_cliente = ControladorCliente(self, daos['cliente'])
+        self.__controlador_cafe = ControladorCafe(self, daos['cafe'])
+        self.__controlador_maquina_de_cafe = ControladorMaquinaDeCafe(self, daos['maquina'])
+        self.__controlador_venda = ControladorVenda(self, daos['venda'], daos['agregados_venda'])
+        self.__controlador_empresa_cafe = ControladorEmpresaCafe(self, daos['fornecedores_cafe'])
+        self.__controlador_empresa_maquina = ControladorEmpresaMaquina(
+            self, daos['fornecedores_maquina'])
+        self.__controlador_estoque = ControladorEstoque(self, daos['estoque'])
+        self.__controlador_relatorios = ControladorRelatorios(self, daos)
+        self.__conectar_encomendas()
+
+    def __conectar_encomendas(self) -> None:
+        """
+        Faz o estoque avisar o controlador de vendas quando uma encomenda é
+        atendida e finaliza as encomendas que já estavam atendidas quando o
+        sistema foi encerrado.
+        """
+        estoque = self.__controlador_estoque.estoque
+        estoque.definir_callback_encomenda_atendida(self.__controlador_venda.atender_encomenda)
+        for id_venda in estoque.encomendas_atendidas():
+            self.__controlador_venda.atender_encomenda(id_venda)
+
+    @property
+    def tempos_carregamento(self) -> Dict[str, float]:
+        """
+        Tempo de carga (em segundos) de cada arquivo de persistência durante
+        a inicialização, indexado pelo nome do arquivo.
+        """
+        return dict(self.__tempos_carregamento)
 
     @property
     def controlador_cliente(self) -> ControladorCliente:
@@ -75,12 +126,17 @@ class ControladorSistema:
     def controlador_empresa_maquina(self) -> ControladorEmpresaMaquina:
         return self.__controlador_empresa_maquina
 
+    @property
+    def controlador_relatorios(self) -> ControladorRelatorios:
+        return self.__controlador_relatorios
+
     def inicializa_sistema(self) -> None:
         """
         Inicia o sistema exibindo o menu principal e iniciando o loop de
         navegação. Este método é chamado pelo main.py para dar início à
         aplicação.
         """
+        self.__tela_sistema = TelaSistema()
         self.abre_tela()
 
     def cadastra_clientes(self) -> None:
@@ -168,8 +224,10 @@ class ControladorSistema:
 
     def encerra_sistema(self) -> None:
         """
-        Encerra a execução do sistema, finalizando o programa.
+        Encerra a execução do sistema, finalizando o programa. Antes de
+        sair, grava as alterações que ainda aguardam a gravação adiada.
         """
+        gerenciador_escrita_adiada.descarregar_todos()
         exit(0)
 
     def abre_tela(self) -> None:
@@ -14,6 +14,12 @@
     - Fornece a instância de `Estoque` (do `ControladorEstoque`) para a
       entidade `Venda` no momento da finalização, permitindo que a própria
       venda valide a disponibilidade dos itens.
+    - Mantém os agregados das vendas finalizadas usados pelos relatórios,
+      atualizados e gravados junto com cada venda finalizada, e a tabela de
+      fatos colunar das linhas dessas vendas, usada nas consultas
+      vetorizadas.
+    - Registra como encomenda a venda que não pôde ser finalizada por falta
+      de estoque e a finaliza quando o `Estoque` avisa que ela foi atendida.
 
     Gerencia o fluxo de navegação entre o menu principal de vendas e um
     submenu de gerenciamento de uma venda específica, além de tratar um
@@ -21,8 +27,19 @@
     fornecer feedback claro ao usuário.
     """
 
+import datetime
+import logging
+import threading
+from typing import Optional
+
+from controle.agregadorVendas import AgregadosVendas
+from controle.tabelaFatosVendas import TabelaFatosVendas
 from controle.buscaProdutoMixin import BuscaProdutoMixin
 from limite.telaVenda import TelaVenda
+from entidade.cliente import Cliente
+from entidade.estoque import Estoque
+from entidade.produto import Produto
+from entidade.travas import travas_clientes
 from entidade.venda import Venda
 from Excecoes.clienteNaoEncontradoException import ClienteNaoEncontradoException
 from Excecoes.produtoNaoEncontradoException import ProdutoNaoEncontradoException
@@ -33,18 +50,93 @@ from Excecoes.saldoInsuficienteException import SaldoInsuficienteException
 from Excecoes.produtoNaoEmEstoqueException import ProdutoNaoEmEstoqueException
 from Excecoes.estoqueInsuficienteException import EstoqueInsuficienteException
 from DAOs.venda_dao import VendaDAO
+from DAOs.agregados_venda_dao import AgregadosVendaDAO
+from DAOs.unidade_de_trabalho import UnidadeDeTrabalho
+
+logger = logging.getLogger(__name__)
 
 
 class ControladorVenda(BuscaProdutoMixin):
-    def __init__(self, controlador_sistema) -> None:
+    def __init__(self, controlador_sistema, venda_dao: Optional[VendaDAO] = None,
+                 agregados_dao: Optional[AgregadosVendaDAO] = None) -> None:
         self._controlador_sistema = controlador_sistema
-        self.__venda_dao = VendaDAO()
+        if venda_dao is None:
+            venda_dao = VendaDAO()
+        venda_dao.definir_resolvedores(self.__resolver_cliente, self.__resolver_produto)
+        self.__venda_dao = venda_dao
+        self.__agregados_dao = (agregados_dao if agregados_dao is not None
+                                else AgregadosVendaDAO())
+        self.__agregados: Optional[AgregadosVendas] = None  # Carregados no primeiro uso
+        self.__trava_carga = threading.RLock()  # Protege a carga dos dados derivados
+        self.__tabela_fatos: Optional[TabelaFatosVendas] = None  # Montada no primeiro uso
         self.__tela_venda = TelaVenda()
 
     @property
     def vendas(self) -> list:
         return list(self.__venda_dao.get_all())
 
+    @property
+    def agregados(self) -> AgregadosVendas:
+        """
+        Agregados de todas as vendas finalizadas. No primeiro acesso são
+        carregados do arquivo; se não existirem ou não corresponderem ao
+        número de vendas finalizadas (ex: vendas gravadas por outro
+        programa), são reconstruídos a partir do histórico.
+        """
+        agregados = self.__agregados
+        if agregados is None:
+            # Todas as threads precisam receber o mesmo objeto, ou as vendas
+            # registradas em cópias diferentes se perdem
+            with self.__trava_carga:
+                if self.__agregados is None:
+                    estado = self.__agregados_dao.carregar()
+                    carregados = AgregadosVendas.de_estado(estado) if estado is not None else None
+                    finalizadas = self.__venda_dao.contar_por('status', 'Finalizada')
+                    if carregados is None or carregados.quantidade_vendas != finalizadas:
+                        self.reconstruir_agregados()
+                    else:
+                        self.__agregados = carregados
+                agregados = self.__agregados
+        return agregados
+
+    @property
+    def tabela_fatos(self) -> TabelaFatosVendas:
+        """
+        Tabela de fatos colunar das linhas das vendas finalizadas, montada
+        do histórico no primeiro acesso e atualizada a cada finalização.
+        """
+        tabela_fatos = self.__tabela_fatos
+        if tabela_fatos is None:
+            with self.__trava_carga:
+                if self.__tabela_fatos is None:
+                    self.__tabela_fatos = TabelaFatosVendas.de_vendas(self.vendas_finalizadas())
+                tabela_fatos = self.__tabela_fatos
+        return tabela_fatos
+
+    def reconstruir_agregados(self) -> AgregadosVendas:
+        """
+        Recalcula os agregados a partir do histórico, com group-bys
+        vetorizados sobre a tabela de fatos, e grava o resultado.
+        """
+        with self.__trava_carga:
+            self.__agregados = self.tabela_fatos.agregar()
+            self.__agregados_dao.salvar(self.__agregados.exportar())
+            return self.__agregados
+
+    def vendas_finalizadas(self, inicio: Optional[datetime.datetime] = None,
+                           fim: Optional[datetime.datetime] = None) -> list:
+        """
+        Retorna as vendas finalizadas em ordem de ID, consultando o índice
+        por status do DAO em vez de percorrer todas as vendas. Com um
+        período [inicio, fim), retorna as finalizadas nele em ordem de data,
+        localizadas por busca binária na tabela de fatos.
+        """
+        if inicio is None and fim is None:
+            return sorted(self.__venda_dao.find_by('status', 'Finalizada'),
+                          key=lambda venda: venda.id_venda)
+        return [self.__venda_dao.get(id_venda)
+                for id_venda in self.tabela_fatos.ids_vendas_periodo(inicio, fim)]
+
     def pega_venda_por_id(self, id_venda: int) -> Venda:
         """
         Recupera uma venda específica pelo ID. Lança exceção se não encontrada.
@@ -56,6 +148,13 @@ class ControladorVenda(BuscaProdutoMixin):
             raise VendaNaoEncontradaException()
         return venda
 
+    def vendas_do_cliente(self, id_cliente: int) -> list:
+        """
+        Retorna todas as vendas associadas ao cliente informado, consultando
+        o índice por cliente do DAO em vez de percorrer todas as vendas.
+        """
+        return self.__venda_dao.find_by('cliente', id_cliente)
+
     def iniciar_venda(self) -> None:
         """
         Cria uma nova venda no sistema. Coleta ID da venda e ID do cliente,
@@ -85,6 +184,8 @@ class ControladorVenda(BuscaProdutoMixin):
         diminuir, remover produtos) e finalizar. Persiste alterações após
         cada operação e continua até venda ser finalizada ou usuário salvar
         e sair. Validações de estoque e saldo são feitas pela entidade Venda.
+        Ao entrar, as reservas do carrinho no estoque são restabelecidas
+        (podem ter vencido ou se perdido com o reinício do sistema).
         """
         mapa_opcoes = {
             1: self.adicionar_produto,
@@ -93,6 +194,7 @@ class ControladorVenda(BuscaProdutoMixin):
             4: self.listar_produtos_venda,
             5: self.finalizar_venda
         }
+        self.__renovar_reservas(venda)
         while venda.status_venda == "Em andamento":
             try:
                 self.mostrar_detalhes_venda(venda)
@@ -114,12 +216,18 @@ class ControladorVenda(BuscaProdutoMixin):
     def adicionar_produto(self, venda: Venda) -> None:
         """
         Adiciona produto ao carrinho da venda. Busca produto pelo ID usando
-        mixin, adiciona à venda (que recalcula total automaticamente) e
-        persiste estado atualizado. Exibe confirmação com nome do produto.
+        mixin, reserva a quantidade no estoque (lançando exceção se não houver
+        unidades disponíveis), adiciona à venda (que recalcula total
+        automaticamente) e persiste estado atualizado. Exibe confirmação com
+        nome do produto.
         """
         dados_produto = self.__tela_venda.pega_dados_produto()
         if dados_produto:
             produto = self.pega_produto_por_id(dados_produto["id_produto"])
+            if dados_produto["quantidade"] > 0:
+                self.__estoque.ajustar_reserva(
+                    venda.id_venda, produto.id,
+                    self.__quantidade_no_carrinho(venda, produto.id) + dados_produto["quantidade"])
             venda.adicionar_produto(produto, dados_produto["quantidade"])
             self.__salvar_venda(venda)
             self.__tela_venda.mostra_mensagem(
@@ -129,26 +237,32 @@ class ControladorVenda(BuscaProdutoMixin):
         """
         Reduz quantidade de um produto no carrinho. Se quantidade a remover
         for maior ou igual à quantidade no carrinho, remove produto completamente.
-        Retorna mensagem descritiva da operação realizada e persiste alterações.
+        Retorna mensagem descritiva da operação realizada, libera no estoque
+        as unidades que deixaram de estar reservadas e persiste alterações.
         """
         dados_produto = self.__tela_venda.pega_dados_produto()
         if dados_produto:
             produto = self.pega_produto_por_id(dados_produto["id_produto"])
             resultado = venda.diminuir_quantidade_produto(
                 produto, dados_produto["quantidade"])
+            self.__estoque.ajustar_reserva(
+                venda.id_venda, produto.id, self.__quantidade_no_carrinho(venda, produto.id))
             self.__salvar_venda(venda)
             self.__tela_venda.mostra_mensagem(resultado)
 
     def remover_produto(self, venda: Venda) -> None:
         """
         Remove completamente um produto do carrinho, independente da quantidade.
-        Recalcula valor total da venda e persiste estado atualizado. Exibe
-        confirmação com nome do produto removido.
+        Recalcula valor total da venda, libera a reserva do produto no
+        estoque e persiste estado atualizado. Exibe confirmação com nome do
+        produto removido.
         """
         dados_produto = self.__tela_venda.pega_dados_produto()
         if dados_produto:
             produto = self.pega_produto_por_id(dados_produto["id_produto"])
             venda.remover_produto(produto)
+            self.__estoque.ajustar_reserva(
+                venda.id_venda, produto.id, self.__quantidade_no_carrinho(venda, produto.id))
             self.__salvar_venda(venda)
             self.__tela_venda.mostra_mensagem(
                 f"'{produto.nome}' removido do carrinho.")
@@ -166,12 +280,114 @@ class ControladorVenda(BuscaProdutoMixin):
         Finaliza uma venda em andamento. Delega validações e operações
         transacionais para a entidade Venda, que verifica saldo do cliente,
         disponibilidade no estoque, debita valores e atualiza estoque.
-        Persiste venda com status "Finalizada" e data de conclusão.
+        Persiste venda com status "Finalizada" e data de conclusão, além do
+        novo saldo do cliente. Estoque, venda, cliente e os agregados dos
+        relatórios são gravados juntos em uma unidade de trabalho, com uma
+        única escrita por arquivo mesmo em carrinhos com muitos itens.
+
+        Se faltar estoque, a venda é registrada como encomenda e será
+        finalizada automaticamente quando os produtos forem repostos.
+        Alertas de estoque baixo causados pela venda são exibidos só depois
+        que ela foi gravada.
         """
-        estoque = self._controlador_sistema.controlador_estoque.estoque
-        venda.finalizar_venda(estoque)
-        self.__salvar_venda(venda)
+        controlador_estoque = self._controlador_sistema.controlador_estoque
+        try:
+            self.__concluir_venda(venda)
+        except (ProdutoNaoEmEstoqueException, EstoqueInsuficienteException) as e:
+            self.__tela_venda.mostra_mensagem(f"ATENÇÃO: {e}")
+            self.__registrar_encomenda(venda)
+            controlador_estoque.mostrar_alertas_pendentes()
+            return
         self.__tela_venda.mostra_mensagem("Venda finalizada com sucesso!")
+        controlador_estoque.mostrar_alertas_pendentes()
+
+    def atender_encomenda(self, id_venda: int) -> bool:
+        """
+        Finaliza a venda cuja encomenda foi completamente alocada pelo
+        estoque. Registrado como callback do `Estoque`. Se a venda não puder
+        ser finalizada (ex: saldo insuficiente), a encomenda é cancelada e a
+        venda volta a ficar em andamento. Retorna True se a venda foi
+        finalizada.
+        """
+        estoque = self.__estoque
+        venda = self.__venda_dao.get(id_venda)
+        if venda is None or venda.status_venda != Venda.STATUS_AGUARDANDO_ESTOQUE:
+            estoque.cancelar_encomenda(id_venda)
+            return False
+        try:
+            self.__concluir_venda(venda)
+        except (SaldoInsuficienteException, ProdutoNaoEmEstoqueException,
+                EstoqueInsuficienteException, VendaNaoEmAndamentoException) as e:
+            logger.warning("Encomenda da venda %s não pôde ser finalizada: %s", id_venda, e)
+            estoque.cancelar_encomenda(id_venda)
+            venda.retomar()
+            self.__salvar_venda(venda)
+            return False
+        logger.info("Encomenda da venda %s finalizada", id_venda)
+        return True
+
+    def __concluir_venda(self, venda: Venda) -> None:
+        """
+        Finaliza a venda e grava, em uma única unidade de trabalho, a venda,
+        o estoque, o cliente e os agregados atualizados com a nova venda.
+        A trava do cliente é adquirida antes dos lotes da unidade de
+        trabalho, seguindo a ordem de entidade/travas.py.
+
+        Se algo falhar antes da confirmação, os lotes restauram apenas os
+        DAOs; a finalização em memória (estoque, saldo do cliente e status
+        da venda) e os agregados são desfeitos aqui, ainda com as travas
+        adquiridas, antes que outra thread possa gravá-los. A
+        confirmação em si não é atômica entre os arquivos: se a gravação de
+        um deles falhar (GravacaoIncompletaException), os demais já estão
+        gravados, a venda continua finalizada em memória e o arquivo que
+        falhou é gravado junto com a próxima alteração do seu DAO.
+        """
+        controlador_estoque = self._controlador_sistema.controlador_estoque
+        estoque = controlador_estoque.estoque
+        cliente_dao = self._controlador_sistema.controlador_cliente.cliente_dao
+        with travas_clientes.obter(venda.cliente.id):
+            # Carregados antes dos lotes: a carga consulta os DAOs
+            agregados = self.agregados
+            tabela_fatos = self.tabela_fatos
+            with UnidadeDeTrabalho(self.__venda_dao, controlador_estoque.estoque_dao,
+                                   cliente_dao, self.__agregados_dao):
+                status_anterior = venda.status_venda
+                reservas = estoque.reservas_da_venda(venda.id_venda)
+                faltas = estoque.encomenda_da_venda(venda.id_venda)
+                venda.finalizar_venda(estoque)
+                estado_agregados = None
+                try:
+                    self.__salvar_venda(venda)
+                    cliente_dao.update(venda.cliente)
+                    # O lote dos agregados serializa os registros entre as threads
+                    estado_agregados = agregados.exportar()
+                    agregados.registrar_venda(venda)
+                    self.__agregados_dao.salvar(agregados.exportar())
+                except BaseException:
+                    if estado_agregados is not None:
+                        agregados.restaurar(estado_agregados)
+                    venda.desfazer_finalizacao(estoque, status_anterior, reservas, faltas)
+                    raise
+        tabela_fatos.adicionar_venda(venda)
+
+    def __registrar_encomenda(self, venda: Venda) -> None:
+        """
+        Registra a venda como encomenda do carrinho completo. Se as unidades
+        já puderem ser todas alocadas, a venda é finalizada em seguida.
+        """
+        quantidades_por_id = {}
+        for produto, quantidade in venda.carrinho.items():
+            quantidades_por_id[produto.id] = quantidades_por_id.get(produto.id, 0) + quantidade
+        venda.aguardar_estoque()
+        self.__salvar_venda(venda)
+        faltas = self.__estoque.registrar_encomenda(venda.id_venda, quantidades_por_id)
+        if not faltas:
+            if self.atender_encomenda(venda.id_venda):
+                self.__tela_venda.mostra_mensagem("Venda finalizada com sucesso!")
+            return
+        self.__tela_venda.mostra_mensagem(
+            "Venda registrada como encomenda. Ela será finalizada automaticamente "
+            "quando o estoque for reposto.")
 
     def listar_vendas(self) -> None:
         """
@@ -214,8 +430,8 @@ class ControladorVenda(BuscaProdutoMixin):
         """
         Processa o cancelamento de uma venda em andamento. Lista vendas,
         permite seleção, valida que venda não está finalizada (não permite
-        exclusão de vendas concluídas) e remove do repositório. Exibe
-        confirmação de cancelamento.
+        exclusão de vendas concluídas), cancela sua encomenda, libera suas
+        reservas no estoque e remove do repositório. Exibe confirmação de cancelamento.
         """
         self.listar_vendas()
         if not self.vendas:
@@ -230,6 +446,8 @@ class ControladorVenda(BuscaProdutoMixin):
                 "Não é possível excluir uma venda já finalizada.")
             return
 
+        self.__estoque.cancelar_encomenda(venda.id_venda)
+        self.__estoque.liberar_reservas(venda.id_venda)
         self.__venda_dao.remove(venda.id_venda)
         self.__tela_venda.mostra_mensagem("Venda cancelada com sucesso.")
 
@@ -273,6 +491,11 @@ class ControladorVenda(BuscaProdutoMixin):
                         self.__tela_venda.mostra_mensagem(
                             "Não é possível gerenciar uma venda já finalizada.")
                         continue
+                    if venda.status_venda == Venda.STATUS_AGUARDANDO_ESTOQUE:
+                        self.__tela_venda.mostra_mensagem(
+                            "Esta venda aguarda reposição do estoque e será "
+                            "finalizada automaticamente.")
+                        continue
                     self.gerenciar_venda(venda)
                 elif opcao in mapa_opcoes:
                     mapa_opcoes[opcao]()
@@ -285,6 +508,54 @@ class ControladorVenda(BuscaProdutoMixin):
                     ProdutoNaoEmEstoqueException, EstoqueInsuficienteException) as e:
                 self.__tela_venda.mostra_mensagem(f"ERRO: {e}")
 
+    @property
+    def __estoque(self) -> Estoque:
+        return self._controlador_sistema.controlador_estoque.estoque
+
+    @staticmethod
+    def __quantidade_no_carrinho(venda: Venda, id_produto: int) -> int:
+        """
+        Soma as unidades do produto no carrinho da venda, identificando-o
+        pelo ID (o mesmo usado pelas reservas do estoque).
+        """
+        return sum(quantidade for produto, quantidade in venda.carrinho.items()
+                   if produto.id == id_produto)
+
+    def __renovar_reservas(self, venda: Venda) -> None:
+        """
+        Reserva no estoque as quantidades do carrinho de uma venda em
+        andamento. Produtos sem unidades disponíveis permanecem no carrinho,
+        sem reserva, e o usuário é avisado; a disponibilidade volta a ser
+        validada na finalização.
+        """
+        for id_produto in {produto.id for produto in venda.carrinho}:
+            try:
+                self.__estoque.ajustar_reserva(
+                    venda.id_venda, id_produto, self.__quantidade_no_carrinho(venda, id_produto))
+            except (ProdutoNaoEmEstoqueException, EstoqueInsuficienteException) as e:
+                self.__tela_venda.mostra_mensagem(f"ATENÇÃO: não foi possível reservar. {e}")
+
+    def __resolver_cliente(self, id_cliente: int) -> Optional[Cliente]:
+        """
+        Resolve o cliente de uma venda persistida através do ControladorCliente,
+        garantindo que a venda reidratada use a mesma instância do cadastro.
+        Retorna None se o cliente tiver sido excluído.
+        """
+        try:
+            return self._controlador_sistema.controlador_cliente.pega_cliente_por_id(id_cliente)
+        except ClienteNaoEncontradoException:
+            return None
+
+    def __resolver_produto(self, id_produto: int) -> Optional[Produto]:
+        """
+        Resolve um produto do carrinho de uma venda persistida usando o mixin
+        de busca. Retorna None se o produto tiver sido excluído.
+        """
+        try:
+            return self.pega_produto_por_id(id_produto)
+        except ProdutoNaoEncontradoException:
+            return None
+
     def __salvar_venda(self, venda: Venda) -> None:
         """
         Persiste estado atualizado da venda no repositório. Chamado após
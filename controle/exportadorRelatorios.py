@@ -0,0 +1,148 @@
+"""
+    Gravação dos relatórios em arquivo, em fluxo, com saídas intercambiáveis.
+
+    Os registros de um relatório chegam de um gerador e são gravados em
+    blocos de `TAMANHO_BLOCO`, sem que o relatório inteiro precise estar em
+    memória. Há três saídas:
+    - `SaidaTexto`: o arquivo .txt legível, com cabeçalho e rodapé, a partir
+      das linhas já formatadas do relatório
+    - `SaidaCSV`: cabeçalho com os nomes das colunas e um registro por linha
+    - `SaidaJSONL`: um objeto JSON por linha, com os valores já tipados
+
+    As saídas estruturadas (CSV e JSONL) recebem colunas tipadas e gravam ao
+    lado do arquivo um esquema (`<arquivo>.schema.json`, no formato Table
+    Schema) com o nome e o tipo de cada coluna, para que ferramentas externas
+    carreguem exportações grandes sem inferir tipos.
+    """
+
+import csv
+import datetime
+import json
+from itertools import islice
+from typing import Iterable, Iterator, List, Sequence, TextIO, Tuple
+
+# Tipos de coluna (nomes do Table Schema)
+TIPO_INTEIRO = "integer"
+TIPO_DECIMAL = "number"
+TIPO_TEXTO = "string"
+TIPO_DATA_HORA = "datetime"
+
+# (nome, tipo) de uma coluna
+Coluna = Tuple[str, str]
+
+TAMANHO_BLOCO = 1000
+
+
+def _blocos(registros: Iterable, tamanho: int = TAMANHO_BLOCO) -> Iterator[list]:
+    iterador = iter(registros)
+    while True:
+        bloco = list(islice(iterador, tamanho))
+        if not bloco:
+            return
+        yield bloco
+
+
+def _valor_serializavel(valor):
+    if isinstance(valor, datetime.datetime):
+        return valor.isoformat(timespec='seconds')
+    return valor
+
+
+class SaidaTexto:
+    extensao = ".txt"
+
+    def escrever(self, arquivo: TextIO, titulo: str, linhas: Iterable[str]) -> int:
+        """
+        Grava o relatório legível: cabeçalho com o título, as linhas
+        formatadas e o rodapé com a data de geração. Retorna o número de
+        linhas gravadas.
+        """
+        arquivo.write("=" * 60 + "\n")
+        arquivo.write(f"{titulo.upper()}\n")
+        arquivo.write("=" * 60 + "\n\n")
+        total = 0
+        for bloco in _blocos(linhas):
+            if total:
+                arquivo.write("\n")
+            arquivo.write("\n".join(bloco))
+            total += len(bloco)
+        arquivo.write(f"\n\n{'=' * 60}\n")
+        arquivo.write(f"Gerado em: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
+        return total
+
+
+class SaidaCSV:
+    extensao = ".csv"
+
+    def escrever(self, arquivo: TextIO, colunas: Sequence[Coluna],
+                 registros: Iterable[tuple]) -> int:
+        """
+        Grava o cabeçalho com os nomes das colunas e os registros, um por
+        linha. Datas vão no formato ISO 8601 e valores ausentes ficam vazios.
+        Retorna o número de registros gravados.
+        """
+        escritor = csv.writer(arquivo)
+        escritor.writerow([nome for nome, _ in colunas])
+        total = 0
+        for bloco in _blocos(registros):
+            escritor.writerows([_valor_serializavel(valor) for valor in registro]
+                               for registro in bloco)
+            total += len(bloco)
+        return total
+
+
+class SaidaJSONL:
+    extensao = ".jsonl"
+
+    def escrever(self, arquivo: TextIO, colunas: Sequence[Coluna],
+                 registros: Iterable[tuple]) -> int:
+        """
+        Grava um objeto JSON por registro, com as colunas como chaves. Datas
+        vão no formato ISO 8601 e valores ausentes como null. Retorna o
+        número de registros gravados.
+        """
+        nomes = [nome for nome, _ in colunas]
+        total = 0
+        for bloco in _blocos(registros):
+            arquivo.write("".join(
+                json.dumps(dict(zip(nomes, map(_valor_serializavel, registro))),
+                           ensure_ascii=False) + "\n"
+                for registro in bloco))
+            total += len(bloco)
+        return total
+
+
+SAIDAS_ESTRUTURADAS = {'csv': SaidaCSV, 'jsonl': SaidaJSONL}
+
+
+def esquema(colunas: Sequence[Coluna]) -> dict:
+    """
+    Esquema das colunas no formato Table Schema.
+    """
+    return {'fields': [{'name': nome, 'type': tipo} for nome, tipo in colunas]}
+
+
+def exportar_texto(caminho: str, titulo: str, linhas: Iterable[str]) -> int:
+    """
+    Grava o relatório legível em `caminho`. Retorna o número de linhas.
+    """
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        return SaidaTexto().escrever(arquivo, titulo, linhas)
+
+
+def exportar_estruturado(caminho: str, formato: str, colunas: List[Coluna],
+                         registros: Iterable[tuple]) -> int:
+    """
+    Grava os registros em `caminho` no formato informado ('csv' ou 'jsonl')
+    e o esquema das colunas em `<caminho>.schema.json`. Retorna o número de
+    registros gravados. Lança ValueError se o formato for desconhecido.
+    """
+    try:
+        saida = SAIDAS_ESTRUTURADAS[formato]()
+    except KeyError:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    with open(caminho, 'w', encoding='utf-8', newline='') as arquivo:
+        total = saida.escrever(arquivo, colunas, registros)
+    with open(caminho + ".schema.json", 'w', encoding='utf-8') as arquivo:
+        json.dump(esquema(colunas), arquivo, ensure_ascii=False, indent=2)
+    return total
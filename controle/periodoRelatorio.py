@@ -0,0 +1,148 @@
+"""
+    Período de apuração dos relatórios de vendas.
+
+    Um período é uma faixa de datas [inicio, fim), onde qualquer um dos
+    limites pode ficar em aberto, e uma granularidade opcional (dia, semana
+    ou mês) que divide a faixa em intervalos consecutivos, cada um apurado
+    separadamente. As semanas começam na segunda-feira.
+
+    Os limites são comparados com a data de finalização das vendas, e a
+    apuração de cada intervalo é feita por busca binária sobre a tabela de
+    fatos (ordenada por data), de modo que um relatório dos últimos dias não
+    percorre o histórico mais antigo.
+    """
+
+import datetime
+from typing import Iterator, Optional, Tuple
+
+GRANULARIDADE_DIA = "dia"
+GRANULARIDADE_SEMANA = "semana"
+GRANULARIDADE_MES = "mes"
+GRANULARIDADES = (GRANULARIDADE_DIA, GRANULARIDADE_SEMANA, GRANULARIDADE_MES)
+
+_DESCRICOES_GRANULARIDADE = {
+    GRANULARIDADE_DIA: "por dia",
+    GRANULARIDADE_SEMANA: "por semana",
+    GRANULARIDADE_MES: "por mês",
+}
+
+
+class PeriodoRelatorio:
+    def __init__(self, inicio: Optional[datetime.datetime] = None,
+                 fim: Optional[datetime.datetime] = None,
+                 granularidade: Optional[str] = None) -> None:
+        """
+        Inicializa o período. `fim` é exclusivo; `None` em um limite deixa o
+        período aberto daquele lado. Lança ValueError se a granularidade for
+        desconhecida ou se o início não for anterior ao fim.
+        """
+        if granularidade is not None and granularidade not in GRANULARIDADES:
+            raise ValueError(f"Granularidade inválida: {granularidade}")
+        if inicio is not None and fim is not None and inicio >= fim:
+            raise ValueError("O início do período deve ser anterior ao fim.")
+        self.__inicio = inicio
+        self.__fim = fim
+        self.__granularidade = granularidade
+
+    @classmethod
+    def ultimos_dias(cls, dias: int, granularidade: Optional[str] = None,
+                     agora: Optional[datetime.datetime] = None) -> "PeriodoRelatorio":
+        """
+        Período que começa à meia-noite de `dias - 1` dias atrás (incluindo
+        o dia de hoje) e fica aberto no fim.
+        """
+        agora = agora if agora is not None else datetime.datetime.now()
+        hoje = agora.replace(hour=0, minute=0, second=0, microsecond=0)
+        return cls(hoje - datetime.timedelta(days=dias - 1), None, granularidade)
+
+    @property
+    def inicio(self) -> Optional[datetime.datetime]:
+        return self.__inicio
+
+    @property
+    def fim(self) -> Optional[datetime.datetime]:
+        return self.__fim
+
+    @property
+    def granularidade(self) -> Optional[str]:
+        return self.__granularidade
+
+    def __eq__(self, outro) -> bool:
+        if not isinstance(outro, PeriodoRelatorio):
+            return NotImplemented
+        return ((self.__inicio, self.__fim, self.__granularidade)
+                == (outro.__inicio, outro.__fim, outro.__granularidade))
+
+    def __hash__(self) -> int:
+        return hash((self.__inicio, self.__fim, self.__granularidade))
+
+    def descricao(self) -> str:
+        """
+        Descrição curta do período para títulos, ex: "01/10/2026 a
+        15/10/2026, por semana". O fim exibido é o último dia incluído.
+        """
+        formato = '%d/%m/%Y'
+        if self.__inicio is not None and self.__fim is not None:
+            texto = (f"{self.__inicio.strftime(formato)} a "
+                     f"{(self.__fim - datetime.timedelta(microseconds=1)).strftime(formato)}")
+        elif self.__inicio is not None:
+            texto = f"desde {self.__inicio.strftime(formato)}"
+        elif self.__fim is not None:
+            texto = f"até {(self.__fim - datetime.timedelta(microseconds=1)).strftime(formato)}"
+        else:
+            texto = "todo o histórico"
+        if self.__granularidade is not None:
+            texto += f", {_DESCRICOES_GRANULARIDADE[self.__granularidade]}"
+        return texto
+
+    def intervalos(self, primeira_data: Optional[datetime.datetime],
+                   ultima_data: Optional[datetime.datetime]
+                   ) -> Iterator[Tuple[Optional[str], Optional[datetime.datetime],
+                                       Optional[datetime.datetime]]]:
+        """
+        Gera os intervalos (rotulo, inicio, fim) a apurar, em ordem
+        cronológica, com `fim` exclusivo. Sem granularidade, o próprio
+        período é o único intervalo (sem rótulo). Com ela, os limites em
+        aberto são fechados pela primeira e pela última data com vendas
+        (`primeira_data`/`ultima_data`); sem vendas, nada é gerado.
+        """
+        if self.__granularidade is None:
+            yield None, self.__inicio, self.__fim
+            return
+        if primeira_data is None or ultima_data is None:
+            return
+
+        inicio = self.__inicio if self.__inicio is not None else primeira_data
+        fim = self.__fim
+        if fim is None or fim > ultima_data:
+            fim = ultima_data + datetime.timedelta(microseconds=1)
+
+        atual = self.__inicio_do_intervalo(inicio)
+        while atual < fim:
+            proximo = self.__proximo_intervalo(atual)
+            yield self.__rotulo(atual), max(atual, inicio), min(proximo, fim)
+            atual = proximo
+
+    def __rotulo(self, inicio_intervalo: datetime.datetime) -> str:
+        if self.__granularidade == GRANULARIDADE_SEMANA:
+            return f"Semana de {inicio_intervalo.strftime('%d/%m/%Y')}"
+        if self.__granularidade == GRANULARIDADE_MES:
+            return inicio_intervalo.strftime('%m/%Y')
+        return inicio_intervalo.strftime('%d/%m/%Y')
+
+    def __inicio_do_intervalo(self, data: datetime.datetime) -> datetime.datetime:
+        dia = data.replace(hour=0, minute=0, second=0, microsecond=0)
+        if self.__granularidade == GRANULARIDADE_SEMANA:
+            return dia - datetime.timedelta(days=dia.weekday())
+        if self.__granularidade == GRANULARIDADE_MES:
+            return dia.replace(day=1)
+        return dia
+
+    def __proximo_intervalo(self, data: datetime.datetime) -> datetime.datetime:
+        if self.__granularidade == GRANULARIDADE_SEMANA:
+            return data + datetime.timedelta(days=7)
+        if self.__granularidade == GRANULARIDADE_MES:
+            if data.month == 12:
+                return data.replace(year=data.year + 1, month=1)
+            return data.replace(month=data.month + 1)
+        return data + datetime.timedelta(days=1)
@@ -0,0 +1,306 @@
+"""
+    Tabela de fatos colunar com as linhas das vendas finalizadas.
+
+    Cada item de carrinho de uma venda finalizada vira uma linha, guardada
+    em colunas tipadas (`array`) em vez de objetos: ID da venda, ID do
+    cliente, ID do produto, tipo do produto (café, máquina ou outro, este
+    apenas para produtos excluídos em vendas antigas, sem tipo registrado),
+    fornecedor (código de um dicionário de CNPJs), quantidade, preço
+    unitário, valor total da venda (apenas na primeira linha de cada venda)
+    e data da venda (timestamp).
+
+    As consultas de agregação são feitas como group-bys vetorizados com
+    NumPy (`np.unique` com `return_inverse` e `np.bincount`), lendo as
+    colunas sem cópia através do protocolo de buffer. O NumPy é opcional:
+    sem ele, as mesmas consultas são feitas com laços sobre as colunas.
+
+    A tabela é montada a partir do histórico de vendas e recebe as linhas
+    de cada nova venda finalizada, mantendo as linhas em ordem de data: a
+    coluna de datas serve de índice ordenado, e as consultas por período
+    localizam a faixa de linhas com busca binária (`bisect`), sem percorrer
+    as linhas fora dela. Uma venda com data anterior à última linha (ex: um
+    histórico importado fora de ordem) é inserida na sua posição.
+    """
+
+import datetime
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from controle.agregadorVendas import AgregadosVendas
+from entidade.produto_removido import ProdutoRemovido
+from entidade.venda import Venda
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional
+    np = None
+
+NUMPY_DISPONIVEL = np is not None
+
+# Valores da coluna de tipo do produto
+TIPO_OUTRO = 0
+TIPO_CAFE = 1
+TIPO_MAQUINA = 2
+# Código da coluna de fornecedor para produtos sem fornecedor
+SEM_FORNECEDOR = -1
+# Tipo registrado na venda (ver ProdutoRemovido.classificar) -> valor da coluna
+_CODIGOS_TIPO = {ProdutoRemovido.TIPO_CAFE: TIPO_CAFE, ProdutoRemovido.TIPO_MAQUINA: TIPO_MAQUINA}
+# Folga de chaves além do número de linhas para agrupar com bincount direto
+LIMITE_CHAVES_DENSAS = 1 << 16
+
+
+class TabelaFatosVendas:
+    # Coluna -> código de tipo do array (e dtype NumPy correspondente)
+    COLUNAS = {
+        'id_venda': 'q',
+        'id_cliente': 'q',
+        'id_produto': 'q',
+        'tipo_produto': 'b',
+        'fornecedor': 'q',
+        'quantidade': 'q',
+        'preco_unitario': 'd',
+        'valor_venda': 'd',
+        'data': 'd',
+    }
+    _DTYPES = {'q': 'int64', 'b': 'int8', 'd': 'float64'}
+
+    def __init__(self, usar_numpy: bool = NUMPY_DISPONIVEL) -> None:
+        """
+        Inicializa a tabela vazia. `usar_numpy` permite desligar as
+        consultas vetorizadas mesmo com o NumPy instalado.
+        """
+        if usar_numpy and not NUMPY_DISPONIVEL:
+            raise ValueError("O NumPy não está instalado.")
+        self.__usar_numpy = usar_numpy
+        self.__colunas: Dict[str, array] = {nome: array(codigo)
+                                            for nome, codigo in self.COLUNAS.items()}
+        self.__cnpjs: List[str] = []  # Código do fornecedor -> CNPJ
+        self.__codigos_fornecedores: Dict[str, int] = {}
+        self.__nomes_produtos: Dict[int, str] = {}
+        self.__nomes_fornecedores: Dict[str, str] = {}
+        self.__trava = threading.Lock()
+
+    @classmethod
+    def de_vendas(cls, vendas: Iterable[Venda], usar_numpy: bool = NUMPY_DISPONIVEL
+                  ) -> "TabelaFatosVendas":
+        """
+        Monta a tabela a partir das vendas informadas, ignorando as que não
+        estão finalizadas, com as linhas ordenadas pela data da venda.
+        """
+        tabela = cls(usar_numpy)
+        finalizadas = [venda for venda in vendas if venda.status_venda == "Finalizada"]
+        finalizadas.sort(key=cls.__timestamp)
+        for venda in finalizadas:
+            tabela.adicionar_venda(venda)
+        return tabela
+
+    def __len__(self) -> int:
+        return len(self.__colunas['id_venda'])
+
+    def adicionar_venda(self, venda: Venda) -> None:
+        """
+        Acrescenta as linhas do carrinho de uma venda finalizada, na posição
+        correspondente à sua data (normalmente o fim da tabela).
+        """
+        data = self.__timestamp(venda)
+        with self.__trava:
+            colunas = self.__colunas
+            datas = colunas['data']
+            # Linhas de vendas com a mesma data ficam na ordem de chegada
+            posicao = len(datas) if not datas or datas[-1] <= data else bisect_right(datas, data)
+            valor_venda = venda.valor_total
+            for produto, quantidade in venda.carrinho.items():
+                tipo_registrado, empresa = ProdutoRemovido.classificar(produto)
+                tipo = _CODIGOS_TIPO.get(tipo_registrado, TIPO_OUTRO)
+                fornecedor = SEM_FORNECEDOR
+                if tipo != TIPO_OUTRO:
+                    self.__nomes_produtos[produto.id] = produto.nome
+                    if empresa is not None:
+                        fornecedor = self.__codigo_fornecedor(*empresa)
+                linha = {
+                    'id_venda': venda.id_venda,
+                    'id_cliente': venda.cliente.id,
+                    'id_produto': produto.id,
+                    'tipo_produto': tipo,
+                    'fornecedor': fornecedor,
+                    'quantidade': quantidade,
+                    'preco_unitario': produto.preco_venda,
+                    'valor_venda': valor_venda,
+                    'data': data,
+                }
+                if posicao == len(datas):
+                    for nome, valor in linha.items():
+                        colunas[nome].append(valor)
+                else:
+                    for nome, valor in linha.items():
+                        colunas[nome].insert(posicao, valor)
+                posicao += 1
+                # O valor da venda é contado uma única vez, na primeira linha
+                valor_venda = 0.0
+
+    def agregar(self, inicio: int = 0, fim: Optional[int] = None) -> AgregadosVendas:
+        """
+        Calcula os agregados dos relatórios sobre as linhas no intervalo
+        [inicio, fim) (a tabela inteira por padrão).
+        """
+        with self.__trava:
+            return self.__agregar(inicio, len(self) if fim is None else fim)
+
+    def agregar_periodo(self, inicio: Optional[datetime.datetime] = None,
+                        fim: Optional[datetime.datetime] = None) -> AgregadosVendas:
+        """
+        Calcula os agregados das vendas finalizadas em [inicio, fim); um
+        limite `None` deixa o período aberto daquele lado.
+        """
+        with self.__trava:
+            return self.__agregar(*self.__linhas_do_periodo(inicio, fim))
+
+    def ids_vendas_periodo(self, inicio: Optional[datetime.datetime] = None,
+                           fim: Optional[datetime.datetime] = None) -> List[int]:
+        """
+        IDs das vendas finalizadas em [inicio, fim), em ordem de data.
+        """
+        with self.__trava:
+            primeira, ultima = self.__linhas_do_periodo(inicio, fim)
+            ids = self.__colunas['id_venda']
+            # As linhas de uma venda são contíguas: basta pegar cada troca de ID
+            return [ids[indice] for indice in range(primeira, ultima)
+                    if indice == primeira or ids[indice] != ids[indice - 1]]
+
+    def datas_extremas(self) -> Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]:
+        """
+        Datas da venda mais antiga e da mais recente da tabela, ou (None,
+        None) se ela estiver vazia.
+        """
+        with self.__trava:
+            datas = self.__colunas['data']
+            if not datas:
+                return None, None
+            return (datetime.datetime.fromtimestamp(datas[0]),
+                    datetime.datetime.fromtimestamp(datas[-1]))
+
+    def __linhas_do_periodo(self, inicio: Optional[datetime.datetime],
+                            fim: Optional[datetime.datetime]) -> Tuple[int, int]:
+        datas = self.__colunas['data']
+        primeira = 0 if inicio is None else bisect_left(datas, inicio.timestamp())
+        ultima = len(datas) if fim is None else bisect_left(datas, fim.timestamp())
+        return primeira, max(primeira, ultima)
+
+    def __agregar(self, inicio: int, fim: int) -> AgregadosVendas:
+        if self.__usar_numpy:
+            estado = self.__agregar_numpy(inicio, fim)
+        else:
+            estado = self.__agregar_laco(inicio, fim)
+        estado['nomes_produtos'] = dict(self.__nomes_produtos)
+        estado['nomes_fornecedores'] = dict(self.__nomes_fornecedores)
+        return AgregadosVendas.de_estado(estado)
+
+    def __agregar_numpy(self, inicio: int, fim: int) -> dict:
+        colunas = {nome: np.frombuffer(coluna, dtype=self._DTYPES[coluna.typecode])[inicio:fim]
+                   for nome, coluna in self.__colunas.items()}
+        quantidade = colunas['quantidade']
+        tipo = colunas['tipo_produto']
+        fornecedor = colunas['fornecedor']
+        cafes = tipo == TIPO_CAFE
+        maquinas = tipo == TIPO_MAQUINA
+        com_fornecedor = fornecedor != SEM_FORNECEDOR
+        unidades_por_codigo = self.__somar_por_numpy(
+            fornecedor[com_fornecedor], quantidade[com_fornecedor], inteiro=True)
+        return {
+            'receita_total': float(colunas['valor_venda'].sum()),
+            'quantidade_vendas': self.__contar_vendas_numpy(colunas['id_venda']),
+            'unidades_por_cafe': self.__somar_por_numpy(
+                colunas['id_produto'][cafes], quantidade[cafes], inteiro=True),
+            'unidades_por_maquina': self.__somar_por_numpy(
+                colunas['id_produto'][maquinas], quantidade[maquinas], inteiro=True),
+            'unidades_por_fornecedor': {self.__cnpjs[codigo]: unidades
+                                        for codigo, unidades in unidades_por_codigo.items()},
+            'gasto_por_cliente': self.__somar_por_numpy(
+                colunas['id_cliente'], colunas['valor_venda'], inteiro=False),
+        }
+
+    @staticmethod
+    def __contar_vendas_numpy(ids_vendas) -> int:
+        """
+        As linhas de uma venda são sempre contíguas, então cada troca de ID
+        entre linhas vizinhas marca o início de uma nova venda.
+        """
+        if not ids_vendas.size:
+            return 0
+        return int(np.count_nonzero(ids_vendas[1:] != ids_vendas[:-1])) + 1
+
+    @staticmethod
+    def __somar_por_numpy(chaves, pesos, inteiro: bool) -> dict:
+        """
+        Group-by vetorizado: soma os pesos de cada chave distinta. As chaves
+        são devolvidas na ordem da primeira ocorrência, como no laço.
+
+        Chaves inteiras não negativas e pouco espalhadas (IDs, códigos de
+        fornecedor) são agrupadas direto com `np.bincount`, sem ordenação;
+        as demais passam por `np.unique` com `return_inverse`.
+        """
+        if chaves.size and chaves.min() >= 0 and chaves.max() < LIMITE_CHAVES_DENSAS + chaves.size:
+            somas = np.bincount(chaves, weights=pesos)
+            primeiras = np.full(somas.size, chaves.size, dtype=np.int64)
+            np.minimum.at(primeiras, chaves, np.arange(chaves.size))
+            presentes = np.flatnonzero(primeiras < chaves.size)
+            ordem = presentes[np.argsort(primeiras[presentes], kind='stable')]
+            unicas = ordem
+        else:
+            unicas, primeiras, inverso = np.unique(chaves, return_index=True, return_inverse=True)
+            somas = np.bincount(inverso, weights=pesos, minlength=unicas.size)
+            ordem = np.argsort(primeiras, kind='stable')
+            unicas = unicas[ordem]
+        somas = somas[ordem]
+        if inteiro:
+            somas = np.rint(somas).astype(np.int64)
+        return dict(zip(unicas.tolist(), somas.tolist()))
+
+    def __agregar_laco(self, inicio: int, fim: int) -> dict:
+        colunas = self.__colunas
+        unidades_por_cafe: Dict[int, int] = {}
+        unidades_por_maquina: Dict[int, int] = {}
+        unidades_por_fornecedor: Dict[str, int] = {}
+        gasto_por_cliente: Dict[int, float] = {}
+        vendas = set()
+        receita_total = 0.0
+        for indice in range(inicio, fim):
+            vendas.add(colunas['id_venda'][indice])
+            valor_venda = colunas['valor_venda'][indice]
+            id_cliente = colunas['id_cliente'][indice]
+            receita_total += valor_venda
+            gasto_por_cliente[id_cliente] = gasto_por_cliente.get(id_cliente, 0) + valor_venda
+            tipo = colunas['tipo_produto'][indice]
+            if tipo == TIPO_OUTRO:
+                continue
+            unidades = unidades_por_cafe if tipo == TIPO_CAFE else unidades_por_maquina
+            id_produto = colunas['id_produto'][indice]
+            quantidade = colunas['quantidade'][indice]
+            unidades[id_produto] = unidades.get(id_produto, 0) + quantidade
+            codigo = colunas['fornecedor'][indice]
+            if codigo != SEM_FORNECEDOR:
+                cnpj = self.__cnpjs[codigo]
+                unidades_por_fornecedor[cnpj] = unidades_por_fornecedor.get(cnpj, 0) + quantidade
+        return {
+            'receita_total': receita_total,
+            'quantidade_vendas': len(vendas),
+            'unidades_por_cafe': unidades_por_cafe,
+            'unidades_por_maquina': unidades_por_maquina,
+            'unidades_por_fornecedor': unidades_por_fornecedor,
+            'gasto_por_cliente': gasto_por_cliente,
+        }
+
+    def __codigo_fornecedor(self, cnpj: str, nome: str) -> int:
+        codigo = self.__codigos_fornecedores.get(cnpj)
+        if codigo is None:
+            codigo = len(self.__cnpjs)
+            self.__cnpjs.append(cnpj)
+            self.__codigos_fornecedores[cnpj] = codigo
+        self.__nomes_fornecedores[cnpj] = nome
+        return codigo
+
+    @staticmethod
+    def __timestamp(venda: Venda) -> float:
+        return venda.data_venda.timestamp() if venda.data_venda is not None else 0.0
@@ -2,12 +2,68 @@
     Gerencia o inventário de todos os produtos do sistema.
 
     Esta classe atua como um repositório centralizado para o controle de
-    quantidades de produtos. Ela utiliza um dicionário (`__produtos_em_estoque`)
-    para mapear objetos `Produto` (sejam `Cafe` ou `MaquinaDeCafe`) às suas
-    respectivas quantidades disponíveis.
+    quantidades de produtos. As quantidades são indexadas pelo ID do produto
+    e guardadas em um vetor compacto (`array('q')`): cada produto ocupa um
+    slot, e um dicionário mapeia o ID para o slot correspondente. Slots de
+    produtos retirados do estoque são reaproveitados por novos cadastros.
+
+    Os objetos `Produto` (sejam `Cafe` ou `MaquinaDeCafe`) são necessários
+    apenas para exibição; quando um resolvedor é informado, o produto é
+    obtido pelo ID no momento da consulta, refletindo a versão atual.
+
+    O estado completo é exportado como os buffers brutos dos dois vetores
+    (IDs por slot e quantidades por slot), sem montar dicionários a cada
+    alteração, e restaurado nos mesmos slots, mantendo a disposição estável
+    entre execuções.
+
+    Concorrência: o estoque pode ser usado por vários caixas (threads) ao
+    mesmo tempo. Cada produto pertence a uma listra de trava, escolhida pelo
+    ID; operações sobre produtos diferentes só disputam a mesma trava quando
+    caem na mesma listra. Operações com vários produtos adquirem as listras
+    em ordem crescente, e alterações na disposição dos slots usam ainda uma
+    trava de estrutura, sempre adquirida por último (ver entidade/travas.py
+    para a ordem completa). As notificações de alteração são feitas sem
+    nenhuma trava do estoque e podem ocorrer em várias threads ao mesmo
+    tempo: quem persiste o estado deve exportá-lo sob a sua própria trava de
+    gravação (o controlador exporta dentro do lote do DAO), de modo que a
+    última persistência sempre reflete o estado mais recente.
+
+    Reservas: quantidades colocadas no carrinho de uma venda em andamento
+    ficam reservadas para ela por um tempo limitado (TTL), renovado a cada
+    alteração das reservas da venda. A quantidade reservada de cada produto
+    fica em um terceiro vetor paralelo aos slots, de modo que a quantidade
+    disponível (em estoque - reservada) é obtida em O(1). Os vencimentos
+    ficam em um heap por instante de expiração e são processados sempre que
+    uma operação consulta a disponibilidade; reservas de vendas abandonadas
+    são assim liberadas automaticamente. As reservas têm trava própria,
+    adquirida depois das listras, e não são persistidas.
+
+    Encomendas: uma venda que não pôde ser finalizada por falta de estoque
+    pode ser registrada como encomenda. As unidades disponíveis no momento
+    ficam reservadas para ela sem prazo, e o que falta entra em uma fila FIFO
+    por produto. Quando um produto é reposto, apenas a fila desse produto é
+    percorrida, alocando as novas unidades às encomendas mais antigas; as
+    encomendas completamente alocadas são repassadas ao callback de
+    encomendas atendidas, que finaliza a venda. O estado das encomendas
+    (faltas, alocações e ordem das filas) é exportado para persistência.
+
+    Estoque baixo: cada produto tem um limite de reposição (por padrão
+    `LIMITE_REPOSICAO_PADRAO`; os limites definidos são exportados para
+    persistência). Um índice com os IDs dos produtos cuja quantidade está no
+    limite ou abaixo dele é atualizado a cada alteração de quantidade ou de
+    limite, de modo que a consulta custa apenas o tamanho do resultado. Quando
+    uma retirada leva um produto de acima do limite para o limite ou abaixo
+    dele (inclusive a zero), o callback de estoque baixo é chamado, após a
+    liberação das travas.
     """
 
-from typing import Callable, Dict, Optional
+import heapq
+import threading
+import time
+from array import array
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
 
 from entidade.produto import Produto
 from Excecoes.estoqueInsuficienteException import EstoqueInsuficienteException
@@ -15,21 +71,75 @@ from Excecoes.produtoNaoEmEstoqueException import ProdutoNaoEmEstoqueException
 
 
 class Estoque:
-    def __init__(self) -> None:
+    # Valor gravado no vetor de IDs para slots livres
+    SLOT_LIVRE = -1
+    # Quantidade padrão de listras de trava por produto
+    LISTRAS_PADRAO = 64
+    # Tempo padrão, em segundos, que uma reserva dura sem ser renovada
+    TTL_RESERVA_PADRAO = 15 * 60
+    # Quantidade a partir da qual (inclusive) um produto está com estoque baixo
+    LIMITE_REPOSICAO_PADRAO = 5
+
+    def __init__(self, resolver_produto: Optional[Callable[[int], Optional[Produto]]] = None,
+                 listras: int = LISTRAS_PADRAO, ttl_reserva: float = TTL_RESERVA_PADRAO,
+                 relogio: Callable[[], float] = time.monotonic) -> None:
         """
-        Inicializa estoque vazio com dicionário para mapear produtos para
-        quantidades. Callback de alteração inicia como None e pode ser
-        registrado pelo controlador para persistência automática.
+        Inicializa estoque vazio. O resolvedor opcional recebe um ID e
+        retorna o produto correspondente (ou None), sendo usado apenas para
+        exibição. `listras` define em quantas travas os produtos são
+        distribuídos (1 equivale a uma única trava global). `ttl_reserva`
+        define por quantos segundos as reservas de uma venda valem sem
+        renovação, medidos pelo `relogio` informado. Callback de alteração
+        inicia como None e pode ser registrado pelo controlador para
+        persistência automática.
         """
-        self.__produtos_em_estoque = {}
-        self.__callback_alteracao: Optional[Callable[[
-            Dict[Produto, int]], None]] = None
+        if listras < 1:
+            raise ValueError("O estoque precisa de ao menos uma listra de trava.")
+        if ttl_reserva <= 0:
+            raise ValueError("O TTL das reservas deve ser positivo.")
+        self.__listras = [threading.Lock() for _ in range(listras)]
+        self.__trava_estrutura = threading.RLock()
+        self.__trava_reservas = threading.Lock()
+        self.__ids = array('q')  # Slot -> ID do produto (SLOT_LIVRE se vago)
+        self.__quantidades = array('q')  # Slot -> quantidade
+        self.__reservadas = array('q')  # Slot -> quantidade reservada
+        self.__reservas: Dict[int, Dict[int, int]] = {}  # Venda -> {ID do produto: quantidade}
+        self.__expiracao_por_venda: Dict[int, float] = {}
+        self.__fila_expiracao: List[Tuple[float, int]] = []  # Heap de (expiração, venda)
+        self.__ttl_reserva = ttl_reserva
+        self.__relogio = relogio
+        self.__encomendas: Dict[int, Dict[int, int]] = {}  # Venda -> {ID do produto: falta}
+        self.__filas_encomendas: Dict[int, Deque[int]] = {}  # ID do produto -> vendas (FIFO)
+        self.__volume_encomendado: Dict[int, int] = {}  # ID do produto -> unidades em falta
+        self.__versao_encomendas = 0
+        self.__callback_encomenda_atendida: Optional[Callable[[int], None]] = None
+        self.__slot_por_id: Dict[int, int] = {}
+        self.__slots_livres: List[int] = []
+        self.__produtos_por_id: Dict[int, Produto] = {}  # Últimas instâncias vistas
+        self.__resolver_produto = resolver_produto
+        self.__callback_alteracao: Optional[Callable[['Estoque'], None]] = None
+        self.__trava_estoque_baixo = threading.Lock()
+        self.__limites: Dict[int, int] = {}  # ID do produto -> limite (só os não padrão)
+        self.__estoque_baixo: Set[int] = set()  # IDs com quantidade <= limite
+        self.__versao_limites = 0
+        self.__callback_estoque_baixo: Optional[Callable[[int, int, int], None]] = None
 
     @property
     def produtos_em_estoque(self) -> dict:
-        return self.__produtos_em_estoque
+        """
+        Visão {Produto: quantidade} montada sob demanda para exibição e
+        relatórios. Produtos que não puderem ser resolvidos são omitidos.
+        """
+        with self.__trava_estrutura:
+            slots = list(self.__slot_por_id.items())
+        produtos = {}
+        for id_produto, slot in slots:
+            produto = self.__produto(id_produto)
+            if produto is not None:
+                produtos[produto] = self.__quantidades[slot]
+        return produtos
 
-    def definir_callback_alteracao(self, callback: Callable[[Dict[Produto, int]], None]) -> None:
+    def definir_callback_alteracao(self, callback: Callable[['Estoque'], None]) -> None:
         """
         Registra função callback a ser chamada automaticamente após qualquer
         alteração no estoque. Permite que o controlador seja notificado para
@@ -40,12 +150,409 @@ class Estoque:
 
     def __notificar_alteracao(self) -> None:
         """
-        Notifica callback registrado sobre alteração no estoque, passando
-        estado atual completo. Chamado internamente após cada modificação
-        para garantir persistência automática.
+        Notifica callback registrado sobre alteração no estoque, passando o
+        próprio estoque, do qual o estado pode ser exportado com
+        `exportar_buffers`. Chamado internamente após cada modificação para
+        garantir persistência automática, sem nenhuma trava do estoque
+        adquirida.
         """
         if self.__callback_alteracao:
-            self.__callback_alteracao(self.__produtos_em_estoque)
+            self.__callback_alteracao(self)
+
+    def exportar_buffers(self) -> Tuple[bytes, bytes]:
+        """
+        Retorna cópias dos buffers brutos (IDs por slot, quantidades por
+        slot), prontos para serialização.
+        """
+        with self.__trava_estrutura:
+            return self.__ids.tobytes(), self.__quantidades.tobytes()
+
+    def restaurar(self, ids: array, quantidades: array,
+                  produtos: Optional[Dict[int, Produto]] = None) -> None:
+        """
+        Substitui o conteúdo do estoque pelos vetores informados, mantendo
+        cada produto no mesmo slot. Se `produtos` for informado, slots de IDs
+        ausentes nele (produtos excluídos) são liberados. Não notifica o
+        callback.
+        """
+        if len(ids) != len(quantidades):
+            raise ValueError("Os vetores de IDs e quantidades devem ter o mesmo tamanho.")
+        with self.__travar_listras(range(len(self.__listras))), self.__trava_estrutura:
+            self.__restaurar(ids, quantidades, produtos)
+            with self.__trava_reservas:
+                self.__reservas.clear()
+                self.__expiracao_por_venda.clear()
+                self.__fila_expiracao.clear()
+                self.__encomendas.clear()
+                self.__filas_encomendas.clear()
+                self.__volume_encomendado.clear()
+                self.__versao_encomendas += 1
+
+    def __restaurar(self, ids: array, quantidades: array,
+                    produtos: Optional[Dict[int, Produto]]) -> None:
+        self.__ids = array('q', ids)
+        self.__quantidades = array('q', quantidades)
+        self.__reservadas = array('q', bytes(len(self.__quantidades) * self.__quantidades.itemsize))
+        self.__slot_por_id = {}
+        self.__slots_livres = []
+        self.__produtos_por_id = dict(produtos) if produtos is not None else {}
+        for slot, id_produto in enumerate(self.__ids):
+            vago = (id_produto == self.SLOT_LIVRE or self.__quantidades[slot] <= 0
+                    or (produtos is not None and id_produto not in produtos))
+            if vago:
+                self.__ids[slot] = self.SLOT_LIVRE
+                self.__quantidades[slot] = 0
+                self.__slots_livres.append(slot)
+            else:
+                self.__slot_por_id[id_produto] = slot
+        self.__reconstruir_estoque_baixo()
+
+    def quantidade(self, id_produto: int) -> int:
+        """
+        Retorna a quantidade em estoque do produto com o ID informado, ou 0
+        se ele não estiver cadastrado.
+        """
+        slot = self.__slot_por_id.get(id_produto)
+        return 0 if slot is None else self.__quantidades[slot]
+
+    def disponivel(self, id_produto: int) -> int:
+        """
+        Retorna a quantidade do produto que ainda pode ser vendida: a
+        quantidade em estoque menos a reservada pelos carrinhos em aberto.
+        """
+        slot = self.__slot_por_id.get(id_produto)
+        return 0 if slot is None else self.__quantidades[slot] - self.__reservadas[slot]
+
+    def reservas_da_venda(self, id_venda: int) -> Dict[int, int]:
+        """
+        Retorna uma cópia das reservas ativas da venda, {ID do produto:
+        quantidade}, vazia se ela não tiver reservas.
+        """
+        with self.__trava_reservas:
+            return dict(self.__reservas.get(id_venda, {}))
+
+    def ajustar_reserva(self, id_venda: int, id_produto: int, quantidade: int) -> None:
+        """
+        Define a quantidade do produto reservada para a venda, reservando ou
+        liberando apenas a diferença em relação à reserva atual (0 libera a
+        reserva do produto). Aumentos são validados contra a quantidade
+        disponível, lançando as mesmas exceções da retirada. Qualquer ajuste
+        renova o prazo de todas as reservas da venda.
+        """
+        if quantidade < 0:
+            raise ValueError("A quantidade reservada não pode ser negativa.")
+        self.processar_expiracoes()
+        with self.__travar_produtos([id_produto]):
+            with self.__trava_reservas:
+                atual = self.__reservas.get(id_venda, {}).get(id_produto, 0)
+            diferenca = quantidade - atual
+            slot = self.__slot_por_id.get(id_produto)
+            if diferenca > 0:
+                if slot is None:
+                    raise ProdutoNaoEmEstoqueException(self.__nome_produto(id_produto))
+                disponivel = self.__quantidades[slot] - self.__reservadas[slot]
+                if disponivel < diferenca:
+                    raise EstoqueInsuficienteException(
+                        self.__nome_produto(id_produto), quantidade, disponivel + atual)
+            if slot is not None:
+                self.__reservadas[slot] += diferenca
+            with self.__trava_reservas:
+                reservas = self.__reservas.setdefault(id_venda, {})
+                if quantidade:
+                    reservas[id_produto] = quantidade
+                else:
+                    reservas.pop(id_produto, None)
+                if reservas:
+                    expiracao = self.__relogio() + self.__ttl_reserva
+                    self.__expiracao_por_venda[id_venda] = expiracao
+                    heapq.heappush(self.__fila_expiracao, (expiracao, id_venda))
+                else:
+                    self.__descartar_venda(id_venda)
+
+    def liberar_reservas(self, id_venda: int) -> None:
+        """
+        Libera todas as reservas da venda. Usado quando a venda é cancelada.
+        Não faz nada se a venda não tiver reservas.
+        """
+        with self.__trava_reservas:
+            ids_produtos = list(self.__reservas.get(id_venda, ()))
+        if not ids_produtos:
+            return
+        with self.__travar_produtos(ids_produtos):
+            self.__liberar_reservas_travadas(id_venda, ids_produtos)
+
+    def processar_expiracoes(self) -> int:
+        """
+        Libera as reservas das vendas cujo prazo venceu e retorna quantas
+        vendas foram afetadas. Chamado automaticamente pelas operações que
+        consultam a disponibilidade; quando nada venceu, custa apenas a
+        consulta ao topo do heap.
+        """
+        agora = self.__relogio()
+        vencidas = []
+        with self.__trava_reservas:
+            while self.__fila_expiracao and self.__fila_expiracao[0][0] <= agora:
+                expiracao, id_venda = heapq.heappop(self.__fila_expiracao)
+                # Entradas de prazos já renovados são descartadas aqui
+                if self.__expiracao_por_venda.get(id_venda) == expiracao:
+                    vencidas.append((id_venda, expiracao, list(self.__reservas[id_venda])))
+        liberadas = 0
+        for id_venda, expiracao, ids_produtos in vencidas:
+            with self.__travar_produtos(ids_produtos):
+                with self.__trava_reservas:
+                    # A venda pode ter renovado as reservas enquanto as listras eram adquiridas
+                    if self.__expiracao_por_venda.get(id_venda) != expiracao:
+                        continue
+                self.__liberar_reservas_travadas(id_venda, ids_produtos)
+                liberadas += 1
+        return liberadas
+
+    def definir_callback_encomenda_atendida(self, callback: Callable[[int], None]) -> None:
+        """
+        Registra função chamada com o ID de cada venda cuja encomenda foi
+        completamente alocada, após a liberação das travas do estoque. O
+        callback deve finalizar a venda (consumindo as reservas com
+        `retirar_lote`) ou cancelar a encomenda.
+        """
+        self.__callback_encomenda_atendida = callback
+
+    @property
+    def versao_encomendas(self) -> int:
+        """
+        Contador incrementado a cada alteração nas encomendas, usado para
+        persistir o estado delas apenas quando mudou.
+        """
+        return self.__versao_encomendas
+
+    def registrar_encomenda(self, id_venda: int, quantidades_por_id: Dict[int, int]) -> Dict[int, int]:
+        """
+        Registra a venda como encomenda das quantidades informadas (o
+        carrinho completo, indexado pelo ID do produto). As reservas que a
+        venda já tem e as unidades livres de produtos sem fila de espera são
+        reservadas para ela sem prazo; o restante entra no fim da fila de
+        cada produto. Retorna as faltas, {ID do produto: quantidade}; se
+        estiver vazio, a encomenda já está atendida e a venda pode ser
+        finalizada.
+        """
+        for quantidade in quantidades_por_id.values():
+            if quantidade <= 0:
+                raise ValueError("A quantidade encomendada deve ser positiva.")
+        self.processar_expiracoes()
+        with self.__trava_reservas:
+            ids_reservados = list(self.__reservas.get(id_venda, ()))
+        with self.__travar_produtos(list(quantidades_por_id) + ids_reservados):
+            with self.__trava_reservas:
+                if id_venda in self.__encomendas:
+                    raise ValueError("A venda já está registrada como encomenda.")
+                # Reservas de encomendas não vencem
+                self.__expiracao_por_venda.pop(id_venda, None)
+                reservas = self.__reservas.setdefault(id_venda, {})
+                faltas = {}
+                for id_produto in ids_reservados:
+                    if id_produto not in quantidades_por_id:
+                        self.__ajustar_reservada(id_produto, -reservas.pop(id_produto))
+                for id_produto, necessaria in quantidades_por_id.items():
+                    atual = reservas.get(id_produto, 0)
+                    slot = self.__slot_por_id.get(id_produto)
+                    livre = 0
+                    # Unidades livres só são tomadas se ninguém aguarda o produto
+                    if slot is not None and not self.__volume_encomendado.get(id_produto):
+                        livre = max(0, self.__quantidades[slot] - self.__reservadas[slot])
+                    alocada = min(necessaria, atual + livre)
+                    self.__ajustar_reservada(id_produto, alocada - atual)
+                    if alocada:
+                        reservas[id_produto] = alocada
+                    else:
+                        reservas.pop(id_produto, None)
+                    if alocada < necessaria:
+                        faltas[id_produto] = necessaria - alocada
+                        self.__filas_encomendas.setdefault(id_produto, deque()).append(id_venda)
+                        self.__volume_encomendado[id_produto] = (
+                            self.__volume_encomendado.get(id_produto, 0) + faltas[id_produto])
+                if not reservas:
+                    del self.__reservas[id_venda]
+                self.__encomendas[id_venda] = dict(faltas)
+                self.__versao_encomendas += 1
+        self.__notificar_alteracao()
+        return faltas
+
+    def cancelar_encomenda(self, id_venda: int) -> bool:
+        """
+        Retira a venda das filas de encomenda e libera as unidades já
+        alocadas a ela. Retorna False se a venda não era uma encomenda.
+        """
+        with self.__trava_reservas:
+            if id_venda not in self.__encomendas:
+                return False
+            ids_produtos = list(self.__reservas.get(id_venda, ()))
+        with self.__travar_produtos(ids_produtos):
+            self.__liberar_reservas_travadas(id_venda, ids_produtos)
+            with self.__trava_reservas:
+                self.__descartar_encomenda(id_venda)
+        self.__notificar_alteracao()
+        return True
+
+    def encomenda_da_venda(self, id_venda: int) -> Optional[Dict[int, int]]:
+        """
+        Retorna uma cópia das faltas da encomenda da venda, {ID do produto:
+        quantidade} (vazia se ela já foi completamente alocada), ou None se
+        a venda não é uma encomenda.
+        """
+        with self.__trava_reservas:
+            faltas = self.__encomendas.get(id_venda)
+            return dict(faltas) if faltas is not None else None
+
+    def encomendas_atendidas(self) -> List[int]:
+        """
+        Retorna os IDs das encomendas completamente alocadas que ainda não
+        foram finalizadas (ex: o sistema foi encerrado antes da finalização).
+        """
+        with self.__trava_reservas:
+            return [id_venda for id_venda, faltas in self.__encomendas.items() if not faltas]
+
+    def encomendas_pendentes(self) -> Dict[int, Tuple[int, int]]:
+        """
+        Volume pendente das encomendas por produto: {ID do produto:
+        (unidades em falta, vendas aguardando)}.
+        """
+        with self.__trava_reservas:
+            vendas_por_produto: Dict[int, int] = {}
+            for faltas in self.__encomendas.values():
+                for id_produto in faltas:
+                    vendas_por_produto[id_produto] = vendas_por_produto.get(id_produto, 0) + 1
+            return {id_produto: (volume, vendas_por_produto.get(id_produto, 0))
+                    for id_produto, volume in self.__volume_encomendado.items()}
+
+    def exportar_encomendas(self) -> dict:
+        """
+        Exporta o estado das encomendas como estruturas simples, prontas
+        para serialização: faltas e alocações por venda e a ordem das filas
+        por produto.
+        """
+        with self.__trava_reservas:
+            return {
+                'faltas': {id_venda: dict(faltas) for id_venda, faltas in self.__encomendas.items()},
+                'alocadas': {id_venda: dict(self.__reservas.get(id_venda, {}))
+                             for id_venda in self.__encomendas},
+                'filas': {id_produto: [id_venda for id_venda in fila
+                                       if self.__encomendas.get(id_venda, {}).get(id_produto)]
+                          for id_produto, fila in self.__filas_encomendas.items()},
+            }
+
+    def restaurar_encomendas(self, dados: dict) -> None:
+        """
+        Restaura as encomendas exportadas por `exportar_encomendas`,
+        reservando novamente as unidades alocadas. Deve ser chamado logo
+        após `restaurar`. Alocações de produtos que não estão mais no
+        estoque voltam a ser faltas, no fim da fila. Não notifica o callback.
+        """
+        with self.__travar_listras(range(len(self.__listras))), self.__trava_reservas:
+            for id_venda, faltas in dados.get('faltas', {}).items():
+                self.__encomendas[id_venda] = dict(faltas)
+            for id_produto, fila in dados.get('filas', {}).items():
+                self.__filas_encomendas[id_produto] = deque(fila)
+                self.__volume_encomendado[id_produto] = sum(
+                    self.__encomendas.get(id_venda, {}).get(id_produto, 0) for id_venda in fila)
+            for id_venda, alocadas in dados.get('alocadas', {}).items():
+                if id_venda not in self.__encomendas:
+                    continue
+                for id_produto, quantidade in alocadas.items():
+                    if id_produto in self.__slot_por_id:
+                        self.__reservas.setdefault(id_venda, {})[id_produto] = quantidade
+                        self.__ajustar_reservada(id_produto, quantidade)
+                    else:
+                        faltas = self.__encomendas[id_venda]
+                        faltas[id_produto] = faltas.get(id_produto, 0) + quantidade
+                        self.__filas_encomendas.setdefault(id_produto, deque()).append(id_venda)
+                        self.__volume_encomendado[id_produto] = (
+                            self.__volume_encomendado.get(id_produto, 0) + quantidade)
+            self.__versao_encomendas += 1
+
+    def definir_callback_estoque_baixo(self, callback: Callable[[int, int, int], None]) -> None:
+        """
+        Registra função chamada com (ID do produto, quantidade restante,
+        limite) quando uma retirada leva o produto ao limite de reposição ou
+        abaixo dele, após a liberação das travas do estoque.
+        """
+        self.__callback_estoque_baixo = callback
+
+    @property
+    def versao_limites(self) -> int:
+        """
+        Contador incrementado a cada alteração dos limites de reposição,
+        usado para persisti-los apenas quando mudaram.
+        """
+        return self.__versao_limites
+
+    def limite_reposicao(self, id_produto: int) -> int:
+        """
+        Retorna o limite de reposição do produto: com essa quantidade ou
+        menos, ele está com estoque baixo.
+        """
+        return self.__limites.get(id_produto, self.LIMITE_REPOSICAO_PADRAO)
+
+    def definir_limite_reposicao(self, id_produto: int, limite: int) -> None:
+        """
+        Define o limite de reposição do produto (o padrão volta a valer se
+        `limite` for igual a ele) e atualiza o índice de estoque baixo.
+        Notifica o callback de alteração para persistência.
+        """
+        if limite < 0:
+            raise ValueError("O limite de reposição não pode ser negativo.")
+        with self.__travar_produtos([id_produto]):
+            with self.__trava_estoque_baixo:
+                if limite == self.LIMITE_REPOSICAO_PADRAO:
+                    self.__limites.pop(id_produto, None)
+                else:
+                    self.__limites[id_produto] = limite
+                self.__versao_limites += 1
+            self.__reavaliar_estoque_baixo(id_produto)
+        self.__notificar_alteracao()
+
+    def exportar_limites(self) -> Dict[int, int]:
+        """
+        Exporta os limites de reposição definidos, {ID do produto: limite},
+        prontos para serialização. Produtos no limite padrão são omitidos.
+        """
+        with self.__trava_estoque_baixo:
+            return dict(self.__limites)
+
+    def restaurar_limites(self, limites: Dict[int, int]) -> None:
+        """
+        Restaura os limites exportados por `exportar_limites` e reconstrói o
+        índice de estoque baixo. Não notifica o callback.
+        """
+        with self.__travar_listras(range(len(self.__listras))):
+            with self.__trava_estoque_baixo:
+                self.__limites = {id_produto: limite for id_produto, limite in limites.items()
+                                  if limite != self.LIMITE_REPOSICAO_PADRAO}
+                self.__versao_limites += 1
+            self.__reconstruir_estoque_baixo()
+
+    def estoque_baixo(self) -> Dict[int, Tuple[int, int]]:
+        """
+        Produtos com estoque baixo, {ID do produto: (quantidade, limite)},
+        em ordem crescente de quantidade. Lido do índice, sem percorrer o
+        restante do estoque.
+        """
+        with self.__trava_estoque_baixo:
+            ids_produtos = list(self.__estoque_baixo)
+        itens = [(id_produto, (self.quantidade(id_produto), self.limite_reposicao(id_produto)))
+                 for id_produto in ids_produtos]
+        itens.sort(key=lambda item: (item[1][0], item[0]))
+        return dict(itens)
+
+    def produtos_com_estoque_baixo(self) -> Dict[Produto, Tuple[int, int]]:
+        """
+        Visão {Produto: (quantidade, limite)} do estoque baixo, para exibição
+        e relatórios. Produtos que não puderem ser resolvidos são omitidos.
+        """
+        produtos = {}
+        for id_produto, situacao in self.estoque_baixo().items():
+            produto = self.__produto(id_produto)
+            if produto is not None:
+                produtos[produto] = situacao
+        return produtos
 
     def produto_ja_existe(self, produto: Produto) -> bool:
         """
@@ -54,35 +561,54 @@ class Estoque:
         novos sejam cadastrados e produtos existentes sejam apenas
         incrementados.
         """
-        return produto in self.__produtos_em_estoque
+        return produto.id in self.__slot_por_id
 
-    def cadastrar_novo_produto(self, produto: Produto, quantidade: int) -> None:
+    def cadastrar_novo_produto(self, produto: Produto, quantidade: int) -> List[int]:
         """
         Registra um novo produto no estoque com quantidade inicial. Só
         cadastra se produto não existir previamente. Se quantidade for zero,
         produto não é cadastrado (não faz sentido ter produto com 0 unidades).
-        Notifica callback após cadastro para persistência automática.
+        As novas unidades são alocadas às encomendas que aguardam o produto.
+        Notifica callback após cadastro para persistência automática e
+        retorna os IDs das encomendas completamente atendidas.
         """
         if quantidade < 0:
             raise ValueError("A quantidade não pode ser negativa.")
         if quantidade == 0:
             # Não cadastra produto com quantidade zero
-            return
-        if not self.produto_ja_existe(produto):
-            self.__produtos_em_estoque[produto] = quantidade
-            self.__notificar_alteracao()
+            return []
+        with self.__travar_produtos([produto.id]):
+            if self.produto_ja_existe(produto):
+                return []
+            with self.__trava_estrutura:
+                self.__ocupar_slot(produto.id, quantidade)
+                self.__produtos_por_id[produto.id] = produto
+            atendidas = self.__alocar_encomendas(produto.id)
+        self.__notificar_alteracao()
+        self.__notificar_encomendas_atendidas(atendidas)
+        return atendidas
 
-    def adicionar_quantidade(self, produto: Produto, quantidade_a_adicionar: int) -> None:
+    def adicionar_quantidade(self, produto: Produto, quantidade_a_adicionar: int) -> List[int]:
         """
         Incrementa quantidade de um produto já existente no estoque.
-        Só adiciona se produto estiver cadastrado. Notifica callback
-        após incremento para persistência automática.
+        Só adiciona se produto estiver cadastrado. As novas unidades são
+        alocadas às encomendas que aguardam o produto, percorrendo apenas a
+        fila dele. Notifica callback após incremento para persistência
+        automática e retorna os IDs das encomendas completamente atendidas.
         """
         if quantidade_a_adicionar < 0:
             raise ValueError("A quantidade a adicionar não pode ser negativa.")
-        if self.produto_ja_existe(produto):
-            self.__produtos_em_estoque[produto] += quantidade_a_adicionar
-            self.__notificar_alteracao()
+        with self.__travar_produtos([produto.id]):
+            slot = self.__slot_por_id.get(produto.id)
+            if slot is None:
+                return []
+            self.__quantidades[slot] += quantidade_a_adicionar
+            self.__produtos_por_id[produto.id] = produto
+            self.__reavaliar_estoque_baixo(produto.id)
+            atendidas = self.__alocar_encomendas(produto.id)
+        self.__notificar_alteracao()
+        self.__notificar_encomendas_atendidas(atendidas)
+        return atendidas
 
     def retirar_quantidade(self, produto: Produto, quantidade_a_retirar: int) -> None:
         """
@@ -90,22 +616,125 @@ class Estoque:
         existe e que quantidade disponível é suficiente. Lança exceções
         específicas se validações falharem. Remove produto automaticamente
         se quantidade chegar a zero. Notifica callback após retirada
-        bem-sucedida para persistência automática.
+        bem-sucedida para persistência automática e, se a retirada levou o
+        produto ao limite de reposição, o callback de estoque baixo.
         """
         if quantidade_a_retirar <= 0:
             raise ValueError("A quantidade a retirar deve ser positiva.")
-        if not self.produto_ja_existe(produto):
-            raise ProdutoNaoEmEstoqueException(produto.nome)
+        self.processar_expiracoes()
+        with self.__travar_produtos([produto.id]):
+            slot = self.__slot_por_id.get(produto.id)
+            if slot is None:
+                raise ProdutoNaoEmEstoqueException(produto.nome)
 
-        if self.__produtos_em_estoque[produto] >= quantidade_a_retirar:
-            self.__produtos_em_estoque[produto] -= quantidade_a_retirar
+            # Unidades reservadas por carrinhos em aberto não podem ser retiradas
+            disponivel = self.__quantidades[slot] - self.__reservadas[slot]
+            if disponivel < quantidade_a_retirar:
+                raise EstoqueInsuficienteException(produto.nome, quantidade_a_retirar, disponivel)
+            anterior = self.__quantidades[slot]
+            self.__quantidades[slot] -= quantidade_a_retirar
             # Remove produto automaticamente se quantidade chegar a zero
-            if self.__produtos_em_estoque[produto] == 0:
-                del self.__produtos_em_estoque[produto]
+            if self.__quantidades[slot] == 0:
+                self.__liberar_slot(produto.id)
+            else:
+                self.__reavaliar_estoque_baixo(produto.id)
+            alertas = self.__alertas_estoque_baixo(
+                [(produto.id, anterior, anterior - quantidade_a_retirar)])
+        self.__notificar_alteracao()
+        self.__notificar_estoque_baixo(alertas)
+
+    def retirar_lote(self, quantidades_por_id: Dict[int, int],
+                     id_venda: Optional[int] = None) -> None:
+        """
+        Retira de uma só vez as quantidades de vários produtos, indexadas
+        pelo ID. Todas as linhas são validadas antes de qualquer alteração:
+        se alguma falhar, a exceção correspondente é lançada e o estoque
+        permanece intacto. Em caso de sucesso, o callback é notificado uma
+        única vez. As listras de todos os produtos do lote ficam adquiridas
+        da validação até a última retirada.
+
+        Se `id_venda` for informado, as reservas dessa venda contam como
+        disponíveis para ela e são consumidas (todas liberadas) na retirada,
+        encerrando também a encomenda da venda, se houver.
+
+        Os produtos levados ao limite de reposição são repassados ao
+        callback de estoque baixo, como em `retirar_quantidade`.
+        """
+        for quantidade_a_retirar in quantidades_por_id.values():
+            if quantidade_a_retirar <= 0:
+                raise ValueError("A quantidade a retirar deve ser positiva.")
+        self.processar_expiracoes()
+        ids_reservados = []
+        if id_venda is not None:
+            with self.__trava_reservas:
+                ids_reservados = list(self.__reservas.get(id_venda, ()))
+        slots = []
+        with self.__travar_produtos(list(quantidades_por_id) + ids_reservados):
+            with self.__trava_reservas:
+                proprias = dict(self.__reservas.get(id_venda, {})) if id_venda is not None else {}
+            for id_produto, quantidade_a_retirar in quantidades_por_id.items():
+                slot = self.__slot_por_id.get(id_produto)
+                if slot is None:
+                    raise ProdutoNaoEmEstoqueException(self.__nome_produto(id_produto))
+                disponivel = (self.__quantidades[slot] - self.__reservadas[slot]
+                              + proprias.get(id_produto, 0))
+                if disponivel < quantidade_a_retirar:
+                    raise EstoqueInsuficienteException(
+                        self.__nome_produto(id_produto), quantidade_a_retirar, disponivel)
+                slots.append((id_produto, slot, quantidade_a_retirar))
+
+            if id_venda is not None:
+                self.__liberar_reservas_travadas(id_venda, ids_reservados)
+                with self.__trava_reservas:
+                    self.__descartar_encomenda(id_venda)
+            variacoes = []
+            for id_produto, slot, quantidade_a_retirar in slots:
+                anterior = self.__quantidades[slot]
+                self.__quantidades[slot] -= quantidade_a_retirar
+                if self.__quantidades[slot] == 0:
+                    self.__liberar_slot(id_produto)
+                else:
+                    self.__reavaliar_estoque_baixo(id_produto)
+                variacoes.append((id_produto, anterior, anterior - quantidade_a_retirar))
+            alertas = self.__alertas_estoque_baixo(variacoes)
+        if slots:
             self.__notificar_alteracao()
-        else:
-            raise EstoqueInsuficienteException(
-                produto.nome, quantidade_a_retirar, self.__produtos_em_estoque[produto])
+            self.__notificar_estoque_baixo(alertas)
+
+    def devolver_lote(self, quantidades_por_id: Dict[int, int], id_venda: Optional[int] = None,
+                      reservas: Optional[Dict[int, int]] = None,
+                      faltas: Optional[Dict[int, int]] = None) -> None:
+        """
+        Desfaz um `retirar_lote`: devolve as quantidades retiradas,
+        recadastrando os produtos que tinham chegado a zero. Usado quando a
+        gravação da venda que fez a retirada é desfeita.
+
+        Se `id_venda` for informado, as reservas que a retirada consumiu
+        (`reservas_da_venda` antes dela) voltam a ser da venda e, se
+        `faltas` não for None (`encomenda_da_venda` antes da retirada), a
+        encomenda é registrada novamente, no fim da fila de cada produto em
+        falta. As unidades devolvidas não são alocadas a outras encomendas,
+        pois já não estavam livres antes da retirada. Notifica o callback de
+        alteração.
+        """
+        for quantidade in quantidades_por_id.values():
+            if quantidade <= 0:
+                raise ValueError("A quantidade a devolver deve ser positiva.")
+        reservas = reservas or {}
+        ids_produtos = list(quantidades_por_id) + list(reservas) + list(faltas or ())
+        with self.__travar_produtos(ids_produtos):
+            for id_produto, quantidade in quantidades_por_id.items():
+                slot = self.__slot_por_id.get(id_produto)
+                if slot is None:
+                    with self.__trava_estrutura:
+                        self.__ocupar_slot(id_produto, quantidade)
+                else:
+                    self.__quantidades[slot] += quantidade
+                    self.__reavaliar_estoque_baixo(id_produto)
+            if id_venda is not None:
+                with self.__trava_reservas:
+                    self.__devolver_reservas(id_venda, reservas, faltas)
+        self.__notificar_alteracao()
 
     def remover_produto_do_estoque(self, produto: Produto) -> None:
         """
@@ -113,17 +742,14 @@ class Estoque:
         Usado quando produto é excluído do sistema para manter integridade
         referencial. Notifica callback após remoção para persistência automática.
         """
-        if self.produto_ja_existe(produto):
-            del self.__produtos_em_estoque[produto]
-            self.__notificar_alteracao()
+        self.remover_produto(produto)
 
     def listar_produtos(self) -> dict:
         """
         Retorna dicionário completo de produtos em estoque mapeando produtos
-        para suas quantidades. Usado para visualização e validações durante
-        finalização de vendas.
+        para suas quantidades. Usado para visualização.
         """
-        return self.__produtos_em_estoque
+        return self.produtos_em_estoque
 
     def remover_produto(self, produto: Produto) -> bool:
         """
@@ -131,8 +757,256 @@ class Estoque:
         False se produto não existia. Notifica callback após remoção para
         persistência automática.
         """
-        if self.produto_ja_existe(produto):
-            del self.__produtos_em_estoque[produto]
-            self.__notificar_alteracao()
-            return True
-        return False
+        with self.__travar_produtos([produto.id]):
+            if not self.produto_ja_existe(produto):
+                return False
+            # Reservas do produto removido deixam de existir em todas as vendas
+            with self.__trava_reservas:
+                vendas_sem_reservas = []
+                for id_venda, reservas in self.__reservas.items():
+                    reservas.pop(produto.id, None)
+                    if not reservas:
+                        vendas_sem_reservas.append(id_venda)
+                for id_venda in vendas_sem_reservas:
+                    self.__descartar_venda(id_venda)
+            self.__liberar_slot(produto.id)
+            # O produto saiu do sistema: o limite dele deixa de ser guardado
+            with self.__trava_estoque_baixo:
+                if self.__limites.pop(produto.id, None) is not None:
+                    self.__versao_limites += 1
+        self.__notificar_alteracao()
+        return True
+
+    @contextmanager
+    def __travar_produtos(self, ids_produtos):
+        """
+        Adquire as listras dos produtos informados, sem repetição e em ordem
+        crescente, liberando-as ao sair do bloco.
+        """
+        indices = {hash(id_produto) % len(self.__listras) for id_produto in ids_produtos}
+        with self.__travar_listras(indices):
+            yield
+
+    @contextmanager
+    def __travar_listras(self, indices):
+        adquiridas = []
+        try:
+            for indice in sorted(indices):
+                self.__listras[indice].acquire()
+                adquiridas.append(self.__listras[indice])
+            yield
+        finally:
+            for trava in reversed(adquiridas):
+                trava.release()
+
+    def __ocupar_slot(self, id_produto: int, quantidade: int) -> None:
+        """
+        Associa o ID a um slot vago (ou a um novo slot no fim dos vetores).
+        Deve ser chamado com a trava de estrutura adquirida.
+        """
+        if self.__slots_livres:
+            slot = self.__slots_livres.pop()
+            self.__ids[slot] = id_produto
+            self.__quantidades[slot] = quantidade
+            self.__reservadas[slot] = 0
+        else:
+            slot = len(self.__ids)
+            self.__ids.append(id_produto)
+            self.__quantidades.append(quantidade)
+            self.__reservadas.append(0)
+        self.__slot_por_id[id_produto] = slot
+        self.__reavaliar_estoque_baixo(id_produto)
+
+    def __liberar_slot(self, id_produto: int) -> None:
+        with self.__trava_estrutura:
+            slot = self.__slot_por_id.pop(id_produto)
+            self.__ids[slot] = self.SLOT_LIVRE
+            self.__quantidades[slot] = 0
+            self.__reservadas[slot] = 0
+            self.__slots_livres.append(slot)
+            self.__produtos_por_id.pop(id_produto, None)
+            with self.__trava_estoque_baixo:
+                self.__estoque_baixo.discard(id_produto)
+
+    def __reavaliar_estoque_baixo(self, id_produto: int) -> None:
+        """
+        Inclui o produto no índice de estoque baixo ou o retira dele conforme
+        a quantidade atual e o limite. Requer a listra do produto.
+        """
+        slot = self.__slot_por_id.get(id_produto)
+        with self.__trava_estoque_baixo:
+            if slot is not None and self.__quantidades[slot] <= self.limite_reposicao(id_produto):
+                self.__estoque_baixo.add(id_produto)
+            else:
+                self.__estoque_baixo.discard(id_produto)
+
+    def __reconstruir_estoque_baixo(self) -> None:
+        """
+        Monta o índice de estoque baixo percorrendo todos os produtos. Usado
+        apenas na restauração; as demais alterações atualizam o índice
+        produto a produto.
+        """
+        with self.__trava_estoque_baixo:
+            self.__estoque_baixo = {
+                id_produto for id_produto, slot in self.__slot_por_id.items()
+                if self.__quantidades[slot] <= self.limite_reposicao(id_produto)}
+
+    def __alertas_estoque_baixo(self, variacoes: Iterable[Tuple[int, int, int]]
+                                ) -> List[Tuple[int, int, int]]:
+        """
+        Recebe (ID do produto, quantidade anterior, quantidade atual) das
+        retiradas e retorna (ID, quantidade atual, limite) dos produtos que
+        passaram de acima do limite para o limite ou abaixo dele.
+        """
+        alertas = []
+        for id_produto, anterior, atual in variacoes:
+            limite = self.limite_reposicao(id_produto)
+            if anterior > limite >= atual:
+                alertas.append((id_produto, atual, limite))
+        return alertas
+
+    def __notificar_estoque_baixo(self, alertas: List[Tuple[int, int, int]]) -> None:
+        if self.__callback_estoque_baixo:
+            for id_produto, quantidade, limite in alertas:
+                self.__callback_estoque_baixo(id_produto, quantidade, limite)
+
+    def __liberar_reservas_travadas(self, id_venda: int, ids_produtos: Iterable[int]) -> None:
+        """
+        Libera as reservas da venda sobre os produtos informados, cujas
+        listras devem estar adquiridas. A venda deixa de ter prazo quando
+        não lhe restam reservas.
+        """
+        with self.__trava_reservas:
+            reservas = self.__reservas.get(id_venda)
+            if reservas is None:
+                return
+            for id_produto in ids_produtos:
+                quantidade = reservas.pop(id_produto, 0)
+                slot = self.__slot_por_id.get(id_produto)
+                if quantidade and slot is not None:
+                    self.__reservadas[slot] -= quantidade
+            if not reservas:
+                self.__descartar_venda(id_venda)
+
+    def __alocar_encomendas(self, id_produto: int) -> List[int]:
+        """
+        Aloca as unidades livres do produto às encomendas da sua fila, da
+        mais antiga para a mais nova; a primeira que não puder ser
+        completada recebe o que houver e interrompe a alocação. Requer a
+        listra do produto. Retorna as vendas cujas encomendas ficaram
+        completamente alocadas.
+        """
+        atendidas = []
+        with self.__trava_reservas:
+            fila = self.__filas_encomendas.get(id_produto)
+            slot = self.__slot_por_id.get(id_produto)
+            if not fila or slot is None:
+                return atendidas
+            while fila:
+                id_venda = fila[0]
+                faltas = self.__encomendas.get(id_venda, {})
+                falta = faltas.get(id_produto, 0)
+                if not falta:
+                    # Encomenda cancelada ou já atendida
+                    fila.popleft()
+                    continue
+                livre = self.__quantidades[slot] - self.__reservadas[slot]
+                if livre <= 0:
+                    break
+                alocada = min(falta, livre)
+                self.__reservadas[slot] += alocada
+                reservas = self.__reservas.setdefault(id_venda, {})
+                reservas[id_produto] = reservas.get(id_produto, 0) + alocada
+                self.__volume_encomendado[id_produto] -= alocada
+                self.__versao_encomendas += 1
+                if alocada < falta:
+                    faltas[id_produto] = falta - alocada
+                    break
+                del faltas[id_produto]
+                fila.popleft()
+                if not faltas:
+                    atendidas.append(id_venda)
+            if not fila:
+                del self.__filas_encomendas[id_produto]
+                self.__volume_encomendado.pop(id_produto, None)
+        return atendidas
+
+    def __notificar_encomendas_atendidas(self, atendidas: List[int]) -> None:
+        if self.__callback_encomenda_atendida:
+            for id_venda in atendidas:
+                self.__callback_encomenda_atendida(id_venda)
+
+    def __ajustar_reservada(self, id_produto: int, diferenca: int) -> None:
+        """
+        Soma a diferença à quantidade reservada do produto, se ele estiver
+        no estoque. Requer a listra do produto.
+        """
+        slot = self.__slot_por_id.get(id_produto)
+        if diferenca and slot is not None:
+            self.__reservadas[slot] += diferenca
+
+    def __descartar_encomenda(self, id_venda: int) -> None:
+        """
+        Remove a encomenda da venda, descontando suas faltas do volume
+        encomendado; as entradas nas filas são descartadas quando chegarem
+        à frente. Requer a trava de reservas.
+        """
+        faltas = self.__encomendas.pop(id_venda, None)
+        if faltas is None:
+            return
+        for id_produto, falta in faltas.items():
+            volume = self.__volume_encomendado.get(id_produto, 0) - falta
+            if volume > 0:
+                self.__volume_encomendado[id_produto] = volume
+            else:
+                self.__volume_encomendado.pop(id_produto, None)
+        self.__versao_encomendas += 1
+
+    def __devolver_reservas(self, id_venda: int, reservas: Dict[int, int],
+                            faltas: Optional[Dict[int, int]]) -> None:
+        """
+        Devolve à venda as reservas e a encomenda consumidas por uma
+        retirada desfeita. Reservas de encomendas não vencem; as demais
+        recebem um novo prazo. Requer as listras dos produtos e a trava de
+        reservas.
+        """
+        devolvidas = {id_produto: quantidade for id_produto, quantidade in reservas.items()
+                      if quantidade and id_produto in self.__slot_por_id}
+        for id_produto, quantidade in devolvidas.items():
+            self.__ajustar_reservada(id_produto, quantidade)
+        if devolvidas:
+            self.__reservas[id_venda] = devolvidas
+        if faltas is not None:
+            self.__encomendas[id_venda] = dict(faltas)
+            for id_produto, falta in faltas.items():
+                self.__filas_encomendas.setdefault(id_produto, deque()).append(id_venda)
+                self.__volume_encomendado[id_produto] = (
+                    self.__volume_encomendado.get(id_produto, 0) + falta)
+            self.__versao_encomendas += 1
+        elif devolvidas:
+            expiracao = self.__relogio() + self.__ttl_reserva
+            self.__expiracao_por_venda[id_venda] = expiracao
+            heapq.heappush(self.__fila_expiracao, (expiracao, id_venda))
+
+    def __descartar_venda(self, id_venda: int) -> None:
+        """
+        Remove a venda dos mapas de reservas e de prazos; a entrada no heap
+        é descartada quando chegar ao topo. Requer a trava de reservas.
+        """
+        self.__reservas.pop(id_venda, None)
+        self.__expiracao_por_venda.pop(id_venda, None)
+
+    def __nome_produto(self, id_produto: int) -> str:
+        produto = self.__produto(id_produto)
+        return produto.nome if produto is not None else f"ID {id_produto}"
+
+    def __produto(self, id_produto: int) -> Optional[Produto]:
+        """
+        Obtém o produto de um ID para exibição, preferindo o resolvedor (que
+        reflete a versão atual) e recorrendo à última instância vista.
+        """
+        if self.__resolver_produto is not None:
+            produto = self.__resolver_produto(id_produto)
+            if produto is not None:
+                return produto
+        return self.__produtos_por_id.get(id_produto)
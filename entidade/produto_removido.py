@@ -0,0 +1,67 @@
+"""
+Representa um produto que foi vendido mas não existe mais no catálogo.
+
+Vendas são persistidas apenas com referências (IDs) aos produtos do carrinho.
+Quando um café ou uma máquina é excluído depois de vendido, a venda ainda
+precisa exibir o item comprado. Esta classe preserva os dados registrados no
+momento da venda (ID, nome e preço unitário) para que o histórico continue
+legível, sem reintroduzir o produto excluído no sistema.
+
+O tipo do produto (café ou máquina) e o fornecedor (CNPJ e nome) também são
+registrados na venda, para que os agregados e relatórios continuem contando
+as unidades vendidas de produtos excluídos. `classificar` extrai esses dados
+de qualquer produto, vivo ou removido.
+"""
+
+from typing import Optional, Tuple
+
+from entidade.cafe import Cafe
+from entidade.maquina_de_cafe import MaquinaDeCafe
+from entidade.produto import Produto
+
+# Fornecedor registrado na venda: (CNPJ, nome)
+Fornecedor = Tuple[str, str]
+
+
+class ProdutoRemovido(Produto):
+    TIPO_CAFE = 'cafe'
+    TIPO_MAQUINA = 'maquina'
+
+    def __init__(self, nome: str, preco_venda: float, id: int, tipo: Optional[str] = None,
+                 fornecedor: Optional[Fornecedor] = None) -> None:
+        """
+        Inicializa o produto com os dados guardados na venda. Preço de compra
+        e data de fabricação não são registrados na venda e ficam vazios.
+        Tipo e fornecedor ficam None em vendas gravadas antes de serem
+        registrados.
+        """
+        super().__init__(nome, 0.0, preco_venda, id, "")
+        self.__tipo = tipo
+        self.__fornecedor = fornecedor
+
+    @property
+    def tipo(self) -> Optional[str]:
+        return self.__tipo
+
+    @property
+    def fornecedor(self) -> Optional[Fornecedor]:
+        return self.__fornecedor
+
+    @staticmethod
+    def classificar(produto: Produto) -> Tuple[Optional[str], Optional[Fornecedor]]:
+        """
+        Retorna o tipo (TIPO_CAFE, TIPO_MAQUINA ou None) e o fornecedor
+        (CNPJ, nome) de um produto, seja ele do catálogo ou removido.
+        """
+        if isinstance(produto, ProdutoRemovido):
+            return produto.tipo, produto.fornecedor
+        if isinstance(produto, Cafe):
+            tipo = ProdutoRemovido.TIPO_CAFE
+        elif isinstance(produto, MaquinaDeCafe):
+            tipo = ProdutoRemovido.TIPO_MAQUINA
+        else:
+            return None, None
+        empresa = produto.empresa_fornecedora
+        if empresa is None:
+            return tipo, None
+        return tipo, (empresa.cnpj, empresa.nome)
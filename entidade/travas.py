@@ -0,0 +1,41 @@
+"""
+    Registro de travas por chave para operações concorrentes sobre entidades.
+
+    As entidades são serializadas com pickle e, portanto, não podem guardar
+    objetos de trava como atributos. Este registro associa uma trava
+    reentrante a cada chave (ex: o ID de um cliente), criada no primeiro uso
+    e compartilhada por todas as threads do processo.
+
+    Ordem de aquisição adotada no sistema, para evitar deadlock: primeiro a
+    trava do cliente, depois a trava de carga dos dados derivados do
+    `ControladorVenda`, depois as travas dos DAOs com lote aberto (uma
+    unidade de trabalho as adquire em ordem de arquivo), depois as listras
+    de produtos do `Estoque` (em ordem crescente), depois a trava de
+    estrutura ou a trava de reservas do `Estoque` (essas duas nunca são
+    adquiridas uma dentro da outra) e, por último, a trava do índice de
+    estoque baixo do `Estoque`. As notificações do `Estoque` são feitas
+    sem nenhuma trava do estoque, e podem adquirir as travas dos DAOs.
+    """
+
+import threading
+from typing import Dict, Hashable
+
+
+class TravasPorChave:
+    def __init__(self) -> None:
+        self.__travas: Dict[Hashable, threading.RLock] = {}
+        self.__guarda = threading.Lock()
+
+    def obter(self, chave: Hashable) -> threading.RLock:
+        """
+        Retorna a trava associada à chave, criando-a se ainda não existir.
+        """
+        trava = self.__travas.get(chave)
+        if trava is None:
+            with self.__guarda:
+                trava = self.__travas.setdefault(chave, threading.RLock())
+        return trava
+
+
+# Travas por ID de cliente, usadas ao debitar saldo na finalização de vendas
+travas_clientes = TravasPorChave()
@@ -18,20 +18,24 @@
     - Executar as operações transacionais após a validação: debitar o valor
       do saldo do cliente, abater os produtos do estoque e registrar a data
       da transação, efetivamente concluindo a venda.
+    - Aguardar reposição de estoque como encomenda ("Aguardando estoque"),
+      sendo finalizada automaticamente quando os produtos forem alocados.
     """
 
 import datetime
-from typing import Optional
+from typing import Dict, Optional
 from entidade.cliente import Cliente
 from entidade.produto import Produto
 from entidade.estoque import Estoque
+from entidade.travas import travas_clientes
 from Excecoes.vendaNaoEmAndamentoException import VendaNaoEmAndamentoException
 from Excecoes.saldoInsuficienteException import SaldoInsuficienteException
-from Excecoes.produtoNaoEmEstoqueException import ProdutoNaoEmEstoqueException
-from Excecoes.estoqueInsuficienteException import EstoqueInsuficienteException
 
 
 class Venda:
+    # Status de uma venda cujo carrinho aguarda reposição do estoque
+    STATUS_AGUARDANDO_ESTOQUE = "Aguardando estoque"
+
     def __init__(self, id_venda: int, cliente: Cliente) -> None:
         """
         Inicializa uma nova venda associada a um cliente. Cria carrinho vazio,
@@ -93,28 +97,88 @@ class Venda:
         """
         Finaliza uma venda executando todas as validações e operações
         transacionais necessárias. Verifica que venda está em andamento,
-        valida saldo do cliente, verifica disponibilidade de cada produto
-        no estoque, debita valores do cliente, atualiza estoque e registra
-        data de conclusão. Lança exceções específicas se alguma validação falhar.
+        valida saldo do cliente, retira todos os itens do estoque em um único
+        lote (que valida a disponibilidade de cada linha antes de alterar
+        qualquer quantidade, contando as reservas da própria venda), debita
+        valores do cliente e registra data de conclusão. Lança exceções
+        específicas se alguma validação falhar.
+
+        Pode ser chamado por vários caixas ao mesmo tempo: a trava do
+        cliente é mantida da verificação do saldo até o débito (e também
+        protege o status desta venda), e a retirada do estoque é atômica.
+        Vendas aguardando estoque também podem ser finalizadas.
         """
-        if self.__status_venda != "Em andamento":
-            raise VendaNaoEmAndamentoException()
-        if not self.__carrinho:
-            raise ValueError("Não é possível finalizar uma venda com carrinho vazio.")
-        if self.__cliente.saldo < self.__valor_total:
-            raise SaldoInsuficienteException()
-        for produto, quantidade_necessaria in self.__carrinho.items():
-            produtos_em_estoque = estoque.listar_produtos()
-            if produto not in produtos_em_estoque:
-                raise ProdutoNaoEmEstoqueException(produto.nome)
-            if produtos_em_estoque[produto] < quantidade_necessaria:
-                raise EstoqueInsuficienteException(
-                    produto.nome, quantidade_necessaria, produtos_em_estoque[produto])
-        for produto, quantidade_necessaria in self.__carrinho.items():
-            estoque.retirar_quantidade(produto, quantidade_necessaria)
-        self.__cliente.saldo -= self.__valor_total
-        self.__data_venda = datetime.datetime.now()
-        self.__status_venda = "Finalizada"
+        with travas_clientes.obter(self.__cliente.id):
+            if self.__status_venda not in ("Em andamento", self.STATUS_AGUARDANDO_ESTOQUE):
+                raise VendaNaoEmAndamentoException()
+            if not self.__carrinho:
+                raise ValueError("Não é possível finalizar uma venda com carrinho vazio.")
+            if self.__cliente.saldo < self.__valor_total:
+                raise SaldoInsuficienteException()
+            # Valida todas as linhas e retira tudo com uma única notificação,
+            # consumindo as reservas feitas pelo carrinho desta venda
+            estoque.retirar_lote(self.__quantidades_por_id(), self.__id_venda)
+            self.__cliente.saldo -= self.__valor_total
+            self.__data_venda = datetime.datetime.now()
+            self.__status_venda = "Finalizada"
+
+    def desfazer_finalizacao(self, estoque: Estoque, status_venda: str,
+                             reservas: Optional[Dict[int, int]] = None,
+                             faltas: Optional[Dict[int, int]] = None) -> None:
+        """
+        Desfaz `finalizar_venda` quando a gravação da venda finalizada é
+        desfeita: devolve os itens ao estoque, junto com as reservas e a
+        encomenda que a venda tinha (ver `Estoque.devolver_lote`), credita o
+        valor ao cliente e volta ao status anterior, sem data de conclusão.
+        Não faz nada se a venda não estiver finalizada.
+        """
+        with travas_clientes.obter(self.__cliente.id):
+            if self.__status_venda != "Finalizada":
+                return
+            estoque.devolver_lote(self.__quantidades_por_id(), self.__id_venda, reservas, faltas)
+            self.__cliente.saldo += self.__valor_total
+            self.__data_venda = None
+            self.__status_venda = status_venda
+
+    def __quantidades_por_id(self) -> Dict[int, int]:
+        """Quantidades do carrinho indexadas pelo ID do produto."""
+        quantidades_por_id = {}
+        for produto, quantidade in self.__carrinho.items():
+            quantidades_por_id[produto.id] = quantidades_por_id.get(produto.id, 0) + quantidade
+        return quantidades_por_id
+
+    def aguardar_estoque(self) -> None:
+        """
+        Marca a venda em andamento como encomenda aguardando reposição do
+        estoque. O carrinho não pode mais ser alterado até que a venda seja
+        finalizada ou retomada.
+        """
+        with travas_clientes.obter(self.__cliente.id):
+            if self.__status_venda != "Em andamento":
+                raise VendaNaoEmAndamentoException()
+            self.__status_venda = self.STATUS_AGUARDANDO_ESTOQUE
+
+    def retomar(self) -> None:
+        """
+        Devolve ao status "Em andamento" uma venda que aguardava estoque,
+        usado quando a encomenda não pôde ser finalizada.
+        """
+        with travas_clientes.obter(self.__cliente.id):
+            if self.__status_venda == self.STATUS_AGUARDANDO_ESTOQUE:
+                self.__status_venda = "Em andamento"
+
+    def restaurar_estado(self, carrinho: dict, valor_total: float,
+                         status_venda: str, data_venda: Optional[datetime.datetime]) -> None:
+        """
+        Reconstrói o estado de uma venda já existente a partir dos dados
+        persistidos. Usado pela camada de persistência ao reidratar vendas
+        salvas por referência, sem repetir as validações de carrinho e sem
+        recalcular o valor total registrado na época da venda.
+        """
+        self.__carrinho = carrinho
+        self.__valor_total = valor_total
+        self.__status_venda = status_venda
+        self.__data_venda = data_venda
 
     def diminuir_quantidade_produto(self, produto: Produto, quantidade: int) -> str:
         """
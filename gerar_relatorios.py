@@ -0,0 +1,189 @@
+"""
+Geração de relatórios em lote, sem interface gráfica.
+
+Carrega os dados uma única vez (sem precisar do FreeSimpleGUI), gera os
+relatórios escolhidos nos formatos escolhidos, grava-os na pasta de saída e
+encerra. Pensado para execução agendada (ex: relatórios noturnos via cron).
+
+Os relatórios de vendas aceitam período (--dias, ou --inicio/--fim com a data
+final inclusiva) e divisão por dia, semana ou mês (--granularidade); os
+rankings aceitam --limite. Opções que não se aplicam a um relatório são
+ignoradas para ele.
+
+Com --processos N, os relatórios são gerados em paralelo por um pool de N
+processos. Antes de criar o pool, o processo principal monta os agregados e
+a tabela de fatos das vendas (gravando os agregados, se precisaram ser
+reconstruídos) e descarrega as gravações adiadas, de modo que os processos
+do pool apenas leem os dados: onde o sistema operacional permite ('fork'),
+eles herdam os dados já carregados; caso contrário, cada um carrega dos
+arquivos, já atualizados, uma vez ao iniciar.
+
+Exemplos:
+    python gerar_relatorios.py --saida /var/relatorios
+    python gerar_relatorios.py --saida saida --relatorios cafes_mais_vendidos \\
+        --formatos txt csv --dias 30 --granularidade semana --limite 10
+    python gerar_relatorios.py --saida saida --formatos jsonl --processos 4
+
+Os nomes dos relatórios disponíveis são listados com --listar. O código de
+saída é 0 se todos os relatórios foram gerados e 1 se algum falhou.
+"""
+
+import argparse
+import datetime
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from controle.controladorRelatorio import ControladorRelatorios
+from controle.controladorSistema import ControladorSistema
+from controle.periodoRelatorio import GRANULARIDADES, PeriodoRelatorio
+from DAOs.escrita_adiada import gerenciador_escrita_adiada
+
+# (relatório, formato, período, limite, pasta)
+Tarefa = Tuple[str, str, Optional[PeriodoRelatorio], Optional[int], str]
+
+# Sistema carregado no processo atual (herdado pelos processos do pool
+# quando criados por 'fork')
+_sistema: Optional[ControladorSistema] = None
+
+
+def _inicializar_processo() -> None:
+    """Carrega os dados no processo do pool, se ainda não foram herdados."""
+    global _sistema
+    if _sistema is None:
+        _sistema = ControladorSistema()
+
+
+def _gerar(tarefa: Tarefa) -> str:
+    """Gera um relatório em um formato e retorna o caminho do arquivo."""
+    relatorio, formato, periodo, limite, pasta = tarefa
+    return _sistema.controlador_relatorios.exportar_relatorio(
+        relatorio, formato, periodo, limite, pasta)
+
+
+def _data(texto: str) -> datetime.datetime:
+    try:
+        return datetime.datetime.strptime(texto, '%d/%m/%Y')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida (use DD/MM/AAAA): {texto}")
+
+
+def _criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Gera relatórios do CaFerri sem interface gráfica.")
+    parser.add_argument('--saida', default=ControladorRelatorios.PASTA_PADRAO,
+                        help="pasta onde os arquivos são gravados (padrão: relatorios)")
+    parser.add_argument('--relatorios', nargs='+', metavar='NOME',
+                        help="relatórios a gerar (padrão: todos)")
+    parser.add_argument('--formatos', nargs='+', default=[ControladorRelatorios.FORMATO_TEXTO],
+                        choices=ControladorRelatorios.FORMATOS,
+                        help="formatos dos arquivos (padrão: txt)")
+    periodo = parser.add_mutually_exclusive_group()
+    periodo.add_argument('--dias', type=int, help="apenas os últimos N dias, incluindo hoje")
+    periodo.add_argument('--inicio', type=_data, help="data inicial (DD/MM/AAAA)")
+    parser.add_argument('--fim', type=_data, help="data final, inclusiva (DD/MM/AAAA)")
+    parser.add_argument('--granularidade', choices=GRANULARIDADES,
+                        help="divide o período por dia, semana ou mês")
+    parser.add_argument('--limite', type=int, help="apenas os K primeiros dos rankings")
+    parser.add_argument('--processos', type=int, default=1,
+                        help="processos usados para gerar os relatórios (padrão: 1)")
+    parser.add_argument('--listar', action='store_true',
+                        help="lista os relatórios disponíveis e encerra")
+    return parser
+
+
+def _montar_periodo(args: argparse.Namespace) -> Optional[PeriodoRelatorio]:
+    """Período dos argumentos; None para todo o histórico sem divisão."""
+    if args.dias is not None:
+        if args.fim is not None:
+            raise ValueError("--fim não pode ser usado com --dias.")
+        return PeriodoRelatorio.ultimos_dias(args.dias, args.granularidade)
+    if args.inicio is None and args.fim is None and args.granularidade is None:
+        return None
+    # A data final informada é inclusiva: o período vai até o fim desse dia
+    fim = args.fim + datetime.timedelta(days=1) if args.fim is not None else None
+    return PeriodoRelatorio(args.inicio, fim, args.granularidade)
+
+
+def _executar(tarefas: List[Tarefa], processos: int) -> Tuple[List[str], List[str]]:
+    """
+    Gera as tarefas, em sequência ou no pool de processos. Retorna os
+    caminhos gerados e as mensagens de erro.
+    """
+    gerados, erros = [], []
+
+    def registrar(tarefa: Tarefa, executar) -> None:
+        try:
+            gerados.append(executar())
+        except (ValueError, OSError) as e:
+            erros.append(f"{tarefa[0]} ({tarefa[1]}): {e}")
+
+    if processos <= 1 or len(tarefas) <= 1:
+        for tarefa in tarefas:
+            registrar(tarefa, lambda: _gerar(tarefa))
+        return gerados, erros
+
+    # Nada que precise ser gravado pode ficar para os processos do pool:
+    # vários deles gravariam os mesmos arquivos ao mesmo tempo
+    controlador_venda = _sistema.controlador_venda
+    controlador_venda.agregados
+    controlador_venda.tabela_fatos
+    gerenciador_escrita_adiada.descarregar_todos()
+
+    metodos = multiprocessing.get_all_start_methods()
+    contexto = multiprocessing.get_context('fork' if 'fork' in metodos else None)
+    with ProcessPoolExecutor(max_workers=processos, mp_context=contexto,
+                             initializer=_inicializar_processo) as executor:
+        futuros = [(tarefa, executor.submit(_gerar, tarefa)) for tarefa in tarefas]
+        for tarefa, futuro in futuros:
+            registrar(tarefa, futuro.result)
+    return gerados, erros
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Interpreta os argumentos, gera os relatórios e retorna o código de saída."""
+    global _sistema
+    parser = _criar_parser()
+    args = parser.parse_args(argv)
+    try:
+        periodo = _montar_periodo(args)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.limite is not None and args.limite < 1:
+        parser.error("--limite deve ser positivo.")
+
+    logging.basicConfig(level=os.environ.get('CAFERRI_LOG', 'WARNING').upper(),
+                        format='%(asctime)s %(name)s: %(message)s')
+    _sistema = ControladorSistema()
+    disponiveis = _sistema.controlador_relatorios.relatorios_exportaveis()
+    if args.listar:
+        for nome, (titulo, *_) in disponiveis.items():
+            print(f"{nome:<36} {titulo}")
+        return 0
+
+    relatorios = args.relatorios or list(disponiveis)
+    desconhecidos = [nome for nome in relatorios if nome not in disponiveis]
+    if desconhecidos:
+        parser.error(f"relatórios desconhecidos: {', '.join(desconhecidos)} "
+                     f"(use --listar para ver os disponíveis)")
+
+    tarefas = [(relatorio, formato, periodo, args.limite, args.saida)
+               for relatorio in relatorios for formato in args.formatos]
+    try:
+        gerados, erros = _executar(tarefas, args.processos)
+    finally:
+        # A carga pode ter finalizado encomendas já atendidas
+        gerenciador_escrita_adiada.descarregar_todos()
+
+    for caminho in gerados:
+        print(caminho)
+    for erro in erros:
+        print(f"Falha ao gerar {erro}", file=sys.stderr)
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,16 @@
+"""
+    Importação da biblioteca de interface gráfica usada pelas telas.
+
+    O FreeSimpleGUI só é necessário para exibir as telas. Quando ele não
+    está instalado, os módulos de `limite` continuam importáveis (com `sg`
+    igual a None), o que permite montar os controladores e gerar relatórios
+    sem interface gráfica (ver `gerar_relatorios.py`); apenas abrir uma tela
+    falha nesse caso.
+    """
+
+try:
+    import FreeSimpleGUI as sg
+except ImportError:  # Execução sem interface gráfica
+    sg = None
+
+INTERFACE_GRAFICA_DISPONIVEL = sg is not None
@@ -17,7 +17,7 @@ Responsabilidades:
 from datetime import datetime
 from typing import Dict, List, Optional
 
-import FreeSimpleGUI as sg
+from limite.interfaceGrafica import sg
 
 
 class TelaCafe:
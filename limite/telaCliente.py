@@ -35,7 +35,7 @@
 """
 
 from typing import Dict, List, Optional
-import FreeSimpleGUI as sg
+from limite.interfaceGrafica import sg
 
 
 class TelaCliente:
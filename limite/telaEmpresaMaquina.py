@@ -15,7 +15,7 @@ Responsabilidades:
 
 from typing import Dict, List, Optional
 
-import FreeSimpleGUI as sg
+from limite.interfaceGrafica import sg
 
 
 class TelaEmpresaMaquina:
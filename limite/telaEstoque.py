@@ -14,7 +14,7 @@ Responsabilidades:
 """
 from typing import Dict, List, Optional, Union
 
-import FreeSimpleGUI as sg
+from limite.interfaceGrafica import sg
 
 
 class TelaEstoque:
@@ -30,7 +30,7 @@ class TelaEstoque:
         """
         Configura e cria a janela principal do menu de estoque. Define tema,
         layout com título, subtítulo e botões de opções (Listar, Adicionar,
-        Repor, Baixa Manual, Retornar). A janela é armazenada em self.__window.
+        Repor, Baixa Manual, Limite de Reposição, Retornar). A janela é armazenada em self.__window.
         """
         sg.theme('DarkBrown2')
 
@@ -43,6 +43,8 @@ class TelaEstoque:
                 5, 5), expand_x=True, button_color=('#F5E6D2', '#9B7A5A'))],
             [sg.Button('Dar Baixa Manual de um Produto', key='4', font='Any 12', pad=(
                 5, 5), expand_x=True, button_color=('#F5E6D2', '#9B7A5A'))],
+            [sg.Button('Definir Limite de Reposição', key='5', font='Any 12', pad=(
+                5, 5), expand_x=True, button_color=('#F5E6D2', '#9B7A5A'))],
             [sg.Button('Retornar', key='0', font='Any 12', pad=(
                 5, 5), expand_x=True, button_color=('#F5E6D2', '#9B7A5A'))]
         ]
@@ -57,12 +59,12 @@ class TelaEstoque:
         ]
 
         self.__window = sg.Window('Gerenciador de Estoque', layout, element_justification='center', size=(
-            580, 580), background_color='#7A5A3A')
+            580, 630), background_color='#7A5A3A')
 
     def tela_opcoes(self) -> Optional[int]:
         """
         Exibe o menu principal de estoque e captura a escolha do usuário.
-        Retorna o código numérico da opção selecionada (1-4) ou 0 para retornar.
+        Retorna o código numérico da opção selecionada (1-5) ou 0 para retornar.
         Retorna None se a janela for fechada sem seleção válida.
         """
         self.init_opcoes()
@@ -72,7 +74,7 @@ class TelaEstoque:
             self.close()
             return 0
 
-        opcoes_validas = {'1', '2', '3', '4'}
+        opcoes_validas = {'1', '2', '3', '4', '5'}
         if button in opcoes_validas:
             self.close()
             return int(button)
@@ -80,16 +82,18 @@ class TelaEstoque:
         self.close()
         return None
 
-    def pega_dados_produto_estoque(self) -> Optional[Dict[str, int]]:
+    def pega_dados_produto_estoque(self, rotulo_quantidade: str = 'Quantidade:'
+                                   ) -> Optional[Dict[str, int]]:
         """
-        Exibe formulário modal para coleta de ID do produto e quantidade.
-        Valida que ambos são números inteiros e que quantidade não é negativa.
+        Exibe formulário modal para coleta de ID do produto e quantidade
+        (rotulada por `rotulo_quantidade`, ex: limite de reposição). Valida
+        que ambos são números inteiros e que quantidade não é negativa.
         Mantém janela aberta em caso de erro para correção. Retorna dicionário
         com dados validados ou None se cancelado.
         """
         layout = [
             [sg.Text('ID do Produto:'), sg.Input(key='id_produto')],
-            [sg.Text('Quantidade:'), sg.Input(key='quantidade')],
+            [sg.Text(rotulo_quantidade), sg.Input(key='quantidade')],
             [sg.Button('Salvar', bind_return_key=True), sg.Button('Cancelar')]
         ]
 
@@ -7,14 +7,17 @@ isolando a lógica de visualização do controlador.
 
 Responsabilidades:
 - Exibir menu principal com opções de relatórios disponíveis
+- Coletar período, divisão (dia, semana, mês) e limite de linhas dos relatórios de vendas
+- Coletar relatório e formato (CSV ou JSONL) das exportações de dados
 - Exibir relatórios formatados em janelas scrolláveis
 - Gerenciar ciclo de vida das janelas (abrir/fechar)
 - Formatar dados de relatórios para exibição legível
 """
 
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, List, Optional
 
-import FreeSimpleGUI as sg
+from limite.interfaceGrafica import sg
 
 
 class TelaRelatorio:
@@ -46,6 +49,10 @@ class TelaRelatorio:
                        expand_x=True, button_color=('#E8D5B7', '#5C3D2E'))],
             [sg.Button('Empresas Mais Ativas', key='6', font='Any 14', expand_x=True,
                        button_color=('#E8D5B7', '#5C3D2E'))],
+            [sg.Button('Encomendas Pendentes', key='7', font='Any 14', expand_x=True,
+                       button_color=('#E8D5B7', '#5C3D2E'))],
+            [sg.Button('Exportar Dados', key='8', font='Any 14', expand_x=True,
+                       button_color=('#E8D5B7', '#5C3D2E'))],
             [sg.Button('Retornar', key='0', font='Any 14', expand_x=True,
                        button_color=('#E8D5B7', '#5C3D2E'))]
         ]
@@ -60,12 +67,12 @@ class TelaRelatorio:
         ]
 
         self.__window = sg.Window('Relatórios', layout, element_justification='center', size=(
-            580, 580), background_color='#3D2817')
+            580, 700), background_color='#3D2817')
 
     def tela_opcoes(self) -> Optional[int]:
         """
         Exibe o menu principal de relatórios e captura a escolha do usuário.
-        Retorna o código numérico da opção selecionada (1-6) ou 0 para retornar.
+        Retorna o código numérico da opção selecionada (1-8) ou 0 para retornar.
         Retorna None se a janela for fechada sem seleção válida.
         """
         self.init_opcoes()
@@ -75,13 +82,109 @@ class TelaRelatorio:
             self.close()
             return 0
 
-        if button in {'1', '2', '3', '4', '5', '6'}:
+        if button in {'1', '2', '3', '4', '5', '6', '7', '8'}:
             self.close()
             return int(button)
 
         self.close()
         return None
 
+    def pega_opcoes_relatorio(self, com_limite: bool = False) -> Optional[dict]:
+        """
+        Exibe formulário modal com as opções de um relatório de vendas:
+        período (todo o histórico, últimos 7 ou 30 dias, ou datas inicial e
+        final DD/MM/AAAA, inclusivas e opcionais), divisão por dia, semana
+        ou mês e, para rankings (`com_limite`), quantas linhas exibir. Valida
+        as datas antes de retornar, mantendo a janela aberta em caso de
+        erro. Retorna dicionário com 'ultimos_dias', 'inicio', 'fim',
+        'granularidade' e 'limite' (None quando não informados) ou None se
+        cancelado.
+        """
+        sg.theme('DarkBrown4')
+        atalhos = {'Todo o histórico': None, 'Últimos 7 dias': 7, 'Últimos 30 dias': 30,
+                   'Datas informadas': None}
+        granularidades = {'Total do período': None, 'Por dia': 'dia',
+                          'Por semana': 'semana', 'Por mês': 'mes'}
+        limites = {'Todos': None, 'Top 10': 10, 'Top 25': 25, 'Top 100': 100}
+
+        layout = [
+            [sg.Text('Período:'), sg.Combo(list(atalhos), default_value='Todo o histórico',
+                                           key='atalho', readonly=True)],
+            [sg.Text('Data Inicial (DD/MM/AAAA):'), sg.Input(key='inicio', size=(12, 1))],
+            [sg.Text('Data Final (DD/MM/AAAA):'), sg.Input(key='fim', size=(12, 1))],
+            [sg.Text('Divisão:'), sg.Combo(list(granularidades), default_value='Total do período',
+                                           key='granularidade', readonly=True)]
+        ]
+        if com_limite:
+            layout.append([sg.Text('Exibir:'), sg.Combo(list(limites), default_value='Todos',
+                                                        key='limite', readonly=True)])
+        layout.append([sg.Button('Gerar', bind_return_key=True), sg.Button('Cancelar')])
+        window = sg.Window('Opções do Relatório', layout, modal=True)
+        dados = None
+
+        while True:
+            event, values = window.read()
+            if event in (sg.WINDOW_CLOSED, 'Cancelar'):
+                break
+            if event == 'Gerar':
+                try:
+                    datas = {}
+                    for campo in ('inicio', 'fim'):
+                        texto = values[campo].strip() if values['atalho'] == 'Datas informadas' else ''
+                        datas[campo] = datetime.strptime(texto, '%d/%m/%Y') if texto else None
+                    dados = {
+                        "ultimos_dias": atalhos[values['atalho']],
+                        "inicio": datas['inicio'],
+                        "fim": datas['fim'],
+                        "granularidade": granularidades[values['granularidade']],
+                        "limite": limites[values['limite']] if com_limite else None
+                    }
+                    break
+                except (ValueError, KeyError):
+                    self.mostra_mensagem(
+                        "Informe as datas no formato DD/MM/AAAA.")
+
+        window.close()
+        return dados
+
+    def pega_exportacao(self, relatorios: Dict[str, str]) -> Optional[dict]:
+        """
+        Exibe formulário modal para exportar os dados de um relatório.
+        Recebe {nome: título} dos relatórios exportáveis. Retorna dicionário
+        com 'relatorio' (nome) e 'formato' ('csv' ou 'jsonl') ou None se
+        cancelado.
+        """
+        sg.theme('DarkBrown4')
+        titulos = {titulo: nome for nome, titulo in relatorios.items()}
+        formatos = {'CSV': 'csv', 'JSON Lines': 'jsonl'}
+
+        layout = [
+            [sg.Text('Relatório:'), sg.Combo(list(titulos), default_value=next(iter(titulos)),
+                                             key='relatorio', readonly=True)],
+            [sg.Text('Formato:'), sg.Combo(list(formatos), default_value='CSV',
+                                           key='formato', readonly=True)],
+            [sg.Button('Exportar', bind_return_key=True), sg.Button('Cancelar')]
+        ]
+        window = sg.Window('Exportar Dados', layout, modal=True)
+        dados = None
+
+        while True:
+            event, values = window.read()
+            if event in (sg.WINDOW_CLOSED, 'Cancelar'):
+                break
+            if event == 'Exportar':
+                try:
+                    dados = {
+                        "relatorio": titulos[values['relatorio']],
+                        "formato": formatos[values['formato']]
+                    }
+                    break
+                except KeyError:
+                    self.mostra_mensagem("Escolha um relatório e um formato.")
+
+        window.close()
+        return dados
+
     def mostra_relatorio(self, titulo: str, linhas_relatorio: List[str]):
         """
         Exibe relatório formatado em janela modal com área de texto scrollável.
@@ -17,7 +17,7 @@
     """
 
 from typing import Optional
-import FreeSimpleGUI as sg
+from limite.interfaceGrafica import sg
 
 
 class TelaSistema:
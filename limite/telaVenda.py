@@ -39,7 +39,7 @@
 """
 
 from typing import Dict, List, Optional
-import FreeSimpleGUI as sg
+from limite.interfaceGrafica import sg
 
 
 class TelaVenda:
@@ -10,10 +10,18 @@ O sistema utiliza arquitetura em camadas (MVC), com separação clara entre:
 - Camada de Apresentação (limite/): Interfaces gráficas com o usuário
 - Camada de Controle (controle/): Lógica de negócio e orquestração
 - Camada de Dados (entidade/ e DAOs/): Modelos de dados e persistência
+
+Mensagens de diagnóstico (ex: tempo de carga de cada arquivo na
+inicialização) são exibidas definindo CAFERRI_LOG=INFO.
 """
 
+import logging
+import os
+
 from controle.controladorSistema import ControladorSistema
 
 if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get('CAFERRI_LOG', 'WARNING').upper(),
+                        format='%(asctime)s %(name)s: %(message)s')
     controlador_principal = ControladorSistema()
     controlador_principal.inicializa_sistema()
@@ -0,0 +1,236 @@
+"""
+Teste de estresse da finalização concorrente de vendas com persistência.
+
+Diferente de benchmark_concorrencia.py, que exercita apenas o Estoque em
+memória, aqui vários caixas (threads) finalizam vendas pelo caminho
+completo do ControladorVenda: cada finalização grava venda, estoque, cliente
+e agregados em uma única unidade de trabalho. O estoque é propositalmente
+escasso, de modo que muitas finalizações são recusadas (e suas unidades de
+trabalho desfeitas) enquanto outras são confirmadas ao mesmo tempo.
+
+O cenário é criado em uma pasta temporária e executado em um processo
+filho. Depois que ele termina, os arquivos são recarregados do disco e são
+verificados os invariantes:
+- toda venda finalizada com sucesso está gravada como finalizada, e
+  nenhuma venda recusada está
+- saldo gravado de cada cliente = saldo inicial - total das suas vendas
+- quantidade gravada + unidades vendidas = unidades iniciais, por produto
+- agregados gravados contam exatamente as vendas finalizadas
+
+O modo de persistência segue a variável CAFERRI_PERSISTENCIA.
+
+Execute com: python teste_estresse_vendas.py [threads] [vendas_por_thread]
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from controle.agregadorVendas import AgregadosVendas
+from controle.controladorSistema import ControladorSistema
+from DAOs.agregados_venda_dao import AgregadosVendaDAO
+from DAOs.cafe_dao import CafeDAO
+from DAOs.cliente_dao import ClienteDAO
+from DAOs.escrita_adiada import gerenciador_escrita_adiada
+from DAOs.fornecedora_cafe_dao import FornecedoraCafeDAO
+from DAOs.venda_dao import VendaDAO
+from entidade.cafe import Cafe
+from entidade.cliente import Cliente
+from entidade.fornecedora_cafe import FornecedoraCafe
+from entidade.venda import Venda
+from Excecoes.estoqueInsuficienteException import EstoqueInsuficienteException
+from Excecoes.produtoNaoEmEstoqueException import ProdutoNaoEmEstoqueException
+from Excecoes.saldoInsuficienteException import SaldoInsuficienteException
+
+
+PRODUTOS = 30
+UNIDADES_POR_PRODUTO = 25
+CLIENTES = 20
+SALDO_INICIAL = 400.0
+
+
+def preparar_cenario(threads: int, vendas_por_thread: int) -> None:
+    """
+    Grava fornecedora, cafés, clientes e as vendas em andamento na pasta
+    atual, diretamente pelos DAOs.
+    """
+    aleatorio = random.Random(0)
+    fornecedora = FornecedoraCafe("Fornecedora Estresse", "00000000000100",
+                                  "Rua A, 1", "48999990000", "Brasil")
+    FornecedoraCafeDAO().add(fornecedora)
+    produtos = [Cafe(f"Café {i}", 5.0, 10.0 + (i % 7), i, "01/01/2025", "Brasil",
+                     "Bourbon", 1000, "Média", "Doce", "Doce e Suave", fornecedora)
+                for i in range(1, PRODUTOS + 1)]
+    cafe_dao = CafeDAO()
+    for produto in produtos:
+        cafe_dao.add(produto)
+    senha = hashlib.sha256(b"estresse").hexdigest()
+    clientes = [Cliente(i, f"Cliente {i}", f"cliente{i}@email.com", senha,
+                        SALDO_INICIAL, "Doce e Suave") for i in range(1, CLIENTES + 1)]
+    cliente_dao = ClienteDAO()
+    for cliente in clientes:
+        cliente_dao.add(cliente)
+    venda_dao = VendaDAO()
+    with venda_dao.batch():
+        for id_venda in range(1, threads * vendas_por_thread + 1):
+            venda = Venda(id_venda, aleatorio.choice(clientes))
+            for produto in aleatorio.sample(produtos, aleatorio.randint(1, 3)):
+                venda.adicionar_produto(produto, aleatorio.randint(1, 3))
+            venda_dao.add(venda)
+    gerenciador_escrita_adiada.descarregar_todos()
+
+
+def executar_caixas(threads: int, vendas_por_thread: int, resultados) -> None:
+    """
+    Carrega o sistema, abastece o estoque e finaliza as vendas em paralelo,
+    uma fatia por caixa. Envia ao processo pai as vendas finalizadas, o
+    gasto por cliente e as unidades vendidas por produto.
+    """
+    # Os alertas de estoque baixo são esperados aqui e não interessam ao teste
+    logging.basicConfig(level=os.environ.get('CAFERRI_LOG', 'ERROR').upper())
+    sistema = ControladorSistema()
+    controlador_venda = sistema.controlador_venda
+    estoque = sistema.controlador_estoque.estoque
+    for produto in sistema.controlador_cafe.cafes:
+        estoque.cadastrar_novo_produto(produto, UNIDADES_POR_PRODUTO)
+    # O script exercita o passo de persistência sem a tela de vendas
+    concluir_venda = getattr(controlador_venda, '_ControladorVenda__concluir_venda')
+    vendas = sorted(controlador_venda.vendas, key=lambda venda: venda.id_venda)
+
+    registro = threading.Lock()
+    finalizadas = []
+    gastos = Counter()
+    vendidos = Counter()
+    contadores = Counter()
+
+    def caixa(indice: int) -> None:
+        for venda in vendas[indice::threads]:
+            try:
+                concluir_venda(venda)
+            except (EstoqueInsuficienteException, ProdutoNaoEmEstoqueException,
+                    SaldoInsuficienteException):
+                with registro:
+                    contadores['recusadas'] += 1
+                continue
+            except Exception as erro:
+                with registro:
+                    contadores['erros'] += 1
+                print(f"Venda {venda.id_venda}: {type(erro).__name__}: {erro}", file=sys.stderr)
+                continue
+            with registro:
+                finalizadas.append(venda.id_venda)
+                gastos[venda.cliente.id] += venda.valor_total
+                for produto, quantidade in venda.carrinho.items():
+                    vendidos[produto.id] += quantidade
+
+    trabalhadores = [threading.Thread(target=caixa, args=(indice,)) for indice in range(threads)]
+    inicio = time.perf_counter()
+    for trabalhador in trabalhadores:
+        trabalhador.start()
+    for trabalhador in trabalhadores:
+        trabalhador.join()
+    duracao = time.perf_counter() - inicio
+    gerenciador_escrita_adiada.descarregar_todos()
+    resultados.put({
+        'duracao': duracao,
+        'finalizadas': sorted(finalizadas),
+        'gastos': dict(gastos),
+        'vendidos': dict(vendidos),
+        'recusadas': contadores['recusadas'],
+        'erros': contadores['erros'],
+    })
+
+
+def verificar(resultado: dict) -> list:
+    """
+    Recarrega os arquivos da pasta atual e retorna a lista de invariantes
+    violados (vazia se todos valem).
+    """
+    falhas = []
+    sistema = ControladorSistema()
+    finalizadas = set(resultado['finalizadas'])
+    gravadas = {venda.id_venda for venda in sistema.controlador_venda.vendas
+                if venda.status_venda == "Finalizada"}
+    if gravadas != finalizadas:
+        falhas.append(f"vendas finalizadas: {len(finalizadas)} confirmadas, "
+                      f"{len(gravadas)} gravadas ({len(finalizadas - gravadas)} perdidas, "
+                      f"{len(gravadas - finalizadas)} a mais)")
+
+    clientes_divergentes = [
+        cliente.id for cliente in sistema.controlador_cliente.clientes
+        if abs(SALDO_INICIAL - resultado['gastos'].get(cliente.id, 0.0) - cliente.saldo) > 1e-6]
+    if clientes_divergentes:
+        falhas.append(f"saldo divergente em {len(clientes_divergentes)} cliente(s)")
+
+    estoque = sistema.controlador_estoque.estoque
+    produtos_divergentes = [
+        produto.id for produto in sistema.controlador_cafe.cafes
+        if estoque.quantidade(produto.id) + resultado['vendidos'].get(produto.id, 0)
+        != UNIDADES_POR_PRODUTO]
+    if produtos_divergentes:
+        falhas.append(f"estoque divergente em {len(produtos_divergentes)} produto(s)")
+
+    estado = AgregadosVendaDAO().carregar()
+    agregados = AgregadosVendas.de_estado(estado) if estado is not None else None
+    if agregados is None or agregados.quantidade_vendas != len(finalizadas):
+        gravadas = agregados.quantidade_vendas if agregados is not None else 0
+        falhas.append(f"agregados com {gravadas} venda(s), esperadas {len(finalizadas)}")
+    if resultado['erros']:
+        falhas.append(f"{resultado['erros']} finalização(ões) com erro inesperado")
+    return falhas
+
+
+def main():
+    """Prepara o cenário, executa os caixas em um processo filho e verifica o disco."""
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    vendas_por_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    pasta_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        try:
+            contexto = multiprocessing.get_context('spawn')
+            preparacao = contexto.Process(target=preparar_cenario,
+                                          args=(threads, vendas_por_thread))
+            preparacao.start()
+            preparacao.join()
+            resultados = contexto.Queue()
+            execucao = contexto.Process(target=executar_caixas,
+                                        args=(threads, vendas_por_thread, resultados))
+            execucao.start()
+            while True:
+                try:
+                    resultado = resultados.get(timeout=1)
+                    break
+                except queue.Empty:
+                    if not execucao.is_alive():
+                        raise RuntimeError("O processo dos caixas terminou sem resultado.")
+            execucao.join()
+            falhas = verificar(resultado)
+        finally:
+            os.chdir(pasta_original)
+
+    print("\n" + "=" * 72)
+    print(f"ESTRESSE DA FINALIZAÇÃO COM PERSISTÊNCIA ({threads} caixas x "
+          f"{vendas_por_thread} vendas, modo {os.environ.get('CAFERRI_PERSISTENCIA', 'padrão')})")
+    print("=" * 72)
+    print(f"Finalizadas: {len(resultado['finalizadas'])} | Recusadas: {resultado['recusadas']} | "
+          f"Tempo: {resultado['duracao']:.2f} s")
+    for falha in falhas:
+        print(f"[FALHOU] {falha}")
+    if not falhas:
+        print("[OK] Todos os invariantes valem nos arquivos gravados.")
+    print("=" * 72)
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()